@@ -0,0 +1,127 @@
+"""
+Micro-benchmark for parsing Torrentio stream titles into Releases.
+
+Compares Torrentio._parse_stream with the previous implementation (three
+uncompiled searches, a split and an intermediate dict per stream) on a
+corpus of stream titles, after checking both produce the same Releases.
+
+Usage:
+    python benchmarks/parse_titles.py
+    python benchmarks/parse_titles.py --record tt0111161 tt0903747:1:1
+
+--record replaces the corpus with the titles Torrentio currently returns
+for the given IMDb IDs (series IDs take a :season:episode suffix).
+"""
+
+import argparse
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from indexer.torrentio import Torrentio  # noqa: E402
+from models.release import Release  # noqa: E402
+from transport.http_client import HttpClient  # noqa: E402
+
+DEFAULT_CORPUS = ROOT / "benchmarks" / "torrentio_titles.json"
+
+
+def legacy_parse_stream(stream: Dict[str, Any]) -> Release:
+    """The parser Torrentio used before _parse_stream, kept for comparison."""
+    title = stream["title"]
+    title_parts = title.split("\n")
+    parsed_title = title_parts[0] if title_parts else ""
+
+    size_match = re.search(r"💾\s*([\d.]+)\s*(GB|MB)", title)
+    size_in_gb = 0
+    if size_match:
+        size = float(size_match.group(1))
+        unit = size_match.group(2)
+        size_in_gb = size if unit == "GB" else round(size / 1024, 2)
+
+    peers_match = re.search(r"👤\s*(\d+)", title)
+    peers = int(peers_match.group(1)) if peers_match else 0
+
+    quality_match = re.search(r"(4K|2160p|1080p|720p|480p)", parsed_title)
+    quality = quality_match.group(1) if quality_match else ""
+
+    parsed_data = {
+        "title": parsed_title,
+        "size_in_gb": size_in_gb,
+        "peers": peers,
+        "quality": quality,
+    }
+    return Release(
+        title=parsed_data["title"],
+        infoHash=stream["infoHash"],
+        size_in_gb=parsed_data["size_in_gb"],
+        peers=parsed_data["peers"],
+    )
+
+
+def load_streams(corpus: Path) -> List[Dict[str, str]]:
+    titles = json.loads(corpus.read_text())
+    return [{"title": title, "infoHash": f"{i:040x}"} for i, title in enumerate(titles)]
+
+
+def record(ids: List[str], corpus: Path):
+    http = HttpClient()
+    base_url = Torrentio(http_client=http).base_url
+    titles = []
+    for imdb_id in ids:
+        kind = "series" if ":" in imdb_id else "movie"
+        response = http.get(f"{base_url}{kind}/{imdb_id}.json")
+        response.raise_for_status()
+        titles += [stream["title"] for stream in response.json().get("streams", [])]
+    corpus.write_text(json.dumps(titles, ensure_ascii=False, indent=0) + "\n")
+    print(f"Recorded {len(titles)} titles to {corpus}")
+
+
+def per_title_us(
+    parse: Callable[[Dict[str, Any]], Release],
+    streams: List[Dict[str, str]],
+    number: int,
+) -> float:
+    """Best-of-five time per parsed title, in microseconds."""
+    best = min(
+        timeit.repeat(
+            lambda: [parse(stream) for stream in streams], number=number, repeat=5
+        )
+    )
+    return best / number / len(streams) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--record", nargs="+", metavar="IMDB_ID")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.corpus)
+        return
+
+    streams = load_streams(args.corpus)
+    parse_stream = Torrentio(http_client=HttpClient())._parse_stream
+    mismatches = sum(
+        parse_stream(stream) != legacy_parse_stream(stream) for stream in streams
+    )
+    if mismatches:
+        print(f"{mismatches} of {len(streams)} titles parse differently")
+        sys.exit(1)
+
+    legacy = per_title_us(legacy_parse_stream, streams, args.number)
+    current = per_title_us(parse_stream, streams, args.number)
+    print(f"{len(streams)} titles")
+    print(f"{'legacy':>10} {legacy:8.2f} us/title")
+    print(f"{'current':>10} {current:8.2f} us/title  ({legacy / current:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
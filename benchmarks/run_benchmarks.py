@@ -0,0 +1,293 @@
+"""
+Offline throughput benchmark for process_all_watchlists.
+
+Starts local stand-ins for Torrentio, Real-Debrid and Trakt, feeds the real
+pipeline synthetic watchlists and reports wall time, requests issued, peak
+RSS and items/sec per size. Each size runs in its own process so peak RSS
+is not carried over from a previous run.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 100 1000 10000
+    python benchmarks/run_benchmarks.py --update-baseline
+
+Ranking dominates the run time, so the 10k run takes a while and is left
+out by default; --streams trades realism for speed.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+import trakt  # noqa: E402
+from benchmarks.stub_servers import (  # noqa: E402
+    StubServer,
+    StubSettings,
+    real_debrid_route,
+    synthetic_title,
+    torrentio_route,
+    trakt_route,
+)
+from content.trakt_provider import TraktProvider  # noqa: E402
+from debrid.real_debrid import RealDebrid  # noqa: E402
+from indexer.indexer_manager import IndexerManager  # noqa: E402
+from indexer.torrentio import Torrentio  # noqa: E402
+from main import process_all_watchlists  # noqa: E402
+from models.movie import MediaType, Movie  # noqa: E402
+from ranking.cached_policy import CachedReleasePolicy  # noqa: E402
+from ranking.rank_cache import RankCache  # noqa: E402
+from RTN import RTN, SettingsModel  # noqa: E402
+from RTN.models import BaseRankingModel  # noqa: E402
+from state.state_store import StateStore  # noqa: E402
+from transport.concurrency import ConcurrencyLimits  # noqa: E402
+from transport.http_client import HttpClient  # noqa: E402
+
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+# Relative change that counts as a regression when comparing to the baseline
+DEFAULT_TOLERANCE = 0.2
+
+
+class SyntheticWatchlist:
+    def __init__(self, size: int):
+        self.items = [
+            Movie(
+                title=synthetic_title(f"tt{i:07d}"),
+                year="2023",
+                imdb_id=f"tt{i:07d}",
+                media_type=MediaType.MOVIE,
+            )
+            for i in range(1, size + 1)
+        ]
+
+    def get_all_watchlists(self) -> List[Movie]:
+        return self.items
+
+
+class EmptyCollections:
+    def get_user_collections(self) -> Dict[str, list]:
+        return {}
+
+
+def run_once(size: int, settings: StubSettings, workers: int) -> Dict[str, float]:
+    """Run one cycle over a synthetic watchlist of the given size."""
+    servers = {
+        "torrentio": StubServer(torrentio_route(settings), settings).start(),
+        "real_debrid": StubServer(real_debrid_route(settings), settings).start(),
+        "trakt": StubServer(trakt_route(settings), settings).start(),
+    }
+    workdir = tempfile.mkdtemp(prefix="debridsync-bench-")
+    previous_cwd = os.getcwd()
+    trakt_url = trakt.Trakt.base_url
+    # Keep TraktProvider away from a real trakt_token.json
+    os.chdir(workdir)
+    try:
+        return _run_cycle(size, servers, workdir, workers)
+    finally:
+        os.chdir(previous_cwd)
+        trakt.Trakt.base_url = trakt_url
+        for server in servers.values():
+            server.stop()
+
+
+def _run_cycle(
+    size: int, servers: Dict[str, StubServer], workdir: str, workers: int
+) -> Dict[str, float]:
+    http_client = HttpClient(pool_maxsize=max(workers, 10))
+    torrentio = Torrentio(http_client=http_client)
+    torrentio.base_url = f"{servers['torrentio'].url}/stream/"
+    indexer_manager = IndexerManager(max_workers=workers)
+    indexer_manager.add_indexer("Torrentio", torrentio)
+
+    real_debrid = RealDebrid("benchmark", http_client=http_client)
+    real_debrid.BASE_URL = f"{servers['real_debrid'].url}/rest/1.0"
+
+    trakt.Trakt.base_url = servers["trakt"].url
+    trakt_provider = TraktProvider(client_id="benchmark", client_secret="benchmark")
+
+    ranker = RankCache(
+        RTN(
+            settings=SettingsModel(require=[], exclude=["CAM", "TS"], preferred=[]),
+            ranking_model=BaseRankingModel(),
+        ),
+        "benchmark",
+    )
+    state_store = StateStore(os.path.join(workdir, "state.db"))
+
+    started = time.perf_counter()
+    process_all_watchlists(
+        content_manager=SyntheticWatchlist(size),
+        collection_manager=EmptyCollections(),
+        indexer_manager=indexer_manager,
+        real_debrid=real_debrid,
+        dry_run=False,
+        trakt=trakt_provider,
+        ranker=ranker,
+        state_store=state_store,
+        max_workers=workers,
+        limits=ConcurrencyLimits(),
+        cached_policy=CachedReleasePolicy(mode="prefer"),
+    )
+    wall_time = time.perf_counter() - started
+
+    indexer_manager.shutdown()
+    state_store.close()
+    http_client.close()
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss /= 1024
+    return {
+        "items": size,
+        "wall_time": round(wall_time, 3),
+        "requests": sum(server.requests for server in servers.values()),
+        "upstream_errors": sum(server.errors for server in servers.values()),
+        "peak_rss_mb": round(peak_rss / 1024, 1),
+        "items_per_sec": round(size / wall_time, 2),
+    }
+
+
+def run_isolated(size: int, settings: StubSettings, workers: int) -> Dict[str, float]:
+    result = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--single",
+            str(size),
+            "--workers",
+            str(workers),
+            "--settings",
+            json.dumps(asdict(settings)),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Compare results with the stored baseline.
+
+    Returns:
+        List[str]: A description of every metric that regressed by more than
+        the tolerance.
+    """
+    regressions = []
+    for size, result in results.items():
+        expected = baseline.get(size)
+        if not expected:
+            continue
+        if result["items_per_sec"] < expected["items_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{size} items: {result['items_per_sec']} items/sec, "
+                f"baseline {expected['items_per_sec']}"
+            )
+        for metric in ("requests", "peak_rss_mb"):
+            if result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{size} items: {metric} {result[metric]}, "
+                    f"baseline {expected[metric]}"
+                )
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict]):
+    print(
+        f"{'items':>7} {'wall s':>9} {'requests':>9} {'errors':>7} "
+        f"{'rss MB':>8} {'items/s':>9} {'vs base':>8}"
+    )
+    for size, result in results.items():
+        expected = baseline.get(size)
+        change = (
+            f"{result['items_per_sec'] / expected['items_per_sec'] - 1:+.0%}"
+            if expected
+            else "-"
+        )
+        print(
+            f"{result['items']:>7} {result['wall_time']:>9.2f} "
+            f"{result['requests']:>9} {result['upstream_errors']:>7} "
+            f"{result['peak_rss_mb']:>8.1f} {result['items_per_sec']:>9.2f} "
+            f"{change:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--cached-rate", type=float, default=0.5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--settings", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    if args.single:
+        settings = StubSettings(**json.loads(args.settings))
+        print(json.dumps(run_once(args.single, settings, args.workers)))
+        return
+
+    settings = StubSettings(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        streams=args.streams,
+        cached_rate=args.cached_rate,
+    )
+    results = {
+        str(size): run_isolated(size, settings, args.workers) for size in args.sizes
+    }
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    same_setup = stored.get("settings") == dict(asdict(settings), workers=args.workers)
+    baseline = stored.get("results", {}) if same_setup else {}
+    if stored and not same_setup:
+        print("Baseline was recorded with other settings, not comparing")
+    print_table(results, baseline)
+
+    if args.update_baseline:
+        stored_results = stored.get("results", {}) if same_setup else {}
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "settings": dict(asdict(settings), workers=args.workers),
+                    "results": dict(stored_results, **results),
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark for picking the release to add from a large release set.
+
+Compares ranking every release and sorting them (the previous approach) with
+select_best, which ranks releases in order of their upper-bound rank and
+stops once none of the rest can beat the best so far. Every movie in the
+corpus is looked up against all of its releases with a cold rank cache, and
+both approaches must pick a release with the same rank.
+
+Usage:
+    python benchmarks/select_release.py
+    python benchmarks/select_release.py --corpus benchmarks/torrentio_titles.json
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.parse_titles import DEFAULT_CORPUS, load_streams  # noqa: E402
+from indexer.torrentio import Torrentio  # noqa: E402
+from models.release import Release  # noqa: E402
+from ranking.rank_cache import RankCache  # noqa: E402
+from ranking.selection import select_best  # noqa: E402
+from RTN import RTN, SettingsModel, title_match  # noqa: E402
+from RTN.models import BaseRankingModel  # noqa: E402
+from transport.http_client import HttpClient  # noqa: E402
+
+_MOVIE = re.compile(r"^(?P<title>.+?)[. ](?P<year>(?:19|20)\d\d)[. ]")
+
+
+def movies(releases: List[Release]) -> List[str]:
+    """The "Title (Year)" of every movie in the corpus, most releases first."""
+    counts = {}
+    for release in releases:
+        match = _MOVIE.match(release.title)
+        if match and not re.search(r"\bS\d|Season", release.title):
+            movie = f"{match['title'].replace('.', ' ')} ({match['year']})"
+            counts[movie] = counts.get(movie, 0) + 1
+    return sorted(counts, key=lambda movie: -counts[movie])
+
+
+def make_ranker() -> RankCache:
+    # The ranking model from config.yml.sample
+    rtn = RTN(
+        settings=SettingsModel(),
+        ranking_model=BaseRankingModel(uhd=200, hdr=100),
+    )
+    return RankCache(rtn, "benchmark")
+
+
+def rank_all(ranker: RankCache, releases: List[Release], movie: str) -> Optional[float]:
+    ranks = []
+    for release in releases:
+        parsed_title = ranker.parsed_title(release.title, release.infoHash)
+        if not title_match(parsed_title, movie, threshold=0.7):
+            continue
+        fetch, rank = ranker.rank(release.title, release.infoHash)
+        if fetch:
+            ranks.append(rank)
+    ranks.sort(reverse=True)
+    return ranks[0] if ranks else None
+
+
+def lazy(ranker: RankCache, releases: List[Release], movie: str) -> Optional[float]:
+    def score(release):
+        parsed_title = ranker.parsed_title(release.title, release.infoHash)
+        if not title_match(parsed_title, movie, threshold=0.7):
+            return None
+        fetch, rank = ranker.rank(release.title, release.infoHash)
+        return rank if fetch else None
+
+    best = select_best(
+        releases,
+        lambda release: ranker.upper_bound(release.title, release.infoHash),
+        score,
+    )
+    return best[0][0] if best else None
+
+
+def run(
+    select, releases: List[Release], movie: str, repeat: int
+) -> Tuple[float, int, float]:
+    """Fastest (rank, parsed titles, seconds) of repeat runs with a cold cache."""
+    runs = []
+    for _ in range(repeat):
+        ranker = make_ranker()
+        start = time.perf_counter()
+        rank = select(ranker, releases, movie)
+        runs.append((time.perf_counter() - start, ranker.stats()["misses"], rank))
+    elapsed, parsed, rank = min(runs, key=lambda run: run[0])
+    return rank, parsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    parse_stream = Torrentio(http_client=HttpClient())._parse_stream
+    releases = [parse_stream(stream) for stream in load_streams(args.corpus)]
+
+    totals = {"rank_all": [0, 0.0], "lazy": [0, 0.0]}
+    print(f"{len(releases)} releases")
+    print(f"{'movie':<45} {'parsed':>13} {'ms':>17}")
+    for movie in movies(releases):
+        expected, all_parsed, all_time = run(rank_all, releases, movie, args.repeat)
+        rank, lazy_parsed, lazy_time = run(lazy, releases, movie, args.repeat)
+        if rank != expected:
+            print(f"{movie}: picked rank {rank}, expected {expected}")
+            sys.exit(1)
+        totals["rank_all"][0] += all_parsed
+        totals["rank_all"][1] += all_time
+        totals["lazy"][0] += lazy_parsed
+        totals["lazy"][1] += lazy_time
+        print(
+            f"{movie:<45} {all_parsed:>6} {lazy_parsed:>6} "
+            f"{all_time * 1e3:>8.1f} {lazy_time * 1e3:>8.1f}"
+        )
+
+    (all_parsed, all_time), (lazy_parsed, lazy_time) = totals.values()
+    print(
+        f"{'total':<45} {all_parsed:>6} {lazy_parsed:>6} "
+        f"{all_time * 1e3:>8.1f} {lazy_time * 1e3:>8.1f}  "
+        f"({all_time / lazy_time:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional, Tuple
+
+# (status, headers, payload) returned by a route; payload None means no body
+Answer = Tuple[int, dict, Any]
+
+QUALITIES = ["2160p", "1080p", "1080p", "720p", "480p"]
+TAGS = ["WEB-DL.x264", "BluRay.x265.10bit", "WEBRip.AAC", "HDTV.x264", "CAM", "TS"]
+
+
+@dataclass
+class StubSettings:
+    latency: float = 0.0  # Seconds added to every response
+    error_rate: float = 0.0  # Fraction of requests answered with a 503
+    streams: int = 50  # Torrentio streams per response
+    cached_rate: float = 0.5  # Fraction of hashes Real-Debrid reports as cached
+    seed: int = 0
+
+
+class StubServer:
+    """
+    Threaded local HTTP server standing in for one upstream API.
+
+    Every request sleeps for the configured latency, fails with a 503 at the
+    configured error rate and is otherwise answered by the route function.
+    """
+
+    def __init__(
+        self, route: Callable[[str, str], Optional[Answer]], settings: StubSettings
+    ):
+        self.route = route
+        self.settings = settings
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(settings.seed)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._answer("GET")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                self._answer("POST")
+
+            def _answer(self, method: str):
+                with stub._lock:
+                    stub.requests += 1
+                    failed = stub._random.random() < stub.settings.error_rate
+                    if failed:
+                        stub.errors += 1
+                if stub.settings.latency:
+                    time.sleep(stub.settings.latency)
+
+                answer = None if failed else stub.route(method, self.path)
+                if failed:
+                    status, headers, payload = 503, {}, {"error": "unavailable"}
+                elif answer is None:
+                    status, headers, payload = 404, {}, {"error": "unknown_ressource"}
+                else:
+                    status, headers, payload = answer
+
+                body = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def synthetic_title(imdb_id: str) -> str:
+    return f"Synthetic Movie {int(imdb_id[2:])}"
+
+
+def info_hash(imdb_id: str, index: int) -> str:
+    return hashlib.sha1(f"{imdb_id}:{index}".encode()).hexdigest()
+
+
+def torrentio_route(settings: StubSettings) -> Callable[[str, str], Optional[Answer]]:
+    """Torrentio stream lists with a realistic mix of qualities, sizes and junk."""
+    pattern = re.compile(r"/stream/(?:movie|series)/(tt\d+)(?::\d+:\d+)?\.json$")
+
+    def route(method: str, path: str) -> Optional[Answer]:
+        match = pattern.search(path)
+        if method != "GET" or not match:
+            return None
+        imdb_id = match.group(1)
+        rng = random.Random(f"{settings.seed}:{imdb_id}")
+        name = synthetic_title(imdb_id).replace(" ", ".")
+        streams = []
+        for i in range(settings.streams):
+            # A few releases of other titles show up in most real responses
+            release_name = name if rng.random() > 0.1 else f"Other.Title.{i}"
+            size = rng.uniform(0.5, 60)
+            streams.append(
+                {
+                    "name": "Torrentio\n" + rng.choice(QUALITIES),
+                    "title": (
+                        f"{release_name}.2023.{rng.choice(QUALITIES)}."
+                        f"{rng.choice(TAGS)}-GRP{i}\n"
+                        f"👤 {rng.randint(0, 500)} 💾 {size:.2f} GB ⚙️ Stub"
+                    ),
+                    "infoHash": info_hash(imdb_id, i),
+                }
+            )
+        return 200, {}, {"streams": streams}
+
+    return route
+
+
+def real_debrid_route(settings: StubSettings) -> Callable[[str, str], Optional[Answer]]:
+    """The handful of Real-Debrid endpoints the pipeline uses."""
+    counter = iter(range(1, 1 << 62))
+    lock = threading.Lock()
+
+    def route(method: str, path: str) -> Optional[Answer]:
+        path = path.split("?")[0]
+        if path.startswith("/rest/1.0/torrents/instantAvailability/"):
+            hashes = path.rsplit("/instantAvailability/", 1)[1].split("/")
+            return (
+                200,
+                {},
+                {
+                    torrent_hash: (
+                        {"rd": [{"1": {"filename": "movie.mkv", "filesize": 1}}]}
+                        if int(torrent_hash[:8], 16) / 0xFFFFFFFF < settings.cached_rate
+                        else []
+                    )
+                    for torrent_hash in hashes
+                },
+            )
+        if method == "POST" and path == "/rest/1.0/torrents/addMagnet":
+            with lock:
+                torrent_id = f"STUB{next(counter)}"
+            return 201, {}, {"id": torrent_id, "uri": f"/torrents/info/{torrent_id}"}
+        if method == "POST" and path.startswith("/rest/1.0/torrents/selectFiles/"):
+            return 204, {}, None
+        if path.startswith("/rest/1.0/torrents/info/"):
+            return 200, {}, {"id": path.rsplit("/", 1)[1], "status": "downloaded"}
+        if path == "/rest/1.0/torrents":
+            return 200, {"X-Total-Count": "0"}, []
+        return None
+
+    return route
+
+
+def trakt_route(settings: StubSettings) -> Callable[[str, str], Optional[Answer]]:
+    """Release dates for check_released; every synthetic movie is out."""
+    pattern = re.compile(r"/movies/(tt\d+)/releases/us$")
+
+    def route(method: str, path: str) -> Optional[Answer]:
+        if method != "GET" or not pattern.search(path.split("?")[0]):
+            return None
+        return (
+            200,
+            {},
+            [
+                {
+                    "country": "us",
+                    "release_type": "theatrical",
+                    "release_date": "2023-01-01",
+                },
+                {
+                    "country": "us",
+                    "release_type": "digital",
+                    "release_date": "2023-03-01",
+                },
+            ],
+        )
+
+    return route
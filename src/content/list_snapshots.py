@@ -0,0 +1,68 @@
+import json
+import time
+from typing import List, Optional
+
+from models.movie import MediaType, Movie
+from state.state_store import StateStore
+
+
+class ListSnapshotStore:
+    """
+    Last downloaded copy of each watchlist, tagged with the provider's
+    change marker (e.g. Trakt's updated_at) at the time it was fetched.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS list_snapshots (
+            list_key TEXT PRIMARY KEY,
+            marker TEXT NOT NULL,
+            items TEXT NOT NULL,
+            synced_at REAL NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, state_store: StateStore):
+        self.state_store = state_store
+        state_store.ensure_schema(self.SCHEMA)
+
+    def get(self, list_key: str, marker: str) -> Optional[List[Movie]]:
+        """
+        Return the stored items, or None if there is no snapshot for this marker.
+        """
+        rows = self.state_store.query(
+            "SELECT items FROM list_snapshots WHERE list_key = ? AND marker = ?",
+            (list_key, marker),
+        )
+        if not rows:
+            return None
+        return [
+            Movie(
+                title=item["title"],
+                year=item["year"],
+                imdb_id=item["imdb_id"],
+                media_type=MediaType[item["media_type"]],
+            )
+            for item in json.loads(rows[0][0])
+        ]
+
+    def save(self, list_key: str, marker: str, items: List[Movie]):
+        self.state_store.execute(
+            "INSERT OR REPLACE INTO list_snapshots (list_key, marker, items, synced_at) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                list_key,
+                marker,
+                json.dumps(
+                    [
+                        {
+                            "title": item.title,
+                            "year": item.year,
+                            "imdb_id": item.imdb_id,
+                            "media_type": item.media_type.name,
+                        }
+                        for item in items
+                    ]
+                ),
+                time.time(),
+            ),
+        )
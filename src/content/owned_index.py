@@ -0,0 +1,67 @@
+import logging
+import sys
+import time
+from typing import Dict, Iterable, List, Set
+
+logger = logging.getLogger(__name__)
+
+
+class OwnedItemIndex:
+    """
+    Set of IMDb IDs the user already owns, for constant-time lookups.
+
+    Built once per cycle from every collection provider plus the items
+    processed so far, instead of scanning the collections for each item.
+    """
+
+    def __init__(self, imdb_ids: Set[str], build_seconds: float = 0):
+        self.imdb_ids = imdb_ids
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def build(
+        cls,
+        user_collections: Dict[str, List[Dict[str, str]]],
+        processed_ids: Iterable[str] = (),
+    ) -> "OwnedItemIndex":
+        """
+        Args:
+            user_collections (Dict[str, List[Dict[str, str]]]): Collections keyed by
+                provider name, as returned by CollectionManager.get_user_collections.
+            processed_ids (Iterable[str]): IMDb IDs already handed to the debrid service.
+
+        Returns:
+            OwnedItemIndex: The index. Entries without an IMDb ID are left out.
+        """
+        started = time.perf_counter()
+        imdb_ids = {
+            item["imdb_id"]
+            for collection in user_collections.values()
+            for item in collection
+            if item.get("imdb_id")
+        }
+        imdb_ids.update(imdb_id for imdb_id in processed_ids if imdb_id)
+        index = cls(imdb_ids, time.perf_counter() - started)
+
+        logger.info(
+            f"Owned item index: {len(index)} IMDb IDs from "
+            f"{', '.join(user_collections) or 'no collections'} built in "
+            f"{index.build_seconds * 1000:.1f}ms (~{index.memory_bytes() / 1024:.0f}KB)"
+        )
+        return index
+
+    def add(self, imdb_id: str):
+        if imdb_id:
+            self.imdb_ids.add(imdb_id)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the index, including the ID strings."""
+        return sys.getsizeof(self.imdb_ids) + sum(
+            sys.getsizeof(imdb_id) for imdb_id in self.imdb_ids
+        )
+
+    def __contains__(self, imdb_id: str) -> bool:
+        return imdb_id in self.imdb_ids
+
+    def __len__(self) -> int:
+        return len(self.imdb_ids)
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from state.state_store import StateStore
+
+
+@dataclass(frozen=True)
+class LibraryScan:
+    scanned_at: float
+    full_scan_at: float
+
+
+class PlexLibrarySnapshot:
+    """
+    Persisted copy of the Plex libraries, so each cycle only has to fetch the
+    items added or updated since the previous scan.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS plex_library_items (
+            library TEXT NOT NULL,
+            rating_key TEXT NOT NULL,
+            title TEXT NOT NULL,
+            year TEXT NOT NULL,
+            imdb_id TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            PRIMARY KEY (library, rating_key)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS plex_library_scans (
+            library TEXT PRIMARY KEY,
+            scanned_at REAL NOT NULL,
+            full_scan_at REAL NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, state_store: StateStore):
+        self.state_store = state_store
+        state_store.ensure_schema(self.SCHEMA)
+
+    def last_scan(self, library: str) -> Optional[LibraryScan]:
+        rows = self.state_store.query(
+            "SELECT scanned_at, full_scan_at FROM plex_library_scans WHERE library = ?",
+            (library,),
+        )
+        return LibraryScan(*rows[0]) if rows else None
+
+    def replace(self, library: str, items: Iterable[Dict[str, str]], scanned_at: float):
+        """Store the result of a full scan, dropping items no longer in the library."""
+        with self.state_store.transaction():
+            self.state_store.execute(
+                "DELETE FROM plex_library_items WHERE library = ?", (library,)
+            )
+            self._upsert_items(library, items)
+            self._record_scan(library, scanned_at, full_scan_at=scanned_at)
+
+    def update(self, library: str, items: Iterable[Dict[str, str]], scanned_at: float):
+        """Store items added or updated since the previous scan."""
+        self._upsert_items(library, items)
+        self.state_store.execute(
+            "UPDATE plex_library_scans SET scanned_at = ? WHERE library = ?",
+            (scanned_at, library),
+        )
+
+    def count(self, library: str) -> int:
+        return self.state_store.query(
+            "SELECT COUNT(*) FROM plex_library_items WHERE library = ?", (library,)
+        )[0][0]
+
+    def items(self, library: str) -> List[Dict[str, str]]:
+        rows = self.state_store.query(
+            "SELECT title, year, imdb_id, media_type FROM plex_library_items "
+            "WHERE library = ?",
+            (library,),
+        )
+        return [
+            {"title": title, "year": year, "imdb_id": imdb_id, "media_type": media_type}
+            for title, year, imdb_id, media_type in rows
+        ]
+
+    def _upsert_items(self, library: str, items: Iterable[Dict[str, str]]):
+        self.state_store.executemany(
+            "INSERT OR REPLACE INTO plex_library_items "
+            "(library, rating_key, title, year, imdb_id, media_type) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    library,
+                    item["rating_key"],
+                    item["title"],
+                    item["year"],
+                    item["imdb_id"],
+                    item["media_type"],
+                )
+                for item in items
+            ),
+        )
+
+    def _record_scan(self, library: str, scanned_at: float, full_scan_at: float):
+        self.state_store.execute(
+            "INSERT OR REPLACE INTO plex_library_scans "
+            "(library, scanned_at, full_scan_at) VALUES (?, ?, ?)",
+            (library, scanned_at, full_scan_at),
+        )
@@ -1,5 +1,8 @@
 import logging
+import time
+from datetime import datetime
 from typing import List, Dict
+from content.plex_library_snapshot import PlexLibrarySnapshot
 from models.movie import Movie, MediaType
 from plexapi.server import PlexServer
 
@@ -9,12 +12,25 @@ from icecream import ic
 
 logger = logging.getLogger(__name__)
 
+# Look back a little further than the last scan to absorb clock skew with the server
+SCAN_OVERLAP_SECONDS = 300
+
 
 class PlexProvider:
-    def __init__(self, token: str, server_url: str, library_name: str):
+    def __init__(
+        self,
+        token: str,
+        server_url: str,
+        library_name: str = None,
+        library_names: List[str] = None,
+        library_snapshot: PlexLibrarySnapshot = None,
+        full_scan_interval: float = 86400,
+    ):
         self.token = token
         self.server_url = server_url
-        self.library_name = library_name
+        self.library_names = library_names or ([library_name] if library_name else [])
+        self.library_snapshot = library_snapshot
+        self.full_scan_interval = full_scan_interval
         self.account = MyPlexAccount(token=self.token)
         self.server = PlexServer(self.server_url, self.token)
         logger.debug("Plex initialized")
@@ -63,23 +79,65 @@ class PlexProvider:
         return MediaType.UNKNOWN
 
     def get_user_collection(self) -> List[Dict[str, str]]:
-        try:
-            logger.info(f"Fetching user library form: {self.library_name}")
-            # Get the specified library
-            library = self.server.library.section(self.library_name)
+        collection = []
+        for library_name in self.library_names:
+            try:
+                logger.info(f"Fetching user library form: {library_name}")
+                # Get the specified library
+                library = self.server.library.section(library_name)
 
-            # Fetch all items from the library
-            all_items = library.all()
+                if self.library_snapshot:
+                    collection.extend(self._sync_library(library_name, library))
+                else:
+                    collection.extend(
+                        self._collection_item(movie) for movie in library.all()
+                    )
+            except Exception as e:
+                logger.error(f"Error fetching Plex user collection: {e}")
+        return collection
 
-            return [
-                {
-                    "title": movie.title,
-                    "year": str(movie.year) if movie.year else "",
-                    "imdb_id": self._get_imdb_id(movie.guids),
-                    "media_type": str(self._get_media_type(movie).name),
-                }
-                for movie in all_items
-            ]
-        except Exception as e:
-            logger.error(f"Error fetching Plex user collection: {e}")
-            return []
+    def _sync_library(self, library_name: str, library) -> List[Dict[str, str]]:
+        """
+        Bring the stored snapshot of a library up to date and return its items.
+
+        Only items added or updated since the last scan are fetched. A full scan
+        runs on the first sync, every full_scan_interval, and whenever the item
+        count on the server no longer matches the snapshot (e.g. after deletions).
+        """
+        started = time.time()
+        last_scan = self.library_snapshot.last_scan(library_name)
+
+        if last_scan and started - last_scan.full_scan_at < self.full_scan_interval:
+            since = datetime.fromtimestamp(last_scan.scanned_at - SCAN_OVERLAP_SECONDS)
+            changed = library.search(
+                filters={"or": [{"addedAt>>": since}, {"updatedAt>>": since}]}
+            )
+            self.library_snapshot.update(
+                library_name,
+                [self._collection_item(movie) for movie in changed],
+                started,
+            )
+            server_count = library.totalViewSize(includeCollections=False)
+            if server_count == self.library_snapshot.count(library_name):
+                logger.info(f"{len(changed)} new or updated items in {library_name}")
+                return self.library_snapshot.items(library_name)
+            logger.info(
+                f"{library_name} has {server_count} items but the snapshot has "
+                f"{self.library_snapshot.count(library_name)}, rescanning"
+            )
+
+        self.library_snapshot.replace(
+            library_name,
+            [self._collection_item(movie) for movie in library.all()],
+            started,
+        )
+        return self.library_snapshot.items(library_name)
+
+    def _collection_item(self, movie) -> Dict[str, str]:
+        return {
+            "rating_key": str(movie.ratingKey),
+            "title": movie.title,
+            "year": str(movie.year) if movie.year else "",
+            "imdb_id": self._get_imdb_id(movie.guids),
+            "media_type": str(self._get_media_type(movie).name),
+        }
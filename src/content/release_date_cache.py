@@ -0,0 +1,81 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from state.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ReleaseDateEntry:
+    imdb_id: str
+    # Earliest digital or physical release date, None if Trakt knows none
+    release_date: Optional[date]
+    checked_at: float
+
+    def is_released(self, today: date) -> bool:
+        return self.release_date is not None and self.release_date <= today
+
+    def needs_refresh(self, today: date, now: float, refresh_interval: float) -> bool:
+        """
+        Items whose release date has passed never need another lookup. Items with
+        a future or unknown date are looked up again once the entry is older than
+        refresh_interval, since announced dates sometimes move.
+        """
+        if self.is_released(today):
+            return False
+        return now - self.checked_at >= refresh_interval
+
+
+class ReleaseDateCache:
+    """Locally stored release dates, so check_released can skip most Trakt calls."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS release_dates (
+            imdb_id TEXT PRIMARY KEY,
+            release_date TEXT,
+            checked_at REAL NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, state_store: StateStore, refresh_interval: float = 86400):
+        self.state_store = state_store
+        self.refresh_interval = refresh_interval
+        state_store.ensure_schema(self.SCHEMA)
+
+    def get(self, imdb_id: str) -> Optional[ReleaseDateEntry]:
+        rows = self.state_store.query(
+            "SELECT release_date, checked_at FROM release_dates WHERE imdb_id = ?",
+            (imdb_id,),
+        )
+        if not rows:
+            return None
+        release_date, checked_at = rows[0]
+        return ReleaseDateEntry(
+            imdb_id,
+            date.fromisoformat(release_date) if release_date else None,
+            checked_at,
+        )
+
+    def get_fresh(self, imdb_id: str) -> Optional[ReleaseDateEntry]:
+        """Return the stored entry unless it is missing or due for a refresh."""
+        entry = self.get(imdb_id)
+        if entry is None:
+            return None
+        if entry.needs_refresh(date.today(), time.time(), self.refresh_interval):
+            return None
+        return entry
+
+    def set(self, imdb_id: str, release_date: Optional[date]):
+        self.state_store.execute(
+            "INSERT OR REPLACE INTO release_dates (imdb_id, release_date, checked_at) "
+            "VALUES (?, ?, ?)",
+            (
+                imdb_id,
+                release_date.isoformat() if release_date else None,
+                time.time(),
+            ),
+        )
@@ -3,12 +3,16 @@
 import json
 import logging
 import os
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional
 from datetime import datetime
 from functools import wraps
 
+from content.list_snapshots import ListSnapshotStore
+from content.release_date_cache import ReleaseDateCache
 from models.movie import Movie, MediaType
-from threading import Condition
+from transport.rate_limiter import RateLimitedAdapter, RateLimiter
+from threading import Condition, Lock
 
 import trakt
 
@@ -17,6 +21,8 @@ from icecream import ic
 
 logger = logging.getLogger(__name__)
 
+TRAKT_API_URL = "https://api.trakt.tv/"
+
 
 def require_auth(func):
     @wraps(func)
@@ -29,9 +35,23 @@ def require_auth(func):
 
 
 class TraktProvider:
-    def __init__(self, client_id: str, client_secret: str):
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        release_dates: ReleaseDateCache = None,
+        list_snapshots: ListSnapshotStore = None,
+        activities_ttl: float = 60,
+        rate_limiter: RateLimiter = None,
+    ):
         self.client_id = client_id
         self.client_secret = client_secret
+        self.release_dates = release_dates
+        self.list_snapshots = list_snapshots
+        self.activities_ttl = activities_ttl
+        self._activities = None
+        self._activities_fetched_at = 0.0
+        self._activities_lock = Lock()
         self.token_file = "trakt_token.json"
 
         self.is_authenticating = Condition()
@@ -40,8 +60,35 @@ class TraktProvider:
         trakt.Trakt.on("oauth.token_refreshed", self._on_token_refreshed)
 
         self._configure_trakt()
+        self._rate_limit_trakt(rate_limiter)
         logger.debug("Trakt initialized")
 
+    @staticmethod
+    def _rate_limit_trakt(rate_limiter: RateLimiter):
+        """
+        Route trakt-py's requests through the rate limiter.
+
+        trakt-py's own adapter is wrapped rather than replaced, so its SSL and
+        adapter settings still apply, and the wrapper is mounted again
+        whenever trakt-py rebuilds its session.
+        """
+        http = trakt.Trakt.http
+        rebuild = getattr(http.rebuild, "__wrapped__", http.rebuild)
+
+        def mount(session):
+            adapter = session.get_adapter(TRAKT_API_URL)
+            if isinstance(adapter, RateLimitedAdapter):
+                adapter = adapter.adapter
+            session.mount(TRAKT_API_URL, RateLimitedAdapter(rate_limiter, adapter))
+            return session
+
+        @wraps(rebuild)
+        def rebuild_rate_limited():
+            return mount(rebuild())
+
+        http.rebuild = rebuild_rate_limited
+        mount(http.session)
+
     def _configure_trakt(self):
         trakt.Trakt.configuration.defaults.client(
             id=self.client_id, secret=self.client_secret
@@ -103,6 +150,11 @@ class TraktProvider:
 
     @require_auth
     def get_watchlist(self) -> List[Movie]:
+        marker = self._activity_marker("watchlist")
+        snapshot = self._get_snapshot("watchlist", marker)
+        if snapshot is not None:
+            return snapshot
+
         try:
             logger.info("Getting own watchlist...")
             watchlist = trakt.Trakt["users/me/watchlist"].get(extended="full")
@@ -116,6 +168,7 @@ class TraktProvider:
                 )
                 for item in watchlist
             ]
+            self._save_snapshot("watchlist", marker, retval)
             return retval
         except trakt.core.exceptions.RequestFailedError as e:
             if e.response.status_code == 401:  # Unauthorized, token might be expired
@@ -123,7 +176,7 @@ class TraktProvider:
                 self._refresh_token()
                 # Retry after refreshing
                 watchlist = trakt.Trakt["users/me/watchlist"].get(extended="full")
-                return [
+                retval = [
                     Movie(
                         title=item.title,
                         year=str(item.year) if hasattr(item, "year") else "",
@@ -134,6 +187,8 @@ class TraktProvider:
                     )
                     for item in watchlist
                 ]
+                self._save_snapshot("watchlist", marker, retval)
+                return retval
             else:
                 logger.error(f"Error fetching Trakt watchlist: {e}")
                 return []
@@ -143,11 +198,20 @@ class TraktProvider:
 
     @require_auth
     def get_own_list(self, list_name: str) -> List[Movie]:
+        list_key = f"me/{list_name}"
+        # Trakt only tracks one timestamp covering all of the user's lists
+        marker = self._activity_marker("lists")
+        snapshot = self._get_snapshot(list_key, marker)
+        if snapshot is not None:
+            return snapshot
+
         try:
             logger.info(f"Getting {list_name} list...")
             watchlist = trakt.Trakt[f"users/me/lists/{list_name}"].get()
-            if not watchlist.items():
+            items = watchlist.items()
+            if not items:
                 logger.debug(f"Empty list {list_name}")
+                self._save_snapshot(list_key, marker, [])
                 return []
 
             retval = [
@@ -157,8 +221,9 @@ class TraktProvider:
                     imdb_id=item.get_key("imdb") if hasattr(item, "get_key") else "",
                     media_type=MediaType(self._get_media_type(item)),
                 )
-                for item in watchlist.items()
+                for item in items
             ]
+            self._save_snapshot(list_key, marker, retval)
             return retval
         except Exception as e:
             logger.error(f"Unexpected error fetching Trakt watchlist: {e}")
@@ -167,9 +232,21 @@ class TraktProvider:
     def get_user_list(self, list_name: str) -> List[Movie]:
         try:
             logger.info(f"Getting {list_name} ...")
+            # The list summary is cheap and carries updated_at; the items are not
             watchlist = trakt.Trakt[f"users/{list_name}"].get()
-            if not watchlist.items():
+            marker = (
+                str(watchlist.updated_at)
+                if getattr(watchlist, "updated_at", None)
+                else None
+            )
+            snapshot = self._get_snapshot(list_name, marker)
+            if snapshot is not None:
+                return snapshot
+
+            items = watchlist.items()
+            if not items:
                 logger.debug(f"Empty list {list_name}")
+                self._save_snapshot(list_name, marker, [])
                 return []
 
             retval = [
@@ -179,13 +256,52 @@ class TraktProvider:
                     imdb_id=item.get_key("imdb") if hasattr(item, "get_key") else "",
                     media_type=MediaType(self._get_media_type(item)),
                 )
-                for item in watchlist.items()
+                for item in items
             ]
+            self._save_snapshot(list_name, marker, retval)
             return retval
         except Exception as e:
             logger.error(f"Unexpected error fetching Trakt watchlist: {e}")
             return []
 
+    def _activity_marker(self, section: str) -> Optional[str]:
+        """
+        The updated_at timestamp of a section of the user's last activities.
+
+        The last activities are fetched at most once per activities_ttl so all
+        lists synced in the same cycle share one request.
+        """
+        if not self.list_snapshots:
+            return None
+
+        with self._activities_lock:
+            if time.monotonic() - self._activities_fetched_at >= self.activities_ttl:
+                try:
+                    self._activities = trakt.Trakt["sync"].last_activities()
+                except Exception as e:
+                    logger.error(f"Error fetching Trakt last activities: {e}")
+                    self._activities = None
+                self._activities_fetched_at = time.monotonic()
+            activities = self._activities
+
+        if not isinstance(activities, dict):
+            return None
+        return activities.get(section, {}).get("updated_at")
+
+    def _get_snapshot(
+        self, list_key: str, marker: Optional[str]
+    ) -> Optional[List[Movie]]:
+        if not self.list_snapshots or not marker:
+            return None
+        snapshot = self.list_snapshots.get(list_key, marker)
+        if snapshot is not None:
+            logger.info(f"Trakt list {list_key} unchanged, using local snapshot")
+        return snapshot
+
+    def _save_snapshot(self, list_key: str, marker: Optional[str], items: List[Movie]):
+        if self.list_snapshots and marker:
+            self.list_snapshots.save(list_key, marker, items)
+
     def _get_media_type(self, item) -> MediaType:
         if isinstance(item, trakt.objects.Movie) or (
             hasattr(item, "type") and item.type == "movie"
@@ -255,6 +371,12 @@ class TraktProvider:
             return []
 
     def check_released(self, movie: Movie) -> bool:
+        if self.release_dates:
+            cached = self.release_dates.get_fresh(movie.imdb_id)
+            if cached:
+                logger.debug(f"Using stored release date for: {movie.title}")
+                return cached.is_released(datetime.now().date())
+
         try:
             logger.info(f"Checking release status for: {movie.title}")
 
@@ -264,11 +386,16 @@ class TraktProvider:
                 today = datetime.now().date()
                 digital_released = False
                 physical_released = False
+                first_release_date = None
 
                 for release in release_data:
+                    if release["release_type"] not in ("digital", "physical"):
+                        continue
                     release_date = datetime.strptime(
                         release["release_date"], "%Y-%m-%d"
                     ).date()
+                    if first_release_date is None or release_date < first_release_date:
+                        first_release_date = release_date
                     if release_date <= today:
                         if release["release_type"] == "digital":
                             logger.info(f"{movie.title} has been digitally released.")
@@ -280,6 +407,9 @@ class TraktProvider:
                 if not digital_released and not physical_released:
                     logger.info(f"{movie.title} has not been released yet.")
 
+                if self.release_dates:
+                    self.release_dates.set(movie.imdb_id, first_release_date)
+
                 return digital_released or physical_released
         except Exception as e:
             logger.error(f"Error fetching movie release data: {e}")
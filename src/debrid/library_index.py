@@ -0,0 +1,144 @@
+import logging
+import time
+from typing import Dict, List, Optional
+
+from state.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+class RealDebridLibrary:
+    """
+    Local mirror of the hashes in the user's Real-Debrid account.
+
+    Refreshes walk the account newest first and stop at the newest torrent
+    seen by the previous refresh, so a steady-state refresh costs a single
+    page. Torrents this process adds are recorded right away but do not move
+    that mark, so anything added by hand in between is still picked up. A
+    full resync every full_sync_interval picks up deletions.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS real_debrid_torrents (
+            hash TEXT PRIMARY KEY,
+            id TEXT NOT NULL,
+            status TEXT,
+            synced_at REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS real_debrid_syncs (
+            name TEXT PRIMARY KEY,
+            synced_at REAL NOT NULL,
+            newest_id TEXT
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(
+        self, real_debrid, state_store: StateStore, full_sync_interval: float = 86400
+    ):
+        self.real_debrid = real_debrid
+        self.state_store = state_store
+        self.full_sync_interval = full_sync_interval
+        state_store.ensure_schema(self.SCHEMA)
+        columns = [
+            row[1] for row in state_store.query("PRAGMA table_info(real_debrid_syncs)")
+        ]
+        if "newest_id" not in columns:
+            # Created before refreshes were incremental; without a mark the
+            # next refresh walks the whole account
+            state_store.execute(
+                "ALTER TABLE real_debrid_syncs ADD COLUMN newest_id TEXT"
+            )
+
+    def refresh(self):
+        """Bring the mirror up to date with the account."""
+        started = time.time()
+        rows = self.state_store.query(
+            "SELECT synced_at, newest_id FROM real_debrid_syncs WHERE name = 'full'"
+        )
+        if not rows or started - rows[0][0] >= self.full_sync_interval:
+            self._full_sync(started)
+            return
+
+        full_synced_at, newest_id = rows[0]
+        new_torrents = []
+        for torrent in self.real_debrid.iter_user_torrents(compact=True, max_workers=1):
+            if torrent["id"] == newest_id:
+                break
+            new_torrents.append(torrent)
+        else:
+            # The mark is gone from the account, so this walk saw all of it
+            self._replace(new_torrents, started, full_synced_at=started)
+            logger.info(f"Real-Debrid library: resynced {len(new_torrents)} torrents")
+            return
+
+        if new_torrents:
+            with self.state_store.transaction():
+                self._store(new_torrents, started)
+                self._record_sync(full_synced_at, new_torrents[0]["id"])
+        logger.info(f"Real-Debrid library: {len(new_torrents)} new torrents")
+
+    def contains(self, torrent_hash: str) -> bool:
+        return bool(
+            self.state_store.query(
+                "SELECT 1 FROM real_debrid_torrents WHERE hash = ?",
+                (torrent_hash.lower(),),
+            )
+        )
+
+    def add(self, torrent_hash: str, torrent_id: str, status: str = None):
+        """Record a torrent added by this process without waiting for a refresh."""
+        self._store([{"hash": torrent_hash, "id": torrent_id, "status": status}])
+
+    def get_user_collection(self) -> List[Dict[str, str]]:
+        """
+        Watchlist items whose chosen release is in the Real-Debrid account.
+
+        Real-Debrid only knows hashes, so items are matched through the hash
+        recorded in the state store when the release was picked.
+        """
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing Real-Debrid library: {e}")
+
+        rows = self.state_store.query("""
+            SELECT items.imdb_id, items.title, items.media_type
+            FROM items JOIN real_debrid_torrents
+                ON real_debrid_torrents.hash = lower(items.info_hash)
+            """)
+        return [
+            {"title": title, "year": "", "imdb_id": imdb_id, "media_type": media_type}
+            for imdb_id, title, media_type in rows
+        ]
+
+    def _full_sync(self, started: float):
+        torrents = list(self.real_debrid.iter_user_torrents(compact=True))
+        self._replace(torrents, started, full_synced_at=started)
+        logger.info(f"Real-Debrid library: full sync of {len(torrents)} torrents")
+
+    def _replace(
+        self, torrents: List[Dict[str, str]], synced_at: float, full_synced_at: float
+    ):
+        with self.state_store.transaction():
+            self.state_store.execute("DELETE FROM real_debrid_torrents")
+            self._store(torrents, synced_at)
+            self._record_sync(full_synced_at, torrents[0]["id"] if torrents else None)
+
+    def _record_sync(self, full_synced_at: float, newest_id: Optional[str]):
+        self.state_store.execute(
+            "INSERT OR REPLACE INTO real_debrid_syncs (name, synced_at, newest_id) "
+            "VALUES ('full', ?, ?)",
+            (full_synced_at, newest_id),
+        )
+
+    def _store(self, torrents: List[Dict[str, str]], synced_at: float = None):
+        synced_at = synced_at or time.time()
+        self.state_store.executemany(
+            "INSERT OR REPLACE INTO real_debrid_torrents (hash, id, status, synced_at) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                (torrent["hash"].lower(), torrent["id"], torrent["status"], synced_at)
+                for torrent in torrents
+                if torrent.get("hash")
+            ),
+        )
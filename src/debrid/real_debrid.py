@@ -1,14 +1,34 @@
-import requests
-from typing import Dict, Any, List
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
 
-from icecream import ic
+from transport.http_client import HttpClient, shared_client
+
+logger = logging.getLogger(__name__)
 
 
 class RealDebrid:
     BASE_URL = "https://api.real-debrid.com/rest/1.0"
-
-    def __init__(self, api_token: str):
+    # Hashes per instantAvailability request, keeps the URL well below server limits
+    AVAILABILITY_BATCH_SIZE = 50
+    # Upper bound on remembered availability answers, on top of their TTL
+    AVAILABILITY_CACHE_SIZE = 20000
+
+    def __init__(
+        self,
+        api_token: str,
+        http_client: HttpClient = None,
+        availability_ttl: float = 300,
+    ):
         self.api_token = api_token
+        self.http = http_client or shared_client()
+        self.availability_ttl = availability_ttl
+        # Oldest answer first, so expired ones are trimmed from the front
+        self._availability: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self._availability_lock = threading.Lock()
         self.headers = {
             "Authorization": f"Bearer {self.api_token}",
             "Content-Type": "application/x-www-form-urlencoded",
@@ -32,7 +52,7 @@ class RealDebrid:
             "magnet": f"magnet:?xt=urn:btih:{torrent_hash}",
         }
 
-        response = requests.post(url, headers=self.headers, data=data)
+        response = self.http.post(url, headers=self.headers, data=data)
         response.raise_for_status()
         return response.json()
 
@@ -52,7 +72,7 @@ class RealDebrid:
             "files": file_ids,
         }
 
-        response = requests.post(url, headers=self.headers, data=data)
+        response = self.http.post(url, headers=self.headers, data=data)
         response.raise_for_status()
 
     def get_torrent_info(self, torrent_id: str) -> Dict[str, Any]:
@@ -70,7 +90,7 @@ class RealDebrid:
         """
         url = f"{self.BASE_URL}/torrents/info/{torrent_id}"
 
-        response = requests.get(url, headers=self.headers)
+        response = self.http.get(url, headers=self.headers)
         response.raise_for_status()
         return response.json()
 
@@ -84,26 +104,130 @@ class RealDebrid:
         Raises:
             requests.RequestException: If there's an error with the API request.
         """
-        url = f"{self.BASE_URL}/torrents"
-        limit = 100
-        offset = 0
-        all_torrents = []
+        return list(self.iter_user_torrents())
 
-        while True:
-            params = {"limit": limit, "offset": offset}
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            ic(response.text)
+    def iter_user_torrents(
+        self, compact: bool = False, max_workers: int = 4, page_size: int = 100
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the user's torrents, newest first, as pages arrive.
 
-            torrents = response.json()
-            all_torrents.extend(torrents)
+        The first page reveals the total count through X-Total-Count; the
+        remaining pages are then fetched concurrently but still yielded in order.
 
-            total_count = int(response.headers.get("X-Total-Count", 0))
-            print(f"Total number of torrents: {total_count}")
+        Args:
+            compact (bool): Only keep the hash, id and status of each torrent.
+            max_workers (int): Maximum number of pages fetched at the same time.
+            page_size (int): Number of torrents per page.
 
-            if offset + limit >= total_count:
-                break
+        Yields:
+            Dict[str, Any]: Information about each torrent.
 
-            offset += limit  # Increment the offset for the next iteration
+        Raises:
+            requests.RequestException: If there's an error with the API request.
+        """
+        torrents, total_count = self._get_torrents_page(0, page_size)
+        logger.debug(f"Total number of torrents: {total_count}")
+        yield from self._project(torrents, compact)
+
+        offsets = range(page_size, total_count, page_size)
+        if not offsets:
+            return
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(offsets))),
+            thread_name_prefix="real-debrid-pages",
+        )
+        try:
+            pages = executor.map(
+                lambda offset: self._get_torrents_page(offset, page_size)[0], offsets
+            )
+            for torrents in pages:
+                yield from self._project(torrents, compact)
+        finally:
+            # Don't fetch the remaining pages if the caller stopped early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_torrents_page(
+        self, offset: int, limit: int
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        url = f"{self.BASE_URL}/torrents"
+        params = {"limit": limit, "offset": offset}
+        response = self.http.get(url, headers=self.headers, params=params)
+        response.raise_for_status()
+        total_count = int(response.headers.get("X-Total-Count", 0))
+        return response.json(), total_count
+
+    @staticmethod
+    def _project(
+        torrents: List[Dict[str, Any]], compact: bool
+    ) -> Iterator[Dict[str, Any]]:
+        if not compact:
+            return iter(torrents)
+        return (
+            {
+                "hash": torrent.get("hash"),
+                "id": torrent.get("id"),
+                "status": torrent.get("status"),
+            }
+            for torrent in torrents
+        )
+
+    def get_instant_availability(
+        self, torrent_hashes: Iterable[str]
+    ) -> Dict[str, bool]:
+        """
+        Check which torrents Real-Debrid already has cached.
+
+        Hashes are looked up in batches, and answers are remembered for
+        availability_ttl seconds so repeated checks do not hit the API.
+
+        Args:
+            torrent_hashes (Iterable[str]): The hashes of the torrents to check.
+
+        Returns:
+            Dict[str, bool]: Whether each hash (lowercased) is instantly available.
 
-        return all_torrents
+        Raises:
+            requests.RequestException: If there's an error with the API request.
+        """
+        now = time.monotonic()
+        availability = {}
+        missing = []
+        with self._availability_lock:
+            for torrent_hash in dict.fromkeys(h.lower() for h in torrent_hashes):
+                cached = self._availability.get(torrent_hash)
+                if cached and now - cached[1] < self.availability_ttl:
+                    availability[torrent_hash] = cached[0]
+                else:
+                    missing.append(torrent_hash)
+
+        for start in range(0, len(missing), self.AVAILABILITY_BATCH_SIZE):
+            batch = missing[start : start + self.AVAILABILITY_BATCH_SIZE]
+            url = f"{self.BASE_URL}/torrents/instantAvailability/{'/'.join(batch)}"
+
+            response = self.http.get(url, headers=self.headers)
+            response.raise_for_status()
+            data = {key.lower(): value for key, value in response.json().items()}
+
+            fetched_at = time.monotonic()
+            with self._availability_lock:
+                for torrent_hash in batch:
+                    variants = data.get(torrent_hash)
+                    is_cached = isinstance(variants, dict) and bool(variants.get("rd"))
+                    availability[torrent_hash] = is_cached
+                    self._availability[torrent_hash] = (is_cached, fetched_at)
+                    self._availability.move_to_end(torrent_hash)
+                self._prune_availability(fetched_at)
+
+        return availability
+
+    def _prune_availability(self, now: float):
+        while self._availability:
+            torrent_hash, (_, fetched_at) = next(iter(self._availability.items()))
+            if (
+                now - fetched_at < self.availability_ttl
+                and len(self._availability) <= self.AVAILABILITY_CACHE_SIZE
+            ):
+                break
+            del self._availability[torrent_hash]
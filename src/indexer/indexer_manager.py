@@ -1,6 +1,14 @@
-from typing import Dict, List, Protocol
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Protocol
 from models.movie import MediaType
 from models.release import Release
+from monitoring.tracing import TRACER
+
+logger = logging.getLogger(__name__)
 
 
 class Indexer(Protocol):
@@ -10,11 +18,17 @@ class Indexer(Protocol):
 
 
 class IndexerManager:
-    def __init__(self):
+    def __init__(self, default_timeout: float = 30, max_workers: int = None):
         self.indexers: Dict[str, Indexer] = {}
+        self.timeouts: Dict[str, float] = {}
+        self.default_timeout = default_timeout
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
 
-    def add_indexer(self, name: str, indexer: Indexer):
+    def add_indexer(self, name: str, indexer: Indexer, timeout: float = None):
         self.indexers[name] = indexer
+        self.timeouts[name] = timeout if timeout is not None else self.default_timeout
 
     def get_indexer(self, name: str) -> Indexer:
         indexer = self.indexers.get(name)
@@ -31,3 +45,120 @@ class IndexerManager:
         title: str,
     ):
         return self.get_indexer(name).find_releases(imdb_id, media_type, title)
+
+    def find_releases_all(
+        self,
+        imdb_id: str,
+        media_type: MediaType,
+        title: str,
+    ) -> List[Release]:
+        """
+        Query every registered indexer concurrently and merge the results.
+
+        Each indexer gets its own deadline, counted from the moment its call
+        actually starts, so time spent queued behind other items' lookups does
+        not eat into it. A call still queued after its timeout is cancelled;
+        results that have not arrived by the deadline are dropped and the
+        indexer keeps running in the background. Releases are de-duplicated by
+        infoHash, keeping the first one seen in indexer registration order.
+
+        Args:
+            imdb_id (str): The IMDb ID of the movie, TV show, or episode.
+            media_type (MediaType): The type of media.
+            title (str): The title of the movie or show.
+
+        Returns:
+            List[Release]: The merged releases from all indexers that answered in time.
+        """
+        if not self.indexers:
+            return []
+
+        executor = self._get_executor()
+        submitted = time.monotonic()
+        started: Dict[str, float] = {}
+        started_events: Dict[str, threading.Event] = {}
+        futures: Dict[str, Future] = {}
+        for name, indexer in self.indexers.items():
+            started_events[name] = threading.Event()
+            # The copied context carries the item's trace into the pool thread
+            futures[name] = executor.submit(
+                contextvars.copy_context().run,
+                self._timed_call,
+                name,
+                started,
+                started_events[name],
+                indexer.find_releases,
+                imdb_id,
+                media_type,
+                title,
+            )
+
+        # Wait on the shortest deadlines first; the others keep running meanwhile.
+        for name in sorted(futures, key=lambda n: self.timeouts[n]):
+            timeout = self.timeouts[name]
+            queued_for = time.monotonic() - submitted
+            if not started_events[name].wait(max(timeout - queued_for, 0)):
+                if futures[name].cancel():
+                    logger.warning(
+                        f"Indexer {name} was still queued after {timeout}s "
+                        f"for {title}"
+                    )
+                    continue
+                started_events[name].wait()
+            remaining = started[name] + timeout - time.monotonic()
+            wait([futures[name]], timeout=max(remaining, 0))
+
+        merged: List[Release] = []
+        seen_hashes = set()
+        for name, future in futures.items():
+            if future.cancelled():
+                continue
+            if not future.done():
+                logger.warning(
+                    f"Indexer {name} did not answer within {self.timeouts[name]}s "
+                    f"for {title}"
+                )
+                continue
+            try:
+                releases = future.result()
+            except Exception as e:
+                logger.error(f"Error searching {name} for {title}: {e}")
+                continue
+
+            for release in releases or []:
+                info_hash = release.infoHash.lower()
+                if info_hash in seen_hashes:
+                    continue
+                seen_hashes.add(info_hash)
+                merged.append(release)
+
+        return merged
+
+    @staticmethod
+    def _timed_call(
+        name: str,
+        started: Dict[str, float],
+        started_event: threading.Event,
+        find_releases,
+        *args,
+    ) -> List[Release]:
+        started[name] = time.monotonic()
+        started_event.set()
+        with TRACER.span("indexer", indexer=name) as span:
+            releases = find_releases(*args)
+            span.set(releases=len(releases or []))
+            return releases
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="indexer"
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
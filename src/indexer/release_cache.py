@@ -0,0 +1,238 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional, Set, Tuple
+
+from models.movie import MediaType
+from models.release import Release
+from state.state_store import StateStore
+
+from indexer.indexer_manager import Indexer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTLS = {
+    MediaType.MOVIE: 6 * 3600,
+    MediaType.SHOW: 3600,
+    MediaType.EPISODE: 3600,
+}
+
+
+@dataclass
+class CacheSettings:
+    ttls: Dict[MediaType, float]
+    negative_ttl: float = 3600
+    stale_ttl: float = 3600
+    max_entries: int = 2000
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "CacheSettings":
+        ttls = dict(DEFAULT_TTLS)
+        for media_type, ttl in config.get("ttl", {}).items():
+            ttls[MediaType[media_type.upper()]] = ttl
+        return cls(
+            ttls=ttls,
+            negative_ttl=config.get("negative_ttl", 3600),
+            stale_ttl=config.get("stale_ttl", 3600),
+            max_entries=config.get("max_entries", 2000),
+        )
+
+
+class CachedIndexer:
+    """
+    TTL cache in front of an indexer.
+
+    Results live in an in-memory LRU tier backed by an optional on-disk tier
+    in the state store. Empty results use their own (usually shorter) TTL.
+    Entries past their TTL but within the stale window are still returned,
+    while a background refresh fetches a fresh copy.
+
+    Background refreshes run on the cache's own two-thread pool. They are not
+    counted against watchlist.concurrency.indexers and have no deadline, since
+    nothing waits on them; at most two run per indexer at any time. On-disk
+    entries past their stale window are purged by maintain(), once per cycle.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS indexer_cache (
+            key TEXT PRIMARY KEY,
+            releases TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(
+        self,
+        name: str,
+        indexer: Indexer,
+        settings: CacheSettings = None,
+        state_store: StateStore = None,
+    ):
+        self.name = name
+        self.indexer = indexer
+        self.settings = settings or CacheSettings(ttls=dict(DEFAULT_TTLS))
+        self.state_store = state_store
+        if state_store:
+            state_store.ensure_schema(self.SCHEMA)
+
+        self._memory: "OrderedDict[str, Tuple[List[Release], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._refresher = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix=f"{name}-refresh"
+        )
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "refresh_errors": 0,
+            "purged": 0,
+        }
+
+    def find_releases(
+        self, imdb_id: str, media_type: MediaType, title: str
+    ) -> List[Release]:
+        key = f"{self.name}:{media_type.name}:{imdb_id}"
+        entry = self._get(key)
+        now = time.time()
+
+        if entry is not None:
+            releases, fetched_at = entry
+            ttl = self._ttl(media_type, releases)
+            age = now - fetched_at
+            if age < ttl:
+                self._count("hits")
+                return self._copy(releases)
+            if age < ttl + self.settings.stale_ttl:
+                self._count("stale_hits")
+                self._refresh_in_background(key, imdb_id, media_type, title)
+                return self._copy(releases)
+
+        self._count("misses")
+        releases = self.indexer.find_releases(imdb_id, media_type, title)
+        self._put(key, releases, time.time())
+        return self._copy(releases)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, entries=len(self._memory))
+
+    def purge_expired(self) -> int:
+        """
+        Delete on-disk entries that are past their TTL and stale window.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        if not self.state_store:
+            return 0
+        now = time.time()
+        purged = 0
+        for media_type, ttl in self.settings.ttls.items():
+            purged += self.state_store.execute(
+                """
+                DELETE FROM indexer_cache
+                WHERE key LIKE ? AND fetched_at < CASE
+                    WHEN releases = '[]' THEN ? ELSE ? END
+                """,
+                (
+                    f"{self.name}:{media_type.name}:%",
+                    now - self.settings.negative_ttl - self.settings.stale_ttl,
+                    now - ttl - self.settings.stale_ttl,
+                ),
+            )
+        self._count("purged", purged)
+        return purged
+
+    def maintain(self):
+        """Periodic upkeep of the on-disk tier; run once per cycle."""
+        self.purge_expired()
+
+    def log_stats(self):
+        stats = self.stats()
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        hit_rate = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0
+        logger.info(
+            f"{self.name} cache: {stats['hits']} hits, {stats['stale_hits']} stale "
+            f"hits, {stats['misses']} misses ({hit_rate:.0%} hit rate), "
+            f"{stats['disk_hits']} served from disk, {stats['entries']} in memory, "
+            f"{stats['purged']} expired entries purged"
+        )
+
+    def _ttl(self, media_type: MediaType, releases: List[Release]) -> float:
+        if not releases:
+            return self.settings.negative_ttl
+        return self.settings.ttls.get(media_type, 3600)
+
+    def _refresh_in_background(
+        self, key: str, imdb_id: str, media_type: MediaType, title: str
+    ):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                releases = self.indexer.find_releases(imdb_id, media_type, title)
+                self._put(key, releases, time.time())
+            except Exception as e:
+                self._count("refresh_errors")
+                logger.warning(f"Background refresh of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(refresh)
+
+    def _get(self, key: str) -> Optional[Tuple[List[Release], float]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        if not self.state_store:
+            return None
+        rows = self.state_store.query(
+            "SELECT releases, fetched_at FROM indexer_cache WHERE key = ?", (key,)
+        )
+        if not rows:
+            return None
+
+        releases = [Release(**release) for release in json.loads(rows[0][0])]
+        entry = (releases, rows[0][1])
+        self._count("disk_hits")
+        self._remember(key, entry)
+        return entry
+
+    def _put(self, key: str, releases: List[Release], fetched_at: float):
+        releases = self._copy(releases)
+        self._remember(key, (releases, fetched_at))
+        if self.state_store:
+            self.state_store.execute(
+                "INSERT OR REPLACE INTO indexer_cache (key, releases, fetched_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps([asdict(r) for r in releases]), fetched_at),
+            )
+
+    def _remember(self, key: str, entry: Tuple[List[Release], float]):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.settings.max_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    @staticmethod
+    def _copy(releases: List[Release]) -> List[Release]:
+        # Callers set the rank on the returned releases, keep the cached ones intact
+        return [replace(release, rank=0) for release in releases]
@@ -1,18 +1,45 @@
-from typing import List, Dict, Any
+from typing import Callable, Iterator, List, Dict, Any, Optional
+import codecs
+import json
 import re
-import requests
 import logging
 
 from models.release import Release
 from models.movie import MediaType
+from transport.http_client import HttpClient, shared_client
 
 from icecream import ic
 
 logger = logging.getLogger(__name__)
 
+# Release name (first line), then the "👤 74 💾 30.4 GB" peer count and size
+_STREAM_TITLE = re.compile(
+    r"([^\n]*)(?:.*?👤\s*(\d+))?(?:.*?💾\s*([\d.]+)\s*(GB|MB))?", re.DOTALL
+)
+_STREAMS_START = re.compile(r'"streams"\s*:\s*\[')
+_SEPARATORS = re.compile(r"[\s,]*")
+# Bytes read from the response at a time while decoding streams
+CHUNK_SIZE = 64 * 1024
+
 
 class Torrentio:
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: HttpClient = None,
+        max_candidates: Optional[int] = None,
+        release_filter: Optional[Callable[[Release], bool]] = None,
+    ):
+        """
+        Args:
+            http_client (HttpClient): Transport for the Torrentio API.
+            max_candidates (int): Stop reading a response once this many
+                releases passed release_filter. None reads every stream.
+            release_filter (Callable[[Release], bool]): Cheap check run on each
+                release as it is decoded; releases it rejects are dropped.
+        """
+        self.http = http_client or shared_client()
+        self.max_candidates = max_candidates
+        self.release_filter = release_filter
         self.base_url = "https://torrentio.strem.fun/sort=qualitysize&qualityfilter=480p,scr,cam/stream/"
 
     def find_releases(
@@ -32,26 +59,47 @@ class Torrentio:
         Raises:
             ValueError: If an invalid media_type is provided.
         """
+        return list(self.iter_releases(imdb_id, media_type, title))
+
+    def iter_releases(
+        self, imdb_id: str, media_type: MediaType, title: str
+    ) -> Iterator[Release]:
+        """
+        Yield releases as their streams are decoded from the response.
+
+        The body is read in chunks, so only the streams in flight are held in
+        memory. Once max_candidates releases have passed release_filter the
+        rest of the response is not read and the connection is dropped.
+
+        Raises:
+            ValueError: If an invalid media_type is provided or the response is
+                not valid JSON.
+        """
         if media_type not in [MediaType.MOVIE, MediaType.SHOW, MediaType.EPISODE]:
             raise ValueError(
                 f"Invalid media_type: {media_type}. Must be MediaType.MOVIE, MediaType.SHOW, or MediaType.EPISODE."
             )
 
         url = self._get_url(imdb_id, media_type)
-        response = requests.get(url)
-        data = response.json()
-
-        releases = []
-        for stream in data.get("streams", []):
-            parsed_data = self._parse_title(stream["title"])
-            release = Release(
-                title=parsed_data["title"],
-                infoHash=stream["infoHash"],
-                size_in_gb=parsed_data["size_in_gb"],
-                peers=parsed_data["peers"],
-            )
-            releases.append(release)
-        return releases
+        response = self.http.get(url, stream=True)
+        try:
+            parse = self._parse_stream
+            accept = self.release_filter
+            candidates = 0
+            for stream in _iter_streams(response.iter_content(CHUNK_SIZE)):
+                release = parse(stream)
+                if accept is not None and not accept(release):
+                    continue
+                yield release
+                candidates += 1
+                if self.max_candidates and candidates >= self.max_candidates:
+                    logger.debug(
+                        f"Stopped reading Torrentio streams for {title} after "
+                        f"{candidates} candidates"
+                    )
+                    return
+        finally:
+            response.close()
 
     def _get_url(self, imdb_id: str, media_type: MediaType) -> str:
         if media_type == MediaType.MOVIE:
@@ -63,26 +111,74 @@ class Torrentio:
         else:
             raise ValueError(f"Unsupported media_type: {media_type}")
 
-    def _parse_title(self, title: str) -> Dict[str, Any]:
-        title_parts = title.split("\n")
-        parsed_title = title_parts[0] if title_parts else ""
-
-        size_match = re.search(r"💾\s*([\d.]+)\s*(GB|MB)", title)
-        size_in_gb = 0
-        if size_match:
-            size = float(size_match.group(1))
-            unit = size_match.group(2)
-            size_in_gb = size if unit == "GB" else round(size / 1024, 2)
-
-        peers_match = re.search(r"👤\s*(\d+)", title)
-        peers = int(peers_match.group(1)) if peers_match else 0
-
-        quality_match = re.search(r"(4K|2160p|1080p|720p|480p)", parsed_title)
-        quality = quality_match.group(1) if quality_match else ""
-
-        return {
-            "title": parsed_title,
-            "size_in_gb": size_in_gb,
-            "peers": peers,
-            "quality": quality,
-        }
+    def _parse_stream(self, stream: Dict[str, Any]) -> Release:
+        """
+        Build a Release from a Torrentio stream.
+
+        The first line of the stream title is the release name; the peer count
+        and size come from the "👤 74 💾 30.4 GB" line below it. A single
+        precompiled pattern reads all three in one pass over the title.
+        """
+        title, peers, size, unit = _STREAM_TITLE.match(stream["title"]).groups()
+        if size is None:
+            size_in_gb = 0
+        elif unit == "GB":
+            size_in_gb = float(size)
+        else:
+            size_in_gb = round(float(size) / 1024, 2)
+
+        return Release(
+            title=title,
+            infoHash=stream["infoHash"],
+            size_in_gb=size_in_gb,
+            peers=int(peers) if peers else 0,
+        )
+
+
+def _iter_streams(chunks: Iterator[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Decode the objects of the top-level "streams" array from a JSON body.
+
+    Objects are yielded as soon as they are complete; a JSON body without a
+    "streams" array yields nothing. Torrentio sends the array first, so only
+    the unread part of the current chunk is buffered.
+
+    Raises:
+        ValueError: If the body ends inside the array or an object in it is
+            not valid JSON.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    in_array = False
+    for chunk in chunks:
+        buffer = buffer[position:] + text.decode(chunk)
+        position = 0
+        if not in_array:
+            start = _STREAMS_START.search(buffer)
+            if start is None:
+                continue
+            position = start.end()
+            in_array = True
+
+        while True:
+            position = _SEPARATORS.match(buffer, position).end()
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                return
+            try:
+                stream, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Usually an object cut off at the end of the chunk
+                if len(buffer) - position > CHUNK_SIZE * 16:
+                    raise
+                break
+            yield stream
+            position = end
+
+    if in_array:
+        raise ValueError("Torrentio response ended inside the streams array")
+    # No streams; still fail on bodies that are not JSON, such as error pages
+    decoder.decode(buffer + text.decode(b"", final=True))
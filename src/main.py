@@ -1,27 +1,53 @@
+import argparse
+import functools
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import List, Tuple
 
-import schedule
 import yaml
 from content.collection_manager import CollectionManager
 from content.content_manager import ContentManager
+from content.list_snapshots import ListSnapshotStore
+from content.owned_index import OwnedItemIndex
+from content.plex_library_snapshot import PlexLibrarySnapshot
 from content.plex_provider import PlexProvider
+from content.release_date_cache import ReleaseDateCache
 from content.trakt_provider import TraktProvider
+from debrid.library_index import RealDebridLibrary
 from debrid.real_debrid import RealDebrid
 from dotenv import load_dotenv
 from icecream import ic
 from indexer.indexer_manager import IndexerManager
+from indexer.release_cache import CachedIndexer, CacheSettings
 from indexer.torrentio import Torrentio
-from RTN import RTN, SettingsModel, parse, title_match
+from RTN import RTN, SettingsModel, title_match
 from RTN.models import BaseRankingModel
 from models.movie import Movie
+from monitoring import metrics, tracing
+from monitoring.metrics import MetricsServer
+from monitoring.profiler import CycleProfiler
+from ranking.cached_policy import CachedReleasePolicy
+from ranking.prefilter import ReleasePrefilter
+from ranking.rank_cache import RankCache, settings_fingerprint
+from ranking.selection import select_best
+from scheduling.item_scheduler import ItemScheduler, RetryPolicy
+from scheduling.webhooks import WebhookServer
+from scheduling.workers import (
+    WorkerPool,
+    claimed,
+    parse_shard,
+    shard_of,
+    split_rate_limits,
+)
+from state.state_store import ItemOutcome, StateStore
+from transport.concurrency import ConcurrencyLimits
+from transport.http_client import configure_shared_client
 
 logger = logging.getLogger(__name__)
 
-# Global variable to store processed movies
-processed_movies = []
-
 
 def load_config():
     with open("config.yml", "r") as config_file:
@@ -47,7 +73,7 @@ def setup_logging(config):
     logger.debug(f"Logging configured with level: {log_level_str}")
 
 
-def initialize_content_providers(config, trakt):
+def initialize_content_providers(config, trakt, state_store=None):
     content_manager = ContentManager(config)
     collection_manager = CollectionManager()
     media_library = config.get("media_library", {})
@@ -58,10 +84,17 @@ def initialize_content_providers(config, trakt):
 
     plex_config = config.get("plex", {})
     if plex_config:
+        incremental_scan = media_library.get("plex_incremental_scan", False)
         plex_provider = PlexProvider(
             token=plex_config.get("token"),
             server_url=plex_config.get("server_url"),
-            library_name=plex_libraries[0] if plex_libraries else None,
+            library_names=plex_libraries,
+            library_snapshot=(
+                PlexLibrarySnapshot(state_store)
+                if incremental_scan and state_store
+                else None
+            ),
+            full_scan_interval=media_library.get("plex_full_scan_interval", 86400),
         )
 
     if "trakt" in watchlists:
@@ -81,21 +114,48 @@ def initialize_content_providers(config, trakt):
     return content_manager, collection_manager
 
 
-def initialize_indexers(config):
-    indexer_manager = IndexerManager()
+def initialize_indexers(config, http_client=None, state_store=None, prefilter=None):
     indexers = config.get("indexers", {})
+    enabled = [name for name, settings in indexers.items() if settings.get("enabled")]
+    # Every concurrent item lookup fans out to every enabled indexer
+    watchlist = config.get("watchlist", {})
+    lookups = watchlist.get("concurrency", {}).get("indexers") or watchlist.get(
+        "max_workers", 1
+    )
+    indexer_manager = IndexerManager(max_workers=max(lookups, 1) * max(len(enabled), 1))
     for indexer, settings in indexers.items():
         if settings.get("enabled", False):
             if indexer == "torrentio":
-                indexer_manager.add_indexer("Torrentio", Torrentio())
+                max_candidates = settings.get("max_candidates")
+                torrentio = Torrentio(
+                    http_client=http_client,
+                    max_candidates=max_candidates,
+                    # Only capped responses need filtering while decoding;
+                    # every release is pre-filtered before parsing anyway
+                    release_filter=prefilter if max_candidates else None,
+                )
+                if "cache" in settings:
+                    torrentio = CachedIndexer(
+                        "Torrentio",
+                        torrentio,
+                        CacheSettings.from_config(settings["cache"]),
+                        state_store,
+                    )
+                indexer_manager.add_indexer(
+                    "Torrentio", torrentio, timeout=settings.get("timeout")
+                )
     return indexer_manager
 
 
-def is_item_processed(item: Movie, user_collection):
-    global processed_movies
-    return any(movie["imdb_id"] == item.imdb_id for movie in user_collection) or any(
-        movie.imdb_id == item.imdb_id for movie in processed_movies
-    )
+@contextmanager
+def _stage(name: str):
+    """Time a pipeline stage in the metrics and in the item's trace."""
+    with metrics.STAGE_SECONDS.time(stage=name), tracing.TRACER.span(name):
+        yield
+
+
+def is_item_processed(item: Movie, owned_index: OwnedItemIndex):
+    return item.imdb_id in owned_index
 
 
 def process_watchlist_item(
@@ -104,64 +164,138 @@ def process_watchlist_item(
     real_debrid,
     dry_run,
     trakt,
-    rtn,
+    ranker: RankCache,
+    state_store: StateStore,
+    limits: ConcurrencyLimits = None,
+    cached_policy: CachedReleasePolicy = None,
+    debrid_library: RealDebridLibrary = None,
+    prefilter: ReleasePrefilter = None,
+) -> ItemOutcome:
+    limits = limits or ConcurrencyLimits()
+    cached_policy = cached_policy or CachedReleasePolicy()
+    trace = tracing.TRACER.trace("item", imdb_id=item.imdb_id, title=item.title)
+    try:
+        with trace as root:
+            outcome = _find_and_add_release(
+                item,
+                indexer_manager,
+                real_debrid,
+                dry_run,
+                trakt,
+                ranker,
+                limits,
+                cached_policy,
+                debrid_library,
+                prefilter,
+            )
+            root.outcome = outcome[0].name.lower()
+    finally:
+        ranker.flush()
+    state_store.record_attempt(item, *outcome)
+    metrics.ITEMS_PROCESSED.inc(outcome=outcome[0].name.lower())
+    if outcome[0] == ItemOutcome.ADDED:
+        metrics.RELEASES_ADDED.inc()
+    return outcome[0]
+
+
+def _find_and_add_release(
+    item: Movie,
+    indexer_manager,
+    real_debrid,
+    dry_run,
+    trakt,
+    ranker: RankCache,
+    limits: ConcurrencyLimits,
+    cached_policy: CachedReleasePolicy,
+    debrid_library: RealDebridLibrary,
+    prefilter: ReleasePrefilter = None,
 ):
-    global processed_movies
     imdb_id = item.imdb_id
     media_type = item.media_type
     title = item.title
     year = item.year if item.year else "N/A"
 
     # Check if the item has been released using TraktProvider
-    is_released = trakt.check_released(item)
+    with limits.slot("trakt"), _stage("check_released"):
+        is_released = trakt.check_released(item)
     if not is_released:
         logger.info(f"{title} ({year}) has not been released yet. Skipping.")
-        return
+        return ItemOutcome.NOT_RELEASED, None
 
     logger.info(f"Searching for releases: {title} ({year}) - {media_type}")
-    releases = indexer_manager.find_releases("Torrentio", imdb_id, media_type, title)
+    with limits.slot("indexers"), _stage("indexer_search"):
+        releases = indexer_manager.find_releases_all(imdb_id, media_type, title)
 
     if releases:
         logger.info(f"Found {len(releases)} releases for {title}")
+        metrics.RELEASES_SEEN.inc(len(releases))
+
+        movie_title = f"{title} ({year})"
+        candidates = [
+            release
+            for release in releases
+            if not (prefilter and prefilter.check(release.title))
+        ]
+
+        with limits.slot("real_debrid"), _stage("real_debrid_availability"):
+            cached = cached_policy.cached_hashes(candidates, real_debrid)
+        available = [r for r in candidates if cached_policy.keep(r, cached)]
+        if len(available) < len(candidates):
+            metrics.RELEASES_FILTERED.inc(
+                len(candidates) - len(available), reason="not_cached"
+            )
 
-        ranked_releases = []
-        for release in releases:
-            parsed = parse(release.title)
-            parsed_title = f"{parsed.parsed_title} ({parsed.year})"
-            movie_title = f"{title} ({year})"
+        def upper_bound(release):
+            bound = ranker.upper_bound(release.title, release.infoHash)
+            return bound + cached_policy.bonus(release, cached)
+
+        def score(release):
+            parsed_title = ranker.parsed_title(release.title, release.infoHash)
             if not title_match(parsed_title, movie_title, threshold=0.7):
-                logger.debug(f"Skipping wrong match torrent: {parsed.parsed_title}")
-                continue
-            ranked_torrent = rtn.rank(release.title, release.infoHash)
-            if ranked_torrent.fetch:
-                release.rank = ranked_torrent.rank
-                ranked_releases.append(release)
-            else:
+                logger.debug(f"Skipping wrong match torrent: {parsed_title}")
+                metrics.RELEASES_FILTERED.inc(reason="title_mismatch")
+                return None
+            fetch, rank = ranker.rank(release.title, release.infoHash)
+            if not fetch:
                 logger.debug(f"Skipping garbage torrent: {release.title}")
+                metrics.RELEASES_FILTERED.inc(reason="rejected")
+                return None
+            return rank + cached_policy.bonus(release, cached)
 
-        if not ranked_releases:
-            logger.info(f"No downloadable relase found for {title}")
-            return
+        # Only the best release is added, so rank just enough to find it
+        with _stage("ranking"):
+            best = select_best(available, upper_bound, score)
 
-        # Sort releases by rank in descending order
-        ranked_releases.sort(key=lambda x: x.rank, reverse=True)
+        if not best:
+            logger.info(f"No downloadable relase found for {title}")
+            return ItemOutcome.NO_MATCH, None
 
-        for release in ranked_releases:
-            logger.info(
-                f"  - {release.title} (Hash: {release.infoHash}) (Size: {release.size_in_gb:.2f}GB) (Peers: {release.peers}) (Rank: {release.rank})"
+        rank, release = best[0]
+        release.rank = rank
+        logger.info(
+            f"  - {release.title} (Hash: {release.infoHash}) (Size: {release.size_in_gb:.2f}GB) (Peers: {release.peers}) (Rank: {release.rank})"
+        )
+        with limits.slot("real_debrid"), _stage("real_debrid_add"):
+            success = add_torrent_to_real_debrid(
+                release, real_debrid, dry_run, debrid_library
             )
-            success = add_torrent_to_real_debrid(release, real_debrid, dry_run)
-            if success:
-                processed_movies.append(item)
-
-            break  # Only process the first filtered release
-    else:
-        logger.info(f"No releases found for {title}")
-
+        logger.info("---")
+        if not success:
+            return ItemOutcome.FAILED, release.infoHash
+        if dry_run:
+            return ItemOutcome.DRY_RUN, release.infoHash
+        return ItemOutcome.ADDED, release.infoHash
+
+    logger.info(f"No releases found for {title}")
     logger.info("---")
+    return ItemOutcome.NO_RELEASES, None
 
 
-def add_torrent_to_real_debrid(release, real_debrid, dry_run):
+def add_torrent_to_real_debrid(release, real_debrid, dry_run, debrid_library=None):
+    if debrid_library and debrid_library.contains(release.infoHash):
+        logger.info(f"Torrent {release.infoHash} is already in Real-Debrid")
+        return True
+
     if not dry_run:
         try:
             torrent_info = real_debrid.add_torrent(release.infoHash)
@@ -172,6 +306,10 @@ def add_torrent_to_real_debrid(release, real_debrid, dry_run):
 
             torrent_status = real_debrid.get_torrent_info(torrent_info["id"])
             logger.info(f"Torrent status: {torrent_status['status']}")
+            if debrid_library:
+                debrid_library.add(
+                    release.infoHash, torrent_info["id"], torrent_status["status"]
+                )
             return True
         except Exception as e:
             logger.error(f"Error adding torrent to Real-Debrid: {str(e)}")
@@ -183,6 +321,64 @@ def add_torrent_to_real_debrid(release, real_debrid, dry_run):
         return True
 
 
+def run_sync_cycle(stats_reporters, maintained=(), **kwargs):
+    process_all_watchlists(**kwargs)
+    end_cycle(stats_reporters, maintained)
+
+
+def end_cycle(stats_reporters, maintained=()):
+    """Run the caches' periodic upkeep, then log every component's stats."""
+    for component in maintained:
+        try:
+            component.maintain()
+        except Exception as e:
+            logger.error(f"Error maintaining {type(component).__name__}: {e}")
+    log_stats(stats_reporters)
+
+
+def log_stats(stats_reporters):
+    for reporter in stats_reporters:
+        reporter.log_stats()
+
+
+def find_new_items(
+    content_manager, collection_manager, state_store: StateStore, dry_run
+) -> Tuple[List[Movie], List[Movie]]:
+    """
+    Fetch the watchlists and pick out the items still to be processed.
+
+    Returns:
+        Tuple[List[Movie], List[Movie]]: Every watchlist item, and the ones
+        that are neither owned nor processed yet, without duplicates.
+    """
+    with metrics.STAGE_SECONDS.time(stage="watchlist_fetch"):
+        all_watchlists = content_manager.get_all_watchlists()
+    with metrics.STAGE_SECONDS.time(stage="collection_fetch"):
+        user_collections = collection_manager.get_user_collections()
+
+    # Dry runs never add anything, but should not retry the same items every cycle
+    processed_outcomes = [ItemOutcome.ADDED]
+    if dry_run:
+        processed_outcomes.append(ItemOutcome.DRY_RUN)
+    processed_ids = state_store.processed_ids(
+        (item.imdb_id for item in all_watchlists), processed_outcomes
+    )
+    owned_index = OwnedItemIndex.build(user_collections, processed_ids)
+
+    new_items = []
+    for item in all_watchlists:
+        if not item.imdb_id:
+            logger.debug(f"Skipping item without IMDb ID: {item.title}")
+        elif not is_item_processed(item, owned_index):
+            new_items.append(item)
+            # The same title can show up on several lists; only process it once
+            owned_index.add(item.imdb_id)
+        else:
+            logger.debug(f"Skipping already processed item: {item.title}")
+
+    return all_watchlists, new_items
+
+
 def process_all_watchlists(
     content_manager,
     collection_manager,
@@ -190,27 +386,77 @@ def process_all_watchlists(
     real_debrid,
     dry_run,
     trakt,
-    rtn,
+    ranker: RankCache,
+    state_store: StateStore,
+    max_workers=1,
+    limits: ConcurrencyLimits = None,
+    cached_policy: CachedReleasePolicy = None,
+    debrid_library: RealDebridLibrary = None,
+    prefilter: ReleasePrefilter = None,
 ):
-    all_watchlists = content_manager.get_all_watchlists()
-    user_collections = collection_manager.get_user_collections()
+    started = time.monotonic()
+    all_watchlists, new_items = find_new_items(
+        content_manager, collection_manager, state_store, dry_run
+    )
 
-    for item in all_watchlists:
-        if not is_item_processed(item, user_collections["Plex"]):
+    with ThreadPoolExecutor(
+        max_workers=max(max_workers, 1), thread_name_prefix="watchlist"
+    ) as executor:
+        futures = {}
+        for item in new_items:
             logger.info(f"Processing new item: {item.title}")
-            process_watchlist_item(
+            future = executor.submit(
+                process_watchlist_item,
                 item,
                 indexer_manager,
                 real_debrid,
                 dry_run,
                 trakt,
-                rtn,
+                ranker,
+                state_store,
+                limits,
+                cached_policy,
+                debrid_library,
+                prefilter,
             )
-        else:
-            logger.debug(f"Skipping already processed item: {item.title}")
+            futures[future] = item
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                item = futures[future]
+                logger.error(f"Error processing {item.title}: {e}")
+                state_store.record_attempt(item, ItemOutcome.FAILED)
+
+    elapsed = time.monotonic() - started
+    metrics.CYCLE_SECONDS.observe(elapsed)
+    items_per_sec = len(all_watchlists) / elapsed if elapsed else 0
+    logger.info(
+        f"Cycle finished: {len(all_watchlists)} items ({len(new_items)} new) "
+        f"in {elapsed:.1f}s, {items_per_sec:.2f} items/sec"
+    )
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sync watchlists to Real-Debrid.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run one profiled sync cycle, write the profile and exit.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes, overriding watchlist.processes.",
+    )
+    # Set by the worker pool for each worker process
+    parser.add_argument("--shard", type=parse_shard, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
 
 
-def main():
+def main(argv: List[str] = None):
+    args = parse_args(argv)
     config = load_config()
     env_vars = load_env_vars()
     setup_logging(config)
@@ -222,20 +468,81 @@ def main():
     if dry_run:
         logger.info("Running in dry run mode. No changes will be made to Real-Debrid.")
 
+    profile_config = config.get("developer", {}).get("profile", {})
+    profile = args.profile or profile_config.get("enabled", False)
+    processes = args.workers or config.get("watchlist", {}).get("processes", 1)
+    if processes > 1 and args.shard is None and not profile:
+        # Each worker process runs this again for its shard of the items
+        logger.info(f"Starting {processes} worker processes")
+        WorkerPool(processes, main).run()
+        return
+    shard, shards = args.shard or (0, 1)
+
+    http_config = config.get("http", {})
+    tracing_config = config.get("tracing", {})
+    metrics_config = config.get("metrics", {})
+    if shards > 1:
+        http_config = split_rate_limits(http_config, shards)
+        path, extension = os.path.splitext(tracing_config.get("path", "traces.jsonl"))
+        tracing_config = {**tracing_config, "path": f"{path}-{shard}{extension}"}
+
+    http_client = configure_shared_client(http_config)
+    if metrics_config.get("enabled", False):
+        MetricsServer(
+            metrics.REGISTRY,
+            host=metrics_config.get("host", "127.0.0.1"),
+            # One port per worker process
+            port=metrics_config.get("port", 9464) + shard,
+        ).start()
+    tracing.configure_tracer(tracing_config)
+    state_store = StateStore(
+        config.get("state", {}).get("path", "debridsync.db"), shared=shards > 1
+    )
+
     trakt = TraktProvider(
         client_id=env_vars["TRAKT_CLIENT_ID"],
         client_secret=env_vars["TRAKT_CLIENT_SECRET"],
+        release_dates=ReleaseDateCache(
+            state_store,
+            refresh_interval=config.get("watchlist", {}).get(
+                "release_date_refresh_interval", 86400
+            ),
+        ),
+        list_snapshots=(
+            ListSnapshotStore(state_store)
+            if config.get("watchlist", {}).get("incremental_sync", False)
+            else None
+        ),
+        rate_limiter=http_client.rate_limiter,
     )
 
-    content_manager, collection_manager = initialize_content_providers(config, trakt)
-    indexer_manager = initialize_indexers(config)
+    content_manager, collection_manager = initialize_content_providers(
+        config, trakt, state_store
+    )
 
     real_debrid_api_token = config["real_debrid"]["api_token"]
     if not real_debrid_api_token:
         logger.error("Real-Debrid API token is not set in the configuration.")
         return
 
-    real_debrid = RealDebrid(real_debrid_api_token)
+    real_debrid = RealDebrid(
+        real_debrid_api_token,
+        http_client=http_client,
+        availability_ttl=config["real_debrid"].get("availability_ttl", 300),
+    )
+    cached_policy = CachedReleasePolicy(
+        mode=config["real_debrid"].get("cached_releases", "ignore"),
+        boost=config["real_debrid"].get("cached_boost", 1000),
+    )
+
+    debrid_library = None
+    if config.get("media_library", {}).get("real_debrid", False):
+        debrid_library = RealDebridLibrary(
+            real_debrid,
+            state_store,
+            full_sync_interval=config["real_debrid"].get("full_sync_interval", 86400),
+        )
+        collection_manager.add_provider("RealDebrid", debrid_library)
 
     # Initialize RTN
     torrent_settings = config.get("torrent_settings", {})
@@ -253,30 +560,130 @@ def main():
         setattr(ConfigRankingModel, attr, value)
 
     rtn = RTN(settings=settings, ranking_model=ConfigRankingModel())
+    prefilter = ReleasePrefilter.from_settings(settings)
+    ranker = RankCache(
+        rtn,
+        settings_fingerprint(
+            {
+                key: torrent_settings.get(key)
+                for key in ("require", "exclude", "preferred", "ranking_model")
+            }
+        ),
+        max_entries=torrent_settings.get("rank_cache_size", 50000),
+        state_store=state_store if torrent_settings.get("persist_ranks") else None,
+        max_persisted=torrent_settings.get("rank_cache_persisted", 200000),
+    )
+    indexer_manager = initialize_indexers(config, http_client, state_store, prefilter)
 
     # Start the periodic task
     check_interval = config.get("watchlist", {}).get(
         "check_interval", 3600
     )  # Default to 1 hour
-
-    # periodic execution
-    schedule.every(check_interval).seconds.do(
-        process_all_watchlists,
+    max_workers = config.get("watchlist", {}).get("max_workers", 1)
+    limits = ConcurrencyLimits(config.get("watchlist", {}).get("concurrency", {}))
+
+    stats_reporters = [http_client, ranker, prefilter]
+    if http_client.rate_limiter:
+        stats_reporters.append(http_client.rate_limiter)
+    stats_reporters += [
+        indexer
+        for indexer in indexer_manager.indexers.values()
+        if hasattr(indexer, "log_stats")
+    ]
+    maintained = [ranker] + [
+        indexer
+        for indexer in indexer_manager.indexers.values()
+        if hasattr(indexer, "maintain")
+    ]
+
+    cycle_kwargs = dict(
+        stats_reporters=stats_reporters,
+        maintained=maintained,
         content_manager=content_manager,
         collection_manager=collection_manager,
         indexer_manager=indexer_manager,
         real_debrid=real_debrid,
         dry_run=dry_run,
         trakt=trakt,
-        rtn=rtn,
+        ranker=ranker,
+        state_store=state_store,
+        max_workers=max_workers,
+        limits=limits,
+        cached_policy=cached_policy,
+        debrid_library=debrid_library,
+        prefilter=prefilter,
     )
 
-    # run immediately
-    schedule.run_all()
+    if profile:
+        # One profiled cycle instead of the schedule, so the profilers never
+        # wrap the regular run
+        CycleProfiler(
+            output_dir=profile_config.get("output_dir", "profiles"),
+            top=profile_config.get("top", 25),
+        ).run(run_sync_cycle, **cycle_kwargs)
+        return
+
+    # Each item is checked when it is due; the watchlists are scanned every
+    # check_interval, starting now
+    scheduler_config = config.get("watchlist", {}).get("scheduler", {})
+    process = functools.partial(
+        process_watchlist_item,
+        indexer_manager=indexer_manager,
+        real_debrid=real_debrid,
+        dry_run=dry_run,
+        trakt=trakt,
+        ranker=ranker,
+        state_store=state_store,
+        limits=limits,
+        cached_policy=cached_policy,
+        debrid_library=debrid_library,
+        prefilter=prefilter,
+    )
+    policy = RetryPolicy(
+        interval=check_interval,
+        max_backoff=scheduler_config.get("max_backoff", 86400),
+        recent_release_days=scheduler_config.get("recent_release_days", 14),
+        dry_run=dry_run,
+    )
+    if shards > 1:
+        process = claimed(
+            process,
+            state_store,
+            owner=f"pid-{os.getpid()}",
+            policy=policy,
+            release_dates=trakt.release_dates,
+        )
+    scheduler = ItemScheduler(
+        scan=lambda: [
+            item
+            for item in find_new_items(
+                content_manager, collection_manager, state_store, dry_run
+            )[1]
+            if shard_of(item.imdb_id, shards) == shard
+        ],
+        process=process,
+        state_store=state_store,
+        policy=policy,
+        release_dates=trakt.release_dates,
+        max_workers=max_workers,
+        on_scan=lambda: end_cycle(stats_reporters, maintained),
+        # Scans requested through worker 0's webhooks reach every shard
+        shared_scan_requests=shards > 1,
+    )
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    # Webhooks push new items in right away; the scans remain as a safety net
+    webhooks_config = config.get("webhooks", {})
+    if webhooks_config.get("enabled", False) and shard == 0:
+        WebhookServer(
+            on_item=scheduler.push,
+            on_plex=scheduler.request_scan,
+            host=webhooks_config.get("host", "127.0.0.1"),
+            port=webhooks_config.get("port", 9465),
+            token=webhooks_config.get("token"),
+            plex_events=webhooks_config.get("plex_events") or (),
+        ).start()
+
+    scheduler.run_forever()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# From Python 3.12 cProfile hooks in through sys.monitoring, which sees every
+# thread; only one profiler can be enabled at a time there
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+
+class CycleProfiler:
+    """
+    CPU and allocation profile of a single call, usually one sync cycle.
+
+    Worker threads started during the call are profiled too. Before Python
+    3.12 each gets its own profiler, whose statistics are merged with the
+    calling thread's; later versions profile every thread with one. Each run writes three
+    files sharing a timestamped prefix in output_dir:
+
+        .prof         pstats dump, e.g. `python -m pstats cycle-....prof`
+        .tracemalloc  tracemalloc snapshot, load with Snapshot.load()
+        .txt          top-N summary by module and by function
+    """
+
+    def __init__(self, output_dir: str = "profiles", top: int = 25):
+        self.output_dir = output_dir
+        self.top = top
+
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call func under the profilers and write the results.
+
+        Returns:
+            Any: Whatever func returns.
+        """
+        profiles: List[cProfile.Profile] = []
+        lock = threading.Lock()
+
+        def profile_thread(*_):
+            # Installed as the new thread's profile function; cProfile then
+            # replaces it with its own hook for the rest of the thread.
+            profile = cProfile.Profile()
+            with lock:
+                profiles.append(profile)
+            profile.enable()
+
+        main_profile = cProfile.Profile()
+        tracemalloc.start(10)
+        if PER_THREAD_PROFILES:
+            threading.setprofile(profile_thread)
+        main_profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            main_profile.disable()
+            if PER_THREAD_PROFILES:
+                threading.setprofile(None)
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            with lock:
+                thread_profiles = list(profiles)
+            self._write(main_profile, thread_profiles, snapshot)
+
+    def _write(
+        self,
+        main_profile: cProfile.Profile,
+        thread_profiles: List[cProfile.Profile],
+        snapshot: tracemalloc.Snapshot,
+    ):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(
+            self.output_dir, time.strftime("cycle-%Y%m%d-%H%M%S", time.localtime())
+        )
+
+        stats = pstats.Stats(main_profile)
+        for profile in thread_profiles:
+            try:
+                stats.add(profile)
+            except TypeError:
+                # Threads that never ran any Python code leave no stats behind
+                continue
+        stats.dump_stats(f"{prefix}.prof")
+        snapshot.dump(f"{prefix}.tracemalloc")
+
+        summary = self.summarize(stats, snapshot)
+        with open(f"{prefix}.txt", "w") as summary_file:
+            summary_file.write(summary)
+        logger.info(f"Profile written to {prefix}.prof, .tracemalloc and .txt")
+        logger.info(summary)
+
+    def summarize(self, stats: pstats.Stats, snapshot: tracemalloc.Snapshot) -> str:
+        """Top-N CPU time and allocations, per module and per function."""
+        lines = [f"Top {self.top} modules by CPU time (excluding callees):"]
+        for module, (own_time, calls) in self._by_module(stats)[: self.top]:
+            lines.append(f"  {own_time:10.3f}s {calls:10d} calls  {module}")
+
+        lines.append(f"\nTop {self.top} functions by cumulative time:")
+        functions = sorted(
+            stats.stats.items(), key=lambda item: item[1][3], reverse=True
+        )
+        for (filename, lineno, name), (_, calls, _, cumulative, _) in functions[
+            : self.top
+        ]:
+            lines.append(
+                f"  {cumulative:10.3f}s {calls:10d} calls  {filename}:{lineno}({name})"
+            )
+
+        lines.append(f"\nTop {self.top} modules by memory still allocated:")
+        for stat in snapshot.statistics("filename")[: self.top]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"  {stat.size / 1024:10.1f} KiB {stat.count:10d} blocks  "
+                f"{frame.filename}"
+            )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _by_module(stats: pstats.Stats) -> List[Tuple[str, Tuple[float, int]]]:
+        modules: Dict[str, List] = defaultdict(lambda: [0.0, 0])
+        for (filename, _, _), (_, calls, own_time, _, _) in stats.stats.items():
+            # cProfile files C functions under "~"
+            if filename == "~":
+                filename = "<built-in>"
+            modules[filename][0] += own_time
+            modules[filename][1] += calls
+        return sorted(
+            ((module, tuple(values)) for module, values in modules.items()),
+            key=lambda item: item[1][0],
+            reverse=True,
+        )
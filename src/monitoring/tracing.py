@@ -0,0 +1,225 @@
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Innermost open span of the current item, if it is being traced
+_current_span: ContextVar[Optional["Span"]] = ContextVar("span", default=None)
+
+
+class _Trace:
+    def __init__(self, sampled: bool):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.sampled = sampled
+        self.spans: List[Dict[str, Any]] = []
+        self.closed = False
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, trace: _Trace, parent: Optional["Span"], name: str, attributes):
+        self.trace = trace
+        self.span_id = trace.next_id()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = dict(attributes)
+        self.outcome = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class _NullSpan:
+    """Stands in for a span when the item is not traced; ignores everything."""
+
+    outcome = None
+
+    def __setattr__(self, name, value):
+        pass
+
+    def set(self, **attributes):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Per-item trace spans written to a rotating JSON-lines file.
+
+    A trace is started for each watchlist item; stages and HTTP calls made
+    while it is open, on the same thread or on threads that copied its
+    context, are recorded as child spans. Spans are buffered per trace and
+    written together when the trace ends, one JSON object per line.
+
+    Only sample_rate of the traces are kept. With a slow_threshold, every
+    trace is recorded in memory and unsampled ones are still written when
+    they took at least that many seconds or failed, at the cost of timing
+    every item. Disabled tracers and unsampled items cost a context lookup
+    per span.
+    """
+
+    def __init__(self):
+        self.sample_rate = 0.0
+        self.slow_threshold: Optional[float] = None
+        self._handler: Optional[RotatingFileHandler] = None
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._handler is not None
+
+    def configure(
+        self,
+        path: str = "traces.jsonl",
+        sample_rate: float = 1.0,
+        slow_threshold: Optional[float] = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        """
+        Start writing traces.
+
+        Args:
+            path (str): File the spans are appended to.
+            sample_rate (float): Fraction of traces written, from 0 to 1.
+            slow_threshold (float): Also write unsampled traces that took at
+                least this many seconds or failed. None keeps sampled traces only.
+            max_bytes (int): Size at which the file is rotated.
+            backup_count (int): Rotated files kept.
+        """
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        with self._lock:
+            previous, self._handler = self._handler, handler
+            self.sample_rate = sample_rate
+            self.slow_threshold = slow_threshold
+        if previous:
+            previous.close()
+        logger.info(f"Writing traces for {sample_rate:.0%} of items to {path}")
+
+    def close(self):
+        with self._lock:
+            handler, self._handler = self._handler, None
+        if handler:
+            handler.close()
+
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Span]:
+        """
+        Open the root span of a new trace for the current context.
+
+        Yields the root span, or NULL_SPAN when the trace is not recorded.
+        """
+        if not self.enabled:
+            yield NULL_SPAN
+            return
+        sampled = self._random.random() < self.sample_rate
+        if not sampled and self.slow_threshold is None:
+            yield NULL_SPAN
+            return
+
+        trace = _Trace(sampled)
+        try:
+            with self._span(trace, None, name, attributes) as root:
+                yield root
+        finally:
+            trace.closed = True
+            self._finish(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """
+        Time a child of the innermost open span.
+
+        Yields NULL_SPAN outside of a recorded trace.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            yield NULL_SPAN
+            return
+        with self._span(parent.trace, parent, name, attributes) as span:
+            yield span
+
+    @contextmanager
+    def _span(
+        self, trace: _Trace, parent: Optional[Span], name: str, attributes
+    ) -> Iterator[Span]:
+        span = Span(trace, parent, name, attributes)
+        token = _current_span.set(span)
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.outcome = "error"
+            span.attributes.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            _current_span.reset(token)
+            # Late spans from calls that outlived their trace are dropped
+            if not trace.closed:
+                trace.spans.append(
+                    {
+                        "trace_id": trace.trace_id,
+                        "span_id": span.span_id,
+                        "parent_id": span.parent_id,
+                        "name": name,
+                        "start": round(start, 6),
+                        "duration_ms": round(duration * 1000, 3),
+                        "outcome": str(span.outcome),
+                        "attributes": span.attributes,
+                    }
+                )
+
+    def _finish(self, trace: _Trace):
+        # Children finish first; write them in start order
+        spans = sorted(trace.spans, key=lambda span: span["span_id"])
+        root = spans[0]
+        if (
+            trace.sampled
+            or root["outcome"] == "error"
+            or root["duration_ms"] >= self.slow_threshold * 1000
+        ):
+            self._write(spans)
+
+    def _write(self, spans: List[Dict[str, Any]]):
+        lines = [json.dumps(span, default=str) for span in spans]
+        handler = self._handler
+        if handler:
+            handler.handle(logging.makeLogRecord({"msg": "\n".join(lines)}))
+
+
+TRACER = Tracer()
+
+
+def configure_tracer(config: Dict[str, Any]) -> Tracer:
+    """Configure the process-wide tracer from the tracing config section."""
+    if config.get("enabled", False):
+        TRACER.configure(
+            path=config.get("path", "traces.jsonl"),
+            sample_rate=config.get("sample_rate", 1.0),
+            slow_threshold=config.get("slow_threshold"),
+            max_bytes=config.get("max_bytes", 10 * 1024 * 1024),
+            backup_count=config.get("backup_count", 5),
+        )
+    return TRACER
@@ -0,0 +1,85 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from models.release import Release
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedReleasePolicy:
+    """
+    How instantly available (already cached) Real-Debrid releases are treated
+    when picking a release.
+
+    mode is one of:
+        "ignore": rank releases without checking availability.
+        "prefer": add boost to the rank of cached releases.
+        "require": drop releases that are not cached.
+    """
+
+    mode: str = "ignore"
+    boost: float = 1000
+
+    def __post_init__(self):
+        if self.mode not in ("ignore", "prefer", "require"):
+            raise ValueError(
+                f"Invalid cached release mode: {self.mode}. "
+                "Must be 'ignore', 'prefer' or 'require'."
+            )
+
+    def cached_hashes(self, releases: List[Release], real_debrid) -> Optional[Set[str]]:
+        """
+        Lowercased hashes of the releases Real-Debrid has cached.
+
+        Returns None when availability does not matter for the mode or the
+        check failed, so a Real-Debrid hiccup never blocks an acquisition.
+        """
+        if self.mode == "ignore" or not releases:
+            return None
+
+        try:
+            availability = real_debrid.get_instant_availability(
+                release.infoHash for release in releases
+            )
+        except Exception as e:
+            logger.error(f"Error checking Real-Debrid availability: {e}")
+            return None
+
+        cached = {
+            release.infoHash.lower()
+            for release in releases
+            if availability.get(release.infoHash.lower())
+        }
+        logger.info(f"{len(cached)} of {len(releases)} releases cached on Real-Debrid")
+        return cached
+
+    def keep(self, release: Release, cached: Optional[Set[str]]) -> bool:
+        """Whether the release may be picked at all."""
+        return (
+            self.mode != "require"
+            or cached is None
+            or release.infoHash.lower() in cached
+        )
+
+    def bonus(self, release: Release, cached: Optional[Set[str]]) -> float:
+        """What the policy adds to the release's rank."""
+        if self.mode == "prefer" and cached and release.infoHash.lower() in cached:
+            return self.boost
+        return 0
+
+    def apply(self, releases: List[Release], real_debrid) -> List[Release]:
+        """
+        Adjust the ranked releases according to the policy.
+
+        If the availability check fails the releases are returned unchanged,
+        so a Real-Debrid hiccup never blocks an acquisition.
+        """
+        cached = self.cached_hashes(releases, real_debrid)
+        if cached is None:
+            return releases
+        kept = [release for release in releases if self.keep(release, cached)]
+        for release in kept:
+            release.rank += self.bonus(release, cached)
+        return kept
@@ -0,0 +1,122 @@
+import logging
+import threading
+from typing import Dict, Optional, Sequence
+
+import regex
+from models.release import Release
+from monitoring import metrics
+from RTN import SettingsModel
+from RTN.patterns import IS_TRASH_COMPILED
+
+logger = logging.getLogger(__name__)
+
+TRASH = "trash"
+
+# Backreferences would point at the wrong group once patterns are combined
+_BACKREFERENCE = regex.compile(r"\\[1-9]|\(\?P[=>]")
+
+
+class _Matcher:
+    """Several patterns searched with one combined regex."""
+
+    def __init__(self, patterns: Sequence[regex.Pattern]):
+        self.patterns = list(patterns)
+        self.combined = None
+        if self.patterns and not any(
+            _BACKREFERENCE.search(pattern.pattern) for pattern in self.patterns
+        ):
+            self.combined = regex.compile(
+                "|".join(
+                    f"(?P<p{i}>(?{_flags(pattern)}:{pattern.pattern}))"
+                    for i, pattern in enumerate(self.patterns)
+                )
+            )
+
+    def search(self, title: str) -> Optional[regex.Pattern]:
+        """The pattern matching earliest in the title, if any does."""
+        if self.combined is not None:
+            match = self.combined.search(title)
+            if match is None:
+                return None
+            for name, value in match.groupdict().items():
+                if value is not None:
+                    return self.patterns[int(name[1:])]
+        for pattern in self.patterns:
+            if pattern.search(title):
+                return pattern
+        return None
+
+
+def _flags(pattern: regex.Pattern) -> str:
+    return "i" if pattern.flags & regex.IGNORECASE else "-i"
+
+
+class ReleasePrefilter:
+    """
+    Rejects releases on their raw title before RTN parses them.
+
+    Applies the checks RTN runs on the raw title, in the same order: RTN's
+    trash patterns reject a release, a require pattern accepts it, and an
+    exclude pattern rejects it. A release this rejects would not be fetched
+    by RTN either, so only the parsing is skipped. The require and exclude
+    lists are each compiled into a single regex once, and rejections are
+    counted per pattern.
+    """
+
+    def __init__(
+        self,
+        require: Sequence[regex.Pattern] = (),
+        exclude: Sequence[regex.Pattern] = (),
+    ):
+        # Searched one by one: these start with \b and optional groups, which
+        # the regex module finds faster separately than as one alternation
+        self._trash = IS_TRASH_COMPILED
+        self._require = _Matcher(require)
+        self._exclude = _Matcher(exclude)
+        self.rejections: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: SettingsModel) -> "ReleasePrefilter":
+        """Use the patterns RTN compiled from torrent_settings."""
+        return cls(require=settings.require, exclude=settings.exclude)
+
+    def check(self, title: str) -> Optional[str]:
+        """
+        Check a raw release title.
+
+        Returns:
+            Optional[str]: The rule that rejects the title ("trash" or the
+            exclude pattern), or None if it should be parsed and ranked.
+        """
+        if not title:
+            return None
+        if any(pattern.search(title) for pattern in self._trash):
+            rule, reason = TRASH, TRASH
+        elif self._require.search(title):
+            return None
+        else:
+            pattern = self._exclude.search(title)
+            if pattern is None:
+                return None
+            rule, reason = pattern.pattern, "excluded"
+
+        with self._lock:
+            self.rejections[rule] = self.rejections.get(rule, 0) + 1
+        metrics.RELEASES_FILTERED.inc(reason=reason)
+        return rule
+
+    def __call__(self, release: Release) -> bool:
+        """Release filter for indexers: True if the release should be kept."""
+        return self.check(release.title) is None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.rejections)
+
+    def log_stats(self):
+        rejections = sorted(self.stats().items(), key=lambda item: -item[1])
+        if not rejections:
+            return
+        summary = ", ".join(f"{rule}: {count}" for rule, count in rejections)
+        logger.info(f"Pre-filter rejections: {summary}")
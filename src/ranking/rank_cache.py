@@ -0,0 +1,234 @@
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ranking.selection import RankBound
+from RTN import RTN, parse
+from state.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+def settings_fingerprint(torrent_settings: Dict[str, Any]) -> str:
+    """Stable short hash of the torrent_settings config section."""
+    encoded = json.dumps(torrent_settings, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+
+class RankCache:
+    """
+    Memoized RTN parse and rank results.
+
+    Entries are keyed by release title and infoHash, and persisted rows also
+    carry the fingerprint of the ranking settings; rows written with other
+    settings are dropped on startup, so changing torrent_settings starts from
+    a clean cache. Parsing and ranking are memoized separately because a
+    release is only ranked once its parsed title matches the item.
+
+    New results and hits are buffered in memory and written in one
+    transaction by flush(), which callers run once per watchlist item. The
+    persisted table keeps the max_persisted most recently used rows; older
+    ones are pruned by maintain(), once per cycle.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rank_cache (
+            info_hash TEXT NOT NULL,
+            title TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            parsed_title TEXT NOT NULL,
+            fetch INTEGER,
+            rank REAL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (info_hash, title)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS rank_cache_last_used ON rank_cache (last_used);
+    """
+
+    def __init__(
+        self,
+        rtn: RTN,
+        fingerprint: str,
+        max_entries: int = 50000,
+        state_store: StateStore = None,
+        max_persisted: int = 200000,
+    ):
+        self.rtn = rtn
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.max_persisted = max_persisted
+        self.state_store = state_store
+        if state_store:
+            columns = [
+                row[1] for row in state_store.query("PRAGMA table_info(rank_cache)")
+            ]
+            if columns and "last_used" not in columns:
+                # Written before rows were pruned; it is only a cache
+                state_store.execute("DROP TABLE rank_cache")
+            state_store.ensure_schema(self.SCHEMA)
+            dropped = state_store.execute(
+                "DELETE FROM rank_cache WHERE fingerprint != ?", (fingerprint,)
+            )
+            if dropped:
+                logger.info(f"Ranking settings changed, dropped {dropped} ranks")
+
+        # (info_hash, title) -> [parsed_title, fetch, rank]
+        self._entries: "OrderedDict[Tuple[str, str], List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Keys with results not written yet, and keys hit since the last flush
+        self._dirty: Dict[Tuple[str, str], List[Any]] = {}
+        self._touched: Set[Tuple[str, str]] = set()
+        self.counters = {"hits": 0, "misses": 0, "pruned": 0}
+        self._bound: Optional[RankBound] = None
+
+    def parsed_title(self, title: str, info_hash: str) -> str:
+        """The release's parsed title and year, formatted for title_match."""
+        return self._entry(title, info_hash)[0]
+
+    def rank(self, title: str, info_hash: str) -> Tuple[bool, float]:
+        """
+        Returns:
+            Tuple[bool, float]: Whether the release should be fetched, and its rank.
+        """
+        entry = self._entry(title, info_hash)
+        if entry[1] is None:
+            ranked = self.rtn.rank(title, info_hash)
+            with self._lock:
+                entry[1], entry[2] = bool(ranked.fetch), ranked.rank
+                self._mark_dirty((info_hash, title), entry)
+        return entry[1], entry[2]
+
+    def upper_bound(self, title: str, info_hash: str) -> float:
+        """
+        Upper bound on the release's rank, without parsing it.
+
+        Exact if the release was already ranked, and -inf if RTN rejected it.
+        """
+        with self._lock:
+            entry = self._entries.get((info_hash, title))
+        if entry is not None and entry[1] is not None:
+            return entry[2] if entry[1] else -math.inf
+        if self._bound is None:
+            self._bound = RankBound(self.rtn.settings, self.rtn.ranking_model)
+        return self._bound(title)
+
+    def flush(self):
+        """Write buffered results and last-used times to the state store."""
+        if not self.state_store:
+            return
+        with self._lock:
+            dirty = [(key, list(entry)) for key, entry in self._dirty.items()]
+            touched = [key for key in self._touched if key not in self._dirty]
+            self._dirty.clear()
+            self._touched.clear()
+        if not dirty and not touched:
+            return
+
+        now = time.time()
+        with self.state_store.transaction():
+            self.state_store.executemany(
+                "INSERT OR REPLACE INTO rank_cache "
+                "(info_hash, title, fingerprint, parsed_title, fetch, rank, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (info_hash, title, self.fingerprint, *entry, now)
+                    for (info_hash, title), entry in dirty
+                ),
+            )
+            self.state_store.executemany(
+                "UPDATE rank_cache SET last_used = ? WHERE info_hash = ? AND title = ?",
+                ((now, info_hash, title) for info_hash, title in touched),
+            )
+
+    def prune(self) -> int:
+        """
+        Drop persisted rows beyond the max_persisted most recently used.
+
+        Returns:
+            int: The number of rows removed.
+        """
+        if not self.state_store:
+            return 0
+        pruned = self.state_store.execute(
+            """
+            DELETE FROM rank_cache WHERE last_used < (
+                SELECT last_used FROM rank_cache
+                ORDER BY last_used DESC LIMIT 1 OFFSET ?
+            )
+            """,
+            (self.max_persisted - 1,),
+        )
+        with self._lock:
+            self.counters["pruned"] += pruned
+        return pruned
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
+
+    def maintain(self):
+        """Write anything still buffered and prune the table; run once per cycle."""
+        self.flush()
+        self.prune()
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(
+            f"Rank cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['entries']} in memory, {stats['pruned']} pruned from disk"
+        )
+
+    def _entry(self, title: str, info_hash: str) -> List[Any]:
+        key = (info_hash, title)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                self._mark_used(key)
+                return entry
+
+        entry = self._load(title, info_hash)
+        if entry is None:
+            parsed = parse(title)
+            entry = [f"{parsed.parsed_title} ({parsed.year})", None, None]
+            counter = "misses"
+        else:
+            counter = "hits"
+
+        with self._lock:
+            self.counters[counter] += 1
+            if counter == "misses":
+                self._mark_dirty(key, entry)
+            else:
+                self._mark_used(key)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _load(self, title: str, info_hash: str) -> Optional[List[Any]]:
+        if not self.state_store:
+            return None
+        rows = self.state_store.query(
+            "SELECT parsed_title, fetch, rank FROM rank_cache "
+            "WHERE info_hash = ? AND title = ? AND fingerprint = ?",
+            (info_hash, title, self.fingerprint),
+        )
+        if not rows:
+            return None
+        parsed_title, fetch, rank = rows[0]
+        return [parsed_title, None if fetch is None else bool(fetch), rank]
+
+    def _mark_dirty(self, key: Tuple[str, str], entry: List[Any]):
+        if self.state_store:
+            self._dirty[key] = entry
+
+    def _mark_used(self, key: Tuple[str, str]):
+        if self.state_store:
+            self._touched.add(key)
@@ -0,0 +1,143 @@
+import heapq
+import math
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+
+import regex
+from RTN import SettingsModel
+from RTN.models import BaseRankingModel
+from RTN.patterns import (
+    COMPLETE_SERIES_COMPILED,
+    MULTI_AUDIO_COMPILED,
+    MULTI_SUBTITLE_COMPILED,
+    check_hdr_dolby_video,
+    check_pattern,
+)
+
+T = TypeVar("T")
+
+# RTN adds to the rank for every parsed season and episode, so titles that
+# may contain them cannot be bounded without parsing
+_EPISODIC = regex.compile(
+    r"\bS\d|\bE\d|\d\s*x\s*\d|\d+\s*-\s*\d+|season|episode|series|saison|"
+    r"temporada|stagione|staffel|сезон|серии|\bEp\b",
+    regex.IGNORECASE,
+)
+# Only titles with one of these can get RTN's 4K/2160p/1440p resolution rank
+_UHD = regex.compile(r"2160|1440|4k|uhd|qhd|quadhd", regex.IGNORECASE)
+# Bonus RTN gives titles matching a preferred pattern
+PREFERRED_BONUS = 5000
+
+
+class RankBound:
+    """
+    Cheap upper bound on the RTN rank of a raw release title.
+
+    The HDR, complete, dubbed and subbed parts of RTN's rank come from
+    patterns on the raw title, so they are computed exactly with RTN's own
+    patterns, as is the preferred bonus. The parts that need a full parse
+    (resolution, quality, codec, audio and the other flags) count as the best
+    score the ranking model and custom ranks give them, except that the UHD
+    resolution score needs a UHD marker in the title. Titles that look
+    episodic have no bound.
+    """
+
+    def __init__(self, settings: SettingsModel, ranking_model: BaseRankingModel):
+        def score(name: str) -> int:
+            custom = settings.custom_ranks[name]
+            return custom.rank if custom.enable else getattr(ranking_model, name)
+
+        def best(*names: str, offset: int = 0) -> int:
+            return max([score(name) + offset for name in names] + [0])
+
+        self.uhd = max(score("uhd") - best("fhd", "hd", "sd"), 0)
+        self.base = (
+            best("fhd", "hd", "sd")
+            + best("webdl", "bluray", "dvdrip", "bdrip", "brrip", "hdtv")
+            + best("h264", "h265", "hevc", "av1", "avc")
+            # Some audio formats score up to 10 above their model value
+            + best(
+                "truehd",
+                "atmos",
+                "ac3",
+                "ddplus",
+                "dts_x",
+                "dts_hd",
+                "dts_hd_ma",
+                "aac",
+                offset=10,
+            )
+            # Bit depth
+            + 2
+            + sum(max(score(name), 0) for name in ("repack", "proper", "remux"))
+        )
+        self.hdr = {
+            "HDR": score("hdr"),
+            "HDR10+": score("hdr10"),
+            "DV": score("dolby_video"),
+            "": 0,
+        }
+        self.dubbed = score("dubbed")
+        self.subbed = score("subbed")
+        self.preferred = [pattern for pattern in settings.preferred if pattern]
+
+    def __call__(self, title: str) -> float:
+        if _EPISODIC.search(title):
+            return math.inf
+        bound = self.base + self.hdr[check_hdr_dolby_video(title)]
+        if _UHD.search(title):
+            bound += self.uhd
+        if check_pattern(COMPLETE_SERIES_COMPILED, title):
+            bound += 100
+        if check_pattern(MULTI_AUDIO_COMPILED, title):
+            bound += self.dubbed
+        if check_pattern(MULTI_SUBTITLE_COMPILED, title):
+            bound += self.subbed
+        if any(pattern.search(title) for pattern in self.preferred):
+            bound += PREFERRED_BONUS
+        return bound
+
+
+def select_best(
+    candidates: Iterable[T],
+    bound: Callable[[T], float],
+    score: Callable[[T], Optional[float]],
+    k: int = 1,
+) -> List[Tuple[float, T]]:
+    """
+    The k highest scoring candidates, scoring as few as possible.
+
+    Candidates are scored in order of their upper bound, and the search stops
+    once no remaining bound beats the k-th best score. Candidates whose score
+    is None are rejected. Equal scores are broken by the candidates' original
+    order, so the result is the same as scoring and stable-sorting them all.
+
+    Args:
+        candidates (Iterable[T]): The candidates, in preference order.
+        bound (Callable[[T], float]): Cheap upper bound on a candidate's score.
+        score (Callable[[T], Optional[float]]): The exact, expensive score.
+        k (int): How many candidates to keep.
+
+    Returns:
+        List[Tuple[float, T]]: (score, candidate) pairs, best first.
+    """
+    bounded = sorted(
+        (
+            (bound(candidate), index, candidate)
+            for index, candidate in enumerate(candidates)
+        ),
+        key=lambda item: (-item[0], item[1]),
+    )
+    # Min-heap of the best k as (score, -index); the root is the one to beat
+    best: List[Tuple[float, int, T]] = []
+    for upper, index, candidate in bounded:
+        if len(best) == k and upper < best[0][0]:
+            break
+        value = score(candidate)
+        if value is None:
+            continue
+        entry = (value, -index, candidate)
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        elif entry[:2] > best[0][:2]:
+            heapq.heapreplace(best, entry)
+    return [(value, candidate) for value, _, candidate in sorted(best, reverse=True)]
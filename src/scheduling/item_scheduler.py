@@ -0,0 +1,346 @@
+import heapq
+import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from content.release_date_cache import ReleaseDateCache
+from models.movie import Movie
+from state.state_store import ItemOutcome, ItemState, StateStore
+
+logger = logging.getLogger(__name__)
+
+# Shortest time between the end of a scan and a requested one
+MIN_SCAN_GAP = 30
+# Seconds between checks for scans requested by other processes
+SCAN_REQUEST_POLL = 5
+SCAN_SIGNAL = "scan_requested"
+# Shortest time before a finished item runs again, e.g. when another process
+# held it and its state has not changed yet
+MIN_RETRY_GAP = 30
+
+# Items that failed or found nothing wait longer after every further attempt
+_BACKOFF_OUTCOMES = (ItemOutcome.NO_RELEASES, ItemOutcome.NO_MATCH, ItemOutcome.FAILED)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    When an item should be checked again, given its last attempt.
+
+    Attributes:
+        interval (float): Seconds between checks of an item without backoff.
+        max_backoff (float): Longest wait between checks of an item that
+            keeps finding nothing.
+        recent_release_days (int): Items released this many days ago or less
+            are checked every interval, since new releases show up quickly.
+        dry_run (bool): Whether dry run outcomes count as processed.
+    """
+
+    interval: float = 3600
+    max_backoff: float = 86400
+    recent_release_days: int = 14
+    dry_run: bool = False
+
+    def next_check(
+        self,
+        state: Optional[ItemState],
+        release_date: Optional[date],
+        now: float,
+    ) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: The time the item is due, or None if it never is.
+        """
+        if state is None:
+            return now
+        if state.outcome == ItemOutcome.ADDED:
+            return None
+        if state.outcome == ItemOutcome.DRY_RUN:
+            # Real runs still have to add what a dry run only picked
+            return None if self.dry_run else now
+
+        retry = state.last_attempt + self.interval
+        if state.outcome == ItemOutcome.NOT_RELEASED:
+            if release_date is None:
+                return retry
+            # Check again on the release day, not before
+            released = datetime.combine(release_date, datetime.min.time())
+            return max(retry, released.timestamp())
+
+        today = datetime.fromtimestamp(now).date()
+        recent = release_date is not None and (
+            (today - release_date).days <= self.recent_release_days
+        )
+        if recent or state.outcome not in _BACKOFF_OUTCOMES:
+            return retry
+        backoff = self.interval * 2 ** max(state.attempts - 1, 0)
+        return state.last_attempt + min(backoff, self.max_backoff)
+
+
+def next_check_of(
+    imdb_id: str,
+    state_store: StateStore,
+    policy: RetryPolicy,
+    release_dates: Optional[ReleaseDateCache],
+    now: float,
+) -> Optional[float]:
+    """When an item is due according to its stored state and release date."""
+    release_date = None
+    if release_dates:
+        entry = release_dates.get(imdb_id)
+        release_date = entry.release_date if entry else None
+    return policy.next_check(state_store.get(imdb_id), release_date, now)
+
+
+class ItemScheduler:
+    """
+    Processes each watchlist item when it is due, instead of all every cycle.
+
+    Every interval a scan fetches the watchlists and works out when each item
+    should next be checked from the state store, following the retry policy.
+    Items are kept in a priority queue on that time and handed to a worker
+    pool as they come due. Items that come due together are spread evenly
+    over the next interval, rather than started in one burst. Scans never
+    overlap, and an item is never processed twice at the same time; once it
+    finishes, its next check is computed from the new outcome.
+
+    Other threads can push a single item to be processed right away, or ask
+    for a scan ahead of time, e.g. when a webhook reports a watchlist change.
+    With shared_scan_requests, a requested scan is also recorded in the state
+    store, and schedulers in other processes sharing it scan as well.
+    """
+
+    def __init__(
+        self,
+        scan: Callable[[], List[Movie]],
+        process: Callable[[Movie], ItemOutcome],
+        state_store: StateStore,
+        policy: RetryPolicy = None,
+        release_dates: ReleaseDateCache = None,
+        max_workers: int = 1,
+        on_scan: Callable[[], None] = None,
+        shared_scan_requests: bool = False,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            scan (Callable[[], List[Movie]]): Returns the items to schedule,
+                already without the owned and processed ones.
+            process (Callable[[Movie], ItemOutcome]): Processes one item and
+                records its outcome in the state store.
+            state_store (StateStore): Where the items' last attempts are read.
+            policy (RetryPolicy): When items are checked again.
+            release_dates (ReleaseDateCache): Stored release dates, if any.
+            max_workers (int): Items processed at the same time.
+            on_scan (Callable[[], None]): Called after every scan, e.g. to log
+                the previous interval's stats.
+            shared_scan_requests (bool): Whether scan requests are passed on
+                to, and taken from, other processes sharing the state store.
+            clock (Callable[[], float]): The current time.
+        """
+        self.scan = scan
+        self.process = process
+        self.state_store = state_store
+        self.policy = policy or RetryPolicy()
+        self.release_dates = release_dates
+        self.max_workers = max(max_workers, 1)
+        self.on_scan = on_scan
+        self.shared_scan_requests = shared_scan_requests
+        self.clock = clock
+
+        self._items: Dict[str, Movie] = {}
+        # imdb_id -> due time; heap entries that disagree with it are stale
+        self._due: Dict[str, float] = {}
+        self._queue: List[Tuple[float, str]] = []
+        self._in_flight: Dict[Future, Movie] = {}
+        self._next_scan = 0.0
+        self._last_scan = -math.inf
+        self._stop = threading.Event()
+        # Set by other threads; completing _wakeup ends the current wait
+        self._lock = threading.Lock()
+        self._pushed: List[Movie] = []
+        self._pushed_ids: Set[str] = set()
+        self._scan_requested = False
+        self._wakeup: Future = Future()
+        # The last shared scan request acted on; older ones predate this run
+        self._seen_scan_request = (
+            state_store.signaled_at(SCAN_SIGNAL) if shared_scan_requests else None
+        )
+
+    def run_forever(self):
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="watchlist"
+        ) as executor:
+            while not self._stop.is_set():
+                self._wait(self.tick(executor))
+
+    def stop(self):
+        self._stop.set()
+        self._wake()
+
+    def push(self, item: Movie):
+        """Process an item as soon as a worker is free, unless it is added."""
+        with self._lock:
+            self._pushed.append(item)
+        self._wake()
+
+    def request_scan(self):
+        """Scan the watchlists now, or MIN_SCAN_GAP after the last scan."""
+        if self.shared_scan_requests:
+            self.state_store.signal(SCAN_SIGNAL)
+        with self._lock:
+            self._scan_requested = True
+        self._wake()
+
+    def tick(self, executor) -> float:
+        """
+        Scan if one is due, reschedule finished items and start due ones.
+
+        Returns:
+            float: The time of the next due item or scan.
+        """
+        self._reap()
+        with self._lock:
+            if self._wakeup.done():
+                self._wakeup = Future()
+            pushed, self._pushed = self._pushed, []
+            scan_requested, self._scan_requested = self._scan_requested, False
+
+        if self.shared_scan_requests:
+            requested_at = self.state_store.signaled_at(SCAN_SIGNAL)
+            if requested_at != self._seen_scan_request:
+                self._seen_scan_request = requested_at
+                scan_requested = True
+
+        now = self.clock()
+        if scan_requested:
+            self._next_scan = min(
+                self._next_scan, max(now, self._last_scan + MIN_SCAN_GAP)
+            )
+        if now >= self._next_scan:
+            self._scan(now)
+            now = self.clock()
+            self._last_scan = now
+            self._next_scan = now + self.policy.interval
+        for item in pushed:
+            self._add_pushed(item, now)
+
+        while self._queue and len(self._in_flight) < self.max_workers:
+            due, imdb_id = self._queue[0]
+            if self._due.get(imdb_id) != due:
+                heapq.heappop(self._queue)
+                continue
+            if due > now:
+                break
+            heapq.heappop(self._queue)
+            del self._due[imdb_id]
+            self._pushed_ids.discard(imdb_id)
+            item = self._items[imdb_id]
+            self._in_flight[executor.submit(self.process, item)] = item
+
+        next_due = self._queue[0][0] if self._queue else self._next_scan
+        if self.shared_scan_requests:
+            next_due = min(next_due, now + SCAN_REQUEST_POLL)
+        return min(next_due, self._next_scan)
+
+    def pending(self) -> Dict[str, float]:
+        """Due times of the items waiting to be processed, by IMDb ID."""
+        return dict(self._due)
+
+    def _wait(self, until: float):
+        """Sleep until the given time, an item finishes or another thread wakes us."""
+        wait(
+            [*self._in_flight, self._wakeup],
+            timeout=max(until - self.clock(), 0),
+            return_when=FIRST_COMPLETED,
+        )
+
+    def _wake(self):
+        with self._lock:
+            if not self._wakeup.done():
+                self._wakeup.set_result(None)
+
+    def _add_pushed(self, item: Movie, now: float):
+        in_flight = {item.imdb_id for item in self._in_flight.values()}
+        state = self.state_store.get(item.imdb_id)
+        if (
+            item.imdb_id in in_flight
+            or self.policy.next_check(state, None, now) is None
+        ):
+            logger.debug(f"Ignoring pushed item {item.title}: in progress or added")
+            return
+        logger.info(f"Queued pushed item: {item.title}")
+        self._items[item.imdb_id] = item
+        self._pushed_ids.add(item.imdb_id)
+        self._due[item.imdb_id] = now
+        heapq.heappush(self._queue, (now, item.imdb_id))
+
+    def _scan(self, now: float):
+        started = time.monotonic()
+        try:
+            items = self.scan()
+        except Exception as e:
+            logger.error(f"Error scanning watchlists: {e}")
+            return
+
+        in_flight = {item.imdb_id for item in self._in_flight.values()}
+        pushed = {imdb_id: self._items[imdb_id] for imdb_id in self._pushed_ids}
+        self._items = {item.imdb_id: item for item in items}
+        # Pushed items still waiting may not be on the watchlists yet
+        self._items.update(pushed)
+        # Items that were added or left the watchlists are dropped
+        self._due = {
+            imdb_id: due for imdb_id, due in self._due.items() if imdb_id in self._items
+        }
+        backlog = []
+        for imdb_id in self._items:
+            if imdb_id in in_flight or imdb_id in self._due:
+                continue
+            due = self._next_check(imdb_id, now)
+            if due is None:
+                continue
+            if due <= now:
+                backlog.append((due, imdb_id))
+            else:
+                self._due[imdb_id] = due
+
+        # Oldest first, evenly over the interval instead of all at once
+        backlog.sort()
+        spacing = self.policy.interval / max(len(backlog), 1)
+        for i, (_, imdb_id) in enumerate(backlog):
+            self._due[imdb_id] = now + i * spacing
+        self._queue = sorted((due, imdb_id) for imdb_id, due in self._due.items())
+
+        logger.info(
+            f"Scanned {len(self._items)} items in {time.monotonic() - started:.1f}s: "
+            f"{len(backlog)} due now, {len(self._due) - len(backlog)} later"
+        )
+        if self.on_scan:
+            self.on_scan()
+
+    def _reap(self):
+        for future in [future for future in self._in_flight if future.done()]:
+            item = self._in_flight.pop(future)
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error processing {item.title}: {e}")
+                self.state_store.record_attempt(item, ItemOutcome.FAILED)
+            if item.imdb_id not in self._items:
+                continue
+            now = self.clock()
+            due = self._next_check(item.imdb_id, now)
+            if due is not None:
+                due = max(due, now + MIN_RETRY_GAP)
+                self._due[item.imdb_id] = due
+                heapq.heappush(self._queue, (due, item.imdb_id))
+
+    def _next_check(self, imdb_id: str, now: float) -> Optional[float]:
+        return next_check_of(
+            imdb_id, self.state_store, self.policy, self.release_dates, now
+        )
@@ -0,0 +1,176 @@
+import hmac
+import json
+import logging
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from models.movie import MediaType, Movie
+
+logger = logging.getLogger(__name__)
+
+# Plex webhooks are small; anything bigger is not one
+MAX_BODY_BYTES = 1 << 20
+
+_MEDIA_TYPES = {"movie": MediaType.MOVIE, "show": MediaType.SHOW}
+
+
+class WebhookServer:
+    """
+    Background HTTP server receiving watchlist change notifications.
+
+    POST /webhook/item takes a JSON body describing a single item, e.g.
+    {"imdb_id": "tt0111161", "title": "The Shawshank Redemption",
+    "year": 1994, "type": "movie"}, and hands it to on_item. POST
+    /webhook/plex takes Plex's multipart webhooks and calls on_plex for the
+    configured events; Plex has no watchlist events, and the item in a
+    library event is already owned, so Plex events only trigger a scan. When
+    a token is set, requests must carry it as a ?token= query parameter or an
+    X-Webhook-Token header.
+    """
+
+    def __init__(
+        self,
+        on_item: Callable[[Movie], None],
+        on_plex: Callable[[], None],
+        host: str = "127.0.0.1",
+        port: int = 9465,
+        token: Optional[str] = None,
+        plex_events: Sequence[str] = (),
+    ):
+        """
+        Args:
+            on_item (Callable[[Movie], None]): Called with each posted item.
+            on_plex (Callable[[], None]): Called for each accepted Plex event.
+            host (str): Address to listen on.
+            port (int): Port to listen on, 0 for any free one.
+            token (Optional[str]): Shared secret requests must carry.
+            plex_events (Sequence[str]): Plex events to act on; all if empty.
+        """
+        self.on_item = on_item
+        self.on_plex = on_plex
+        self.token = token
+        self.plex_events = set(plex_events)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self) -> "WebhookServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="webhooks", daemon=True
+        )
+        self._thread.start()
+        host, port = self.address
+        logger.info(f"Receiving webhooks on http://{host}:{port}/webhook")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(
+        self, path: str, headers: Mapping[str, str], body: bytes
+    ) -> Tuple[int, str]:
+        """
+        Handle one POST request.
+
+        Returns:
+            Tuple[int, str]: The response status and message.
+        """
+        url = urlsplit(path)
+        if url.path not in ("/webhook/item", "/webhook/plex"):
+            return 404, "Not found"
+        if self.token:
+            token = headers.get("X-Webhook-Token") or next(
+                iter(parse_qs(url.query).get("token", [])), ""
+            )
+            if not hmac.compare_digest(token.encode(), self.token.encode()):
+                return 401, "Invalid token"
+
+        try:
+            if url.path == "/webhook/item":
+                item = parse_item(json.loads(body))
+                logger.info(f"Webhook item: {item.title} ({item.imdb_id})")
+                self.on_item(item)
+                return 202, "Queued"
+            event = parse_plex_event(headers.get("Content-Type", ""), body)
+        except ValueError as e:
+            return 400, str(e)
+        if self.plex_events and event not in self.plex_events:
+            logger.debug(f"Ignoring Plex event {event}")
+            return 200, "Ignored"
+        logger.info(f"Plex event {event}, scanning watchlists")
+        self.on_plex()
+        return 202, "Scan requested"
+
+    def _handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY_BYTES:
+                    self._reply(413, "Payload too large")
+                    return
+                try:
+                    status, message = receiver.handle(
+                        self.path, self.headers, self.rfile.read(length)
+                    )
+                except Exception as e:
+                    logger.error(f"Error handling webhook: {e}")
+                    status, message = 500, "Internal error"
+                self._reply(status, message)
+
+            def _reply(self, status: int, message: str):
+                body = json.dumps({"message": message}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"Webhook request: {format % args}")
+
+        return Handler
+
+
+def parse_item(payload: Any) -> Movie:
+    """Build a watchlist item from a generic webhook's JSON body."""
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object")
+    imdb_id = str(payload.get("imdb_id") or "")
+    if not imdb_id.startswith("tt"):
+        raise ValueError("imdb_id is required")
+    media_type = _MEDIA_TYPES.get(str(payload.get("type", "movie")).lower())
+    if media_type is None:
+        raise ValueError("type must be movie or show")
+    return Movie(
+        title=str(payload.get("title") or imdb_id),
+        year=str(payload["year"]) if payload.get("year") else "",
+        imdb_id=imdb_id,
+        media_type=media_type,
+    )
+
+
+def parse_plex_event(content_type: str, body: bytes) -> str:
+    """The event name of a Plex webhook, sent as multipart form data."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    if not message.is_multipart():
+        raise ValueError("Expected multipart form data")
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "payload":
+            try:
+                return json.loads(part.get_content())["event"]
+            except (KeyError, TypeError, json.JSONDecodeError):
+                break
+    raise ValueError("Missing Plex payload")
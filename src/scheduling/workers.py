@@ -0,0 +1,134 @@
+import copy
+import logging
+import multiprocessing
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from content.release_date_cache import ReleaseDateCache
+from models.movie import Movie
+from scheduling.item_scheduler import RetryPolicy, next_check_of
+from state.state_store import ItemOutcome, StateStore
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a worker process that exited is started again
+RESTART_DELAY = 5
+
+
+def shard_of(imdb_id: str, shards: int) -> int:
+    """The shard an item belongs to; stable across processes, unlike hash()."""
+    return zlib.crc32(imdb_id.encode()) % shards
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse an "index/count" shard argument, e.g. "0/4"."""
+    index, _, count = value.partition("/")
+    shard = int(index), int(count)
+    if not 0 <= shard[0] < shard[1]:
+        raise ValueError(f"Invalid shard {value}")
+    return shard
+
+
+def split_rate_limits(http_config: Dict[str, Any], shares: int) -> Dict[str, Any]:
+    """
+    The HTTP config for one of several processes sharing the upstream limits.
+
+    Each process gets an equal share of every service's rate and burst, so
+    together they stay within the configured limits.
+    """
+    http_config = copy.deepcopy(http_config)
+    for service, settings in http_config.get("rate_limits", {}).items():
+        if isinstance(settings, dict) and "rate" in settings:
+            settings["rate"] = settings["rate"] / shares
+            settings["burst"] = max(settings.get("burst", 1) / shares, 1)
+    return http_config
+
+
+def claimed(
+    process: Callable[[Movie], Optional[ItemOutcome]],
+    state_store: StateStore,
+    owner: str,
+    policy: RetryPolicy,
+    release_dates: ReleaseDateCache = None,
+    ttl: float = 3600,
+) -> Callable[[Movie], Optional[ItemOutcome]]:
+    """
+    Wrap process so an item only runs while claimed, and only if still due.
+
+    Sharding already keeps the processes' items apart; claims cover the
+    overlaps, such as pushed items and a change in the number of processes.
+    Once claimed, the item's stored state is read again, so an item another
+    process finished in the meantime (e.g. added it) is not processed twice.
+    """
+
+    def process_claimed(item: Movie) -> Optional[ItemOutcome]:
+        if not state_store.claim(item.imdb_id, owner, ttl):
+            logger.info(f"Skipping {item.title}: another worker is processing it")
+            return None
+        try:
+            now = time.time()
+            due = next_check_of(item.imdb_id, state_store, policy, release_dates, now)
+            if due is None or due > now:
+                logger.info(f"Skipping {item.title}: another worker processed it")
+                return None
+            return process(item)
+        finally:
+            state_store.release(item.imdb_id, owner)
+
+    return process_claimed
+
+
+class WorkerPool:
+    """
+    Runs one worker process per shard and restarts any that exit.
+
+    Each worker is started with fresh interpreter state (the spawn start
+    method), so it opens its own connections and state store.
+    """
+
+    def __init__(self, processes: int, target: Callable[[List[str]], Any]):
+        """
+        Args:
+            processes (int): The number of worker processes and shards.
+            target (Callable[[List[str]], Any]): Runs a worker; called with
+                command line arguments selecting its shard.
+        """
+        self.processes = processes
+        self.target = target
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: Dict[int, multiprocessing.process.BaseProcess] = {}
+
+    def run(self):
+        try:
+            for index in range(self.processes):
+                self._start(index)
+            while True:
+                for index, worker in list(self._workers.items()):
+                    worker.join(timeout=1)
+                    if worker.exitcode is not None:
+                        logger.error(
+                            f"Worker {index} exited with code {worker.exitcode}, "
+                            f"restarting in {RESTART_DELAY}s"
+                        )
+                        time.sleep(RESTART_DELAY)
+                        self._start(index)
+        finally:
+            self.stop()
+
+    def stop(self):
+        for worker in self._workers.values():
+            if worker.is_alive():
+                worker.terminate()
+        for worker in self._workers.values():
+            worker.join()
+
+    def _start(self, index: int):
+        worker = self._context.Process(
+            target=self.target,
+            args=(["--shard", f"{index}/{self.processes}"],),
+            name=f"worker-{index}",
+        )
+        worker.start()
+        self._workers[index] = worker
+        logger.info(f"Started worker {index} of {self.processes} (pid {worker.pid})")
@@ -0,0 +1,302 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Set
+
+from models.movie import Movie
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; only single-process use works there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+_QUERY_CHUNK_SIZE = 500
+
+
+class ItemOutcome(Enum):
+    ADDED = auto()
+    DRY_RUN = auto()
+    NOT_RELEASED = auto()
+    NO_RELEASES = auto()
+    NO_MATCH = auto()
+    FAILED = auto()
+
+
+@dataclass(frozen=True)
+class ItemState:
+    imdb_id: str
+    title: str
+    media_type: str
+    outcome: ItemOutcome
+    info_hash: Optional[str]
+    attempts: int
+    first_seen: float
+    last_attempt: float
+    added_at: Optional[float]
+
+
+class ProcessLock:
+    """Exclusive lock on a file, held by at most one process at a time."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a")
+
+    def __enter__(self):
+        if fcntl:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def close(self):
+        self._file.close()
+
+
+class StateStore:
+    """
+    Durable per-item pipeline state, kept in a local SQLite database.
+
+    The database runs in WAL mode so readers never block the writer, and a
+    single connection is shared by all worker threads behind a lock. When
+    several processes share the database, transactions also take a lock file
+    next to it, so they run one at a time across processes too.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            imdb_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            outcome TEXT NOT NULL,
+            info_hash TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            first_seen REAL NOT NULL,
+            last_attempt REAL NOT NULL,
+            added_at REAL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS items_outcome ON items (outcome);
+        CREATE TABLE IF NOT EXISTS item_claims (
+            imdb_id TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS signals (
+            name TEXT PRIMARY KEY,
+            raised_at REAL NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str = "debridsync.db", shared: bool = False):
+        """
+        Args:
+            path (str): The SQLite database file.
+            shared (bool): Whether other processes use the database as well.
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._process_lock = ProcessLock(f"{path}.lock") if shared else None
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.ensure_schema(self.SCHEMA)
+        logger.debug(f"State store opened at {path}")
+
+    def ensure_schema(self, script: str):
+        """Run CREATE ... IF NOT EXISTS statements for a component's tables."""
+        with self._lock:
+            self._conn.executescript(script)
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """
+        Run a single write statement.
+
+        Returns:
+            int: The number of rows changed.
+        """
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]):
+        with self.transaction():
+            self._conn.executemany(sql, rows)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run the statements issued inside the block as a single transaction.
+
+        Other threads wait until the block finishes. Nested blocks join the
+        outer transaction, so helpers that open their own can be combined.
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                yield
+                return
+            with self._process_lock or nullcontext():
+                # Take the write lock up front, so a transaction that reads
+                # first cannot fail on another process's write
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def record_attempt(self, item: Movie, outcome: ItemOutcome, info_hash: str = None):
+        """
+        Store the outcome of processing a watchlist item.
+
+        Args:
+            item (Movie): The watchlist item.
+            outcome (ItemOutcome): What happened on this attempt.
+            info_hash (str): The hash of the chosen release, if any.
+        """
+        now = time.time()
+        added_at = now if outcome == ItemOutcome.ADDED else None
+        self.execute(
+            """
+            INSERT INTO items (imdb_id, title, media_type, outcome, info_hash,
+                               attempts, first_seen, last_attempt, added_at)
+            VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?)
+            ON CONFLICT (imdb_id) DO UPDATE SET
+                title = excluded.title,
+                media_type = excluded.media_type,
+                outcome = excluded.outcome,
+                info_hash = COALESCE(excluded.info_hash, items.info_hash),
+                attempts = items.attempts + 1,
+                last_attempt = excluded.last_attempt,
+                added_at = COALESCE(excluded.added_at, items.added_at)
+            """,
+            (
+                item.imdb_id,
+                item.title,
+                item.media_type.name,
+                outcome.name,
+                info_hash,
+                now,
+                now,
+                added_at,
+            ),
+        )
+
+    def get(self, imdb_id: str) -> Optional[ItemState]:
+        rows = self.query(
+            """
+            SELECT imdb_id, title, media_type, outcome, info_hash, attempts,
+                   first_seen, last_attempt, added_at
+            FROM items WHERE imdb_id = ?
+            """,
+            (imdb_id,),
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return ItemState(*row[:3], ItemOutcome[row[3]], *row[4:])
+
+    def processed_ids(
+        self,
+        imdb_ids: Iterable[str],
+        outcomes: Iterable[ItemOutcome] = (ItemOutcome.ADDED,),
+    ) -> Set[str]:
+        """
+        Look up which of the given items already reached one of the outcomes.
+
+        Only the requested IDs are read, through the primary key index, so the
+        cost does not grow with the size of the store.
+
+        Args:
+            imdb_ids (Iterable[str]): The IMDb IDs to check.
+            outcomes (Iterable[ItemOutcome]): Outcomes that count as processed.
+
+        Returns:
+            Set[str]: The subset of imdb_ids that has been processed.
+        """
+        ids = list(imdb_ids)
+        outcome_names = [outcome.name for outcome in outcomes]
+        outcome_marks = ",".join("?" * len(outcome_names))
+        processed: Set[str] = set()
+        for start in range(0, len(ids), _QUERY_CHUNK_SIZE):
+            chunk = ids[start : start + _QUERY_CHUNK_SIZE]
+            rows = self.query(
+                f"""
+                SELECT imdb_id FROM items
+                WHERE imdb_id IN ({",".join("?" * len(chunk))})
+                AND outcome IN ({outcome_marks})
+                """,
+                chunk + outcome_names,
+            )
+            processed.update(row[0] for row in rows)
+        return processed
+
+    def claim(self, imdb_id: str, owner: str, ttl: float = 3600) -> bool:
+        """
+        Claim an item for processing, unless another owner holds a live claim.
+
+        Args:
+            imdb_id (str): The item to claim.
+            owner (str): Who is claiming it, e.g. a process ID.
+            ttl (float): Seconds after which the claim lapses, in case its
+                owner died without releasing it.
+
+        Returns:
+            bool: Whether the caller now holds the claim.
+        """
+        now = time.time()
+        with self.transaction():
+            rows = self.query(
+                "SELECT owner, expires FROM item_claims WHERE imdb_id = ?",
+                (imdb_id,),
+            )
+            if rows and rows[0][0] != owner and rows[0][1] > now:
+                return False
+            self.execute(
+                "INSERT OR REPLACE INTO item_claims (imdb_id, owner, expires) "
+                "VALUES (?, ?, ?)",
+                (imdb_id, owner, now + ttl),
+            )
+        return True
+
+    def release(self, imdb_id: str, owner: str):
+        """Release a claim taken with claim()."""
+        self.execute(
+            "DELETE FROM item_claims WHERE imdb_id = ? AND owner = ?",
+            (imdb_id, owner),
+        )
+
+    def signal(self, name: str):
+        """Record that something happened, for other processes to notice."""
+        self.execute(
+            "INSERT OR REPLACE INTO signals (name, raised_at) VALUES (?, ?)",
+            (name, time.time()),
+        )
+
+    def signaled_at(self, name: str) -> Optional[float]:
+        """When the named signal was last raised, if ever."""
+        rows = self.query("SELECT raised_at FROM signals WHERE name = ?", (name,))
+        return rows[0][0] if rows else None
+
+    def count(self) -> int:
+        return self.query("SELECT COUNT(*) FROM items")[0][0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            if self._process_lock:
+                self._process_lock.close()
@@ -0,0 +1,28 @@
+import threading
+from contextlib import nullcontext
+from typing import ContextManager, Dict
+
+
+class ConcurrencyLimits:
+    """
+    Per-service caps on the number of calls in flight at the same time.
+
+    Services without a configured cap are not limited.
+    """
+
+    def __init__(self, limits: Dict[str, int] = None):
+        self.limits = dict(limits or {})
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {
+            service: threading.BoundedSemaphore(limit)
+            for service, limit in self.limits.items()
+            if limit
+        }
+
+    def slot(self, service: str) -> ContextManager:
+        """
+        Context manager holding one of the service's slots while the block runs.
+
+        Args:
+            service (str): The name of the upstream service, e.g. "trakt".
+        """
+        return self._semaphores.get(service) or nullcontext()
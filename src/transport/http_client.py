@@ -0,0 +1,139 @@
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from transport.rate_limiter import RateLimitedAdapter, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """
+    Shared HTTP transport for the upstream API clients.
+
+    Wraps a single requests.Session so every client reuses the same per-host
+    keep-alive connection pools instead of opening a new TCP+TLS connection
+    for each request. When a rate limiter is given, every request waits for
+    its service's token bucket and 429 responses are retried.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout: float = 30,
+        timeouts: Optional[Dict[str, float]] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        """
+        Args:
+            pool_connections (int): Number of per-host pools to keep around.
+            pool_maxsize (int): Maximum number of kept-alive connections per host.
+            timeout (float): Default timeout in seconds for hosts without an override.
+            timeouts (Dict[str, float]): Per-host timeout overrides, keyed by hostname.
+            rate_limiter (RateLimiter): Per-service request rate limits.
+        """
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        self.adapter = RateLimitedAdapter(
+            rate_limiter, pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "HttpClient":
+        return cls(
+            pool_connections=config.get("pool_connections", 10),
+            pool_maxsize=config.get("pool_maxsize", 10),
+            timeout=config.get("timeout", 30),
+            timeouts=config.get("timeouts", {}),
+            rate_limiter=(
+                RateLimiter.from_config(config["rate_limits"])
+                if config.get("rate_limits")
+                else None
+            ),
+        )
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared session.
+
+        The per-host default timeout is applied unless the caller passes one.
+
+        Raises:
+            requests.RequestException: If there's an error with the request.
+        """
+        if "timeout" not in kwargs:
+            host = urlsplit(url).hostname
+            kwargs["timeout"] = self.timeouts.get(host, self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Connection reuse statistics per host.
+
+        Returns:
+            Dict[str, Dict[str, int]]: For each host, the number of requests sent,
+            the number of connections opened and how many requests reused an
+            already open connection.
+        """
+        stats: Dict[str, Dict[str, int]] = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host_stats = stats.setdefault(
+                pool.host, {"requests": 0, "connections": 0, "reused": 0}
+            )
+            host_stats["requests"] += pool.num_requests
+            host_stats["connections"] += pool.num_connections
+            host_stats["reused"] += max(pool.num_requests - pool.num_connections, 0)
+        return stats
+
+    def log_stats(self):
+        for host, host_stats in self.stats().items():
+            logger.info(
+                f"HTTP {host}: {host_stats['requests']} requests, "
+                f"{host_stats['connections']} connections opened, "
+                f"{host_stats['reused']} reused"
+            )
+
+    def close(self):
+        self.session.close()
+
+
+_shared_client: Optional[HttpClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_client() -> HttpClient:
+    """Return the process-wide HttpClient, creating it with defaults if needed."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
+
+
+def configure_shared_client(config: Dict[str, Any]) -> HttpClient:
+    """Replace the process-wide HttpClient with one built from config."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+        _shared_client = HttpClient.from_config(config)
+        return _shared_client
@@ -0,0 +1,295 @@
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from monitoring.metrics import (
+    RATE_LIMIT_BLOCKED_SECONDS,
+    RATE_LIMIT_RATE,
+    RATE_LIMIT_WAITING,
+    UPSTREAM_ERRORS,
+)
+from monitoring.tracing import TRACER
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Upstream service behind each known API host
+DEFAULT_HOSTS = {
+    "torrentio.strem.fun": "torrentio",
+    "api.real-debrid.com": "real_debrid",
+    "api.trakt.tv": "trakt",
+}
+
+
+class TokenBucket:
+    """
+    Token bucket whose refill rate backs off after 429 responses.
+
+    Each 429 halves the rate (down to min_rate) and pauses the bucket until
+    the server's Retry-After has passed. Every successful response then wins
+    back a recovery fraction of the configured rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1,
+        min_rate: float = None,
+        recovery: float = 0.05,
+    ):
+        """
+        Args:
+            rate (float): Requests per second allowed when the service is healthy.
+            burst (float): Requests that may be sent back to back after a quiet spell.
+            min_rate (float): Floor for the rate after repeated 429s.
+            recovery (float): Fraction of rate regained per successful response.
+        """
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.recovery = recovery
+        self.tokens = self.burst
+        self.throttled = 0
+        self.waiting = 0
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._blocked_until - now
+                    if delay <= 0:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            return
+                        delay = (1 - self.tokens) / self.rate
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def throttle(self, retry_after: Optional[float] = None) -> float:
+        """
+        Slow down after a 429 response.
+
+        Args:
+            retry_after (float): Seconds the server asked us to wait, if it said.
+
+        Returns:
+            float: Seconds until the next request may be sent.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.rate = max(self.rate / 2, self.min_rate)
+            self.tokens = 0
+            self.throttled += 1
+            delay = retry_after if retry_after is not None else 1 / self.rate
+            self._blocked_until = max(self._blocked_until, now + delay)
+            self._updated = now
+            return self._blocked_until - now
+
+    def blocked_for(self) -> float:
+        """Seconds until the pause after a 429 ends; 0 when not paused."""
+        with self._lock:
+            return max(self._blocked_until - time.monotonic(), 0)
+
+    def succeed(self):
+        with self._lock:
+            self.rate = min(
+                self.rate + self.configured_rate * self.recovery, self.configured_rate
+            )
+
+    def _refill(self, now: float):
+        start = max(self._updated, self._blocked_until)
+        if now > start:
+            self.tokens = min(self.tokens + (now - start) * self.rate, self.burst)
+        self._updated = now
+
+
+class RateLimiter:
+    """
+    Per-service token buckets shared by every HTTP client in the process.
+
+    Requests are mapped to a service by hostname; services without a
+    configured rate are not limited. Each bucket's rate, pause and waiting
+    requests are exported as gauges, read when the metrics are scraped.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Dict[str, float]] = None,
+        hosts: Dict[str, str] = None,
+        max_retries: int = 3,
+    ):
+        """
+        Args:
+            limits (Dict[str, Dict[str, float]]): Per-service bucket settings
+                (rate, burst, min_rate, recovery), keyed by service name.
+            hosts (Dict[str, str]): Extra hostname to service mappings.
+            max_retries (int): Times a request is retried after a 429.
+        """
+        self.hosts = dict(DEFAULT_HOSTS, **(hosts or {}))
+        self.max_retries = max_retries
+        self.buckets: Dict[str, TokenBucket] = {
+            service: TokenBucket(**settings)
+            for service, settings in (limits or {}).items()
+            if settings and settings.get("rate")
+        }
+        for service, bucket in self.buckets.items():
+            RATE_LIMIT_RATE.set_function(
+                lambda bucket=bucket: bucket.rate, service=service
+            )
+            RATE_LIMIT_BLOCKED_SECONDS.set_function(bucket.blocked_for, service=service)
+            RATE_LIMIT_WAITING.set_function(
+                lambda bucket=bucket: bucket.waiting, service=service
+            )
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RateLimiter":
+        limits = {
+            service: settings
+            for service, settings in config.items()
+            if service not in ("hosts", "max_retries")
+        }
+        return cls(
+            limits=limits,
+            hosts=config.get("hosts", {}),
+            max_retries=config.get("max_retries", 3),
+        )
+
+    def bucket_for(self, url: str) -> Optional[TokenBucket]:
+        return self.buckets.get(self.hosts.get(urlsplit(url).hostname))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Current state of each service's bucket.
+
+        Returns:
+            Dict[str, Dict[str, float]]: For each service, the current and
+            configured rate in requests per second, the number of requests
+            waiting for a token and the number of 429s seen.
+        """
+        return {
+            service: {
+                "rate": round(bucket.rate, 3),
+                "configured_rate": bucket.configured_rate,
+                "queue_depth": bucket.waiting,
+                "throttled": bucket.throttled,
+            }
+            for service, bucket in self.buckets.items()
+        }
+
+    def log_stats(self):
+        for service, stats in self.stats().items():
+            logger.info(
+                f"Rate limit {service}: {stats['rate']}/{stats['configured_rate']} "
+                f"requests/sec, {stats['queue_depth']} waiting, "
+                f"{stats['throttled']} throttled"
+            )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header, if it has a usable one."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Transport adapter that waits for a token before each request and retries
+    requests answered with 429 once the server's Retry-After has passed.
+
+    Failed requests are counted per service and status in the upstream error
+    metric, whether or not the service is rate limited, and every request is
+    recorded as a span of the current item's trace.
+
+    Given an existing adapter, requests are sent through it instead, so a
+    library's own adapter settings (e.g. its SSL options) are kept.
+    """
+
+    def __init__(
+        self, rate_limiter: RateLimiter = None, adapter: HTTPAdapter = None, **kwargs
+    ):
+        self.rate_limiter = rate_limiter
+        self.adapter = adapter
+        super().__init__(**kwargs)
+
+    def close(self):
+        if self.adapter:
+            self.adapter.close()
+        super().close()
+
+    def send(self, request, **kwargs):
+        service = self._service(request.url)
+        span = TRACER.span(
+            "http",
+            service=service,
+            method=request.method,
+            path=urlsplit(request.url).path,
+        )
+        with span as http_span:
+            try:
+                response = self._send(request, **kwargs)
+            except Exception:
+                UPSTREAM_ERRORS.inc(service=service, status="connection_error")
+                raise
+            http_span.outcome = response.status_code
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc(service=service, status=str(response.status_code))
+        return response
+
+    def _service(self, url: str) -> str:
+        host = urlsplit(url).hostname or ""
+        hosts = self.rate_limiter.hosts if self.rate_limiter else DEFAULT_HOSTS
+        return hosts.get(host, host)
+
+    def _transmit(self, request, **kwargs):
+        if self.adapter:
+            return self.adapter.send(request, **kwargs)
+        return super().send(request, **kwargs)
+
+    def _send(self, request, **kwargs):
+        bucket = (
+            self.rate_limiter.bucket_for(request.url) if self.rate_limiter else None
+        )
+        if bucket is None:
+            return self._transmit(request, **kwargs)
+
+        attempt = 0
+        while True:
+            bucket.acquire()
+            response = self._transmit(request, **kwargs)
+            if response.status_code != 429:
+                bucket.succeed()
+                return response
+
+            delay = bucket.throttle(
+                parse_retry_after(response.headers.get("Retry-After"))
+            )
+            if attempt >= self.rate_limiter.max_retries:
+                return response
+            attempt += 1
+            logger.warning(
+                f"Rate limited by {urlsplit(request.url).hostname}, "
+                f"retrying in {delay:.1f}s"
+            )
+            response.close()
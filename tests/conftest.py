@@ -0,0 +1,9 @@
+import pytest
+from state.state_store import StateStore
+
+
+@pytest.fixture
+def state_store(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    yield store
+    store.close()
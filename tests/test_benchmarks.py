@@ -0,0 +1,50 @@
+import os
+from unittest.mock import MagicMock
+
+from benchmarks.parse_titles import DEFAULT_CORPUS, legacy_parse_stream, load_streams
+from benchmarks.run_benchmarks import compare, run_once
+from benchmarks.stub_servers import StubSettings
+from indexer.torrentio import Torrentio
+
+
+def test_run_once_drives_the_pipeline_against_stubs():
+    cwd = os.getcwd()
+
+    result = run_once(5, StubSettings(streams=3), workers=2)
+
+    assert os.getcwd() == cwd
+    assert result["items"] == 5
+    # Trakt, Torrentio, availability, add, select and info for every item
+    assert result["requests"] == 5 * 6
+    assert result["items_per_sec"] > 0
+    assert result["peak_rss_mb"] > 0
+
+
+def test_compare_flags_regressions():
+    baseline = {"100": {"items_per_sec": 10, "requests": 600, "peak_rss_mb": 50}}
+
+    assert (
+        compare(
+            {"100": {"items_per_sec": 9, "requests": 600, "peak_rss_mb": 55}},
+            baseline,
+            0.2,
+        )
+        == []
+    )
+    assert (
+        len(
+            compare(
+                {"100": {"items_per_sec": 7, "requests": 800, "peak_rss_mb": 50}},
+                baseline,
+                0.2,
+            )
+        )
+        == 2
+    )
+
+
+def test_title_parser_matches_the_legacy_parser_on_the_corpus():
+    parse_stream = Torrentio(http_client=MagicMock())._parse_stream
+
+    for stream in load_streams(DEFAULT_CORPUS):
+        assert parse_stream(stream) == legacy_parse_stream(stream)
@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock
+
+import pytest
+from models.release import Release
+from ranking.cached_policy import CachedReleasePolicy
+
+
+@pytest.fixture
+def releases():
+    return [
+        Release(title="Uncached", infoHash="AAAA", size_in_gb=1, peers=1, rank=500),
+        Release(title="Cached", infoHash="BBBB", size_in_gb=1, peers=1, rank=100),
+    ]
+
+
+@pytest.fixture
+def real_debrid():
+    mock = MagicMock()
+    mock.get_instant_availability.return_value = {"aaaa": False, "bbbb": True}
+    return mock
+
+
+def test_ignore_skips_lookup(releases, real_debrid):
+    result = CachedReleasePolicy("ignore").apply(releases, real_debrid)
+
+    assert result == releases
+    real_debrid.get_instant_availability.assert_not_called()
+
+
+def test_prefer_boosts_cached(releases, real_debrid):
+    result = CachedReleasePolicy("prefer", boost=1000).apply(releases, real_debrid)
+
+    assert [r.rank for r in result] == [500, 1100]
+
+
+def test_require_drops_uncached(releases, real_debrid):
+    result = CachedReleasePolicy("require").apply(releases, real_debrid)
+
+    assert [r.title for r in result] == ["Cached"]
+
+
+def test_lookup_errors_keep_releases(releases, real_debrid):
+    real_debrid.get_instant_availability.side_effect = Exception("API Error")
+
+    result = CachedReleasePolicy("require").apply(releases, real_debrid)
+
+    assert result == releases
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        CachedReleasePolicy("always")
@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from transport.http_client import HttpClient, configure_shared_client, shared_client
+
+
+@pytest.fixture
+def http_client():
+    client = HttpClient(
+        pool_maxsize=4, timeout=30, timeouts={"api.real-debrid.com": 15}
+    )
+    with patch.object(client.session, "request") as mock_request:
+        mock_request.return_value = MagicMock()
+        yield client
+
+
+def test_session_requests_gzip(http_client):
+    assert "gzip" in http_client.session.headers["Accept-Encoding"]
+
+
+def test_pool_size_is_configured(http_client):
+    assert http_client.adapter._pool_maxsize == 4
+
+
+def test_per_host_timeout(http_client):
+    http_client.get("https://api.real-debrid.com/rest/1.0/torrents")
+    http_client.session.request.assert_called_once_with(
+        "GET", "https://api.real-debrid.com/rest/1.0/torrents", timeout=15
+    )
+
+
+def test_default_timeout(http_client):
+    http_client.post("https://torrentio.strem.fun/stream", data={"a": 1})
+    http_client.session.request.assert_called_once_with(
+        "POST", "https://torrentio.strem.fun/stream", data={"a": 1}, timeout=30
+    )
+
+
+def test_explicit_timeout_wins(http_client):
+    http_client.get("https://api.real-debrid.com/rest/1.0/torrents", timeout=1)
+    http_client.session.request.assert_called_once_with(
+        "GET", "https://api.real-debrid.com/rest/1.0/torrents", timeout=1
+    )
+
+
+def test_stats_reports_reuse():
+    client = HttpClient()
+    pool = client.adapter.poolmanager.connection_from_url("https://example.com")
+    pool.num_requests = 5
+    pool.num_connections = 1
+
+    assert client.stats() == {
+        "example.com": {"requests": 5, "connections": 1, "reused": 4}
+    }
+
+
+def test_shared_client_is_shared():
+    assert shared_client() is shared_client()
+    configured = configure_shared_client({"pool_maxsize": 2})
+    assert shared_client() is configured
+    assert configured.adapter._pool_maxsize == 2
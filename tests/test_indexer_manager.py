@@ -1,3 +1,5 @@
+import threading
+import time
 import unittest
 from unittest.mock import Mock
 from src.indexer.indexer_manager import IndexerManager, Indexer
@@ -49,6 +51,108 @@ class TestIndexerManager(unittest.TestCase):
                 "non_existent_indexer", "tt1234567", "movie", "Test Movie"
             )
 
+    def test_find_releases_all_merges_and_dedupes(self):
+        first = Mock(spec=Indexer)
+        first.find_releases.return_value = [
+            Release(title="Release A", infoHash="AAAA", size_in_gb=1.0, peers=1),
+            Release(title="Release B", infoHash="bbbb", size_in_gb=2.0, peers=2),
+        ]
+        second = Mock(spec=Indexer)
+        second.find_releases.return_value = [
+            Release(title="Release A dup", infoHash="aaaa", size_in_gb=1.0, peers=1),
+            Release(title="Release C", infoHash="cccc", size_in_gb=3.0, peers=3),
+        ]
+        self.manager.add_indexer("first", first)
+        self.manager.add_indexer("second", second)
+
+        results = self.manager.find_releases_all("tt1234567", "movie", "Test Movie")
+
+        self.assertEqual(
+            [r.title for r in results], ["Release A", "Release B", "Release C"]
+        )
+        second.find_releases.assert_called_once_with("tt1234567", "movie", "Test Movie")
+
+    def test_find_releases_all_drops_late_indexers(self):
+        release_slow = threading.Event()
+        slow = Mock(spec=Indexer)
+        slow.find_releases.side_effect = lambda *args: release_slow.wait(5) or [
+            Release(title="Slow", infoHash="slow", size_in_gb=1.0, peers=1)
+        ]
+        fast = Mock(spec=Indexer)
+        fast.find_releases.return_value = [
+            Release(title="Fast", infoHash="fast", size_in_gb=1.0, peers=1)
+        ]
+        self.manager.add_indexer("slow", slow, timeout=0.1)
+        self.manager.add_indexer("fast", fast, timeout=1)
+
+        started = time.monotonic()
+        results = self.manager.find_releases_all("tt1234567", "movie", "Test Movie")
+        release_slow.set()
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual([r.title for r in results], ["Fast"])
+
+    def test_find_releases_all_skips_failing_indexer(self):
+        broken = Mock(spec=Indexer)
+        broken.find_releases.side_effect = Exception("boom")
+        working = Mock(spec=Indexer)
+        working.find_releases.return_value = [
+            Release(title="Working", infoHash="1234", size_in_gb=1.0, peers=1)
+        ]
+        self.manager.add_indexer("broken", broken)
+        self.manager.add_indexer("working", working)
+
+        results = self.manager.find_releases_all("tt1234567", "movie", "Test Movie")
+
+        self.assertEqual([r.title for r in results], ["Working"])
+
+    def test_find_releases_all_deadline_starts_when_call_starts(self):
+        manager = IndexerManager(max_workers=1)
+        busy = threading.Event()
+        blocker = Mock(spec=Indexer)
+        blocker.find_releases.side_effect = lambda *args: busy.wait(5) and []
+        manager.add_indexer("blocker", blocker, timeout=0.05)
+        first = threading.Thread(
+            target=manager.find_releases_all, args=("tt1", "movie", "Blocked")
+        )
+        first.start()
+        time.sleep(0.1)
+
+        queued = Mock(spec=Indexer)
+        queued.find_releases.side_effect = lambda *args: time.sleep(0.15) or [
+            Release(title="Queued", infoHash="abcd", size_in_gb=1.0, peers=1)
+        ]
+        manager.indexers = {"queued": queued}
+        manager.timeouts = {"queued": 0.2}
+        threading.Timer(0.1, busy.set).start()
+
+        results = manager.find_releases_all("tt2", "movie", "Queued")
+        first.join()
+        manager.shutdown()
+
+        self.assertEqual([r.title for r in results], ["Queued"])
+
+    def test_find_releases_all_cancels_calls_still_queued(self):
+        manager = IndexerManager(max_workers=1)
+        busy = threading.Event()
+        blocker = Mock(spec=Indexer)
+        blocker.find_releases.side_effect = lambda *args: busy.wait(5) and []
+        manager.add_indexer("blocker", blocker, timeout=0.05)
+        manager.find_releases_all("tt1", "movie", "Blocked")
+
+        queued = Mock(spec=Indexer)
+        manager.indexers = {"queued": queued}
+        manager.timeouts = {"queued": 0.05}
+        results = manager.find_releases_all("tt2", "movie", "Queued")
+        busy.set()
+        manager.shutdown()
+
+        self.assertEqual(results, [])
+        queued.find_releases.assert_not_called()
+
+    def tearDown(self):
+        self.manager.shutdown()
+
 
 if __name__ == "__main__":
     unittest.main()
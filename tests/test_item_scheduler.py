@@ -0,0 +1,263 @@
+import time
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+
+import pytest
+from models.movie import MediaType, Movie
+from scheduling.item_scheduler import (
+    MIN_SCAN_GAP,
+    SCAN_REQUEST_POLL,
+    ItemScheduler,
+    RetryPolicy,
+)
+from state.state_store import ItemOutcome, ItemState
+
+NOW = datetime(2026, 6, 1, 12).timestamp()
+TODAY = date(2026, 6, 1)
+
+
+def make_movie(i):
+    return Movie(
+        title=f"Movie {i}",
+        year="2023",
+        imdb_id=f"tt{i:07d}",
+        media_type=MediaType.MOVIE,
+    )
+
+
+def make_state(outcome, attempts=1, last_attempt=NOW):
+    return ItemState(
+        "tt0000001", "Movie 1", "MOVIE", outcome, None, attempts, 0, last_attempt, None
+    )
+
+
+class InlineExecutor:
+    """Runs submitted items straight away, or leaves them running."""
+
+    def __init__(self, finish=True):
+        self.finish = finish
+        self.submitted = []
+
+    def submit(self, fn, item):
+        self.submitted.append(item.imdb_id)
+        future = Future()
+        if self.finish:
+            future.set_result(fn(item))
+        return future
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def test_new_and_added_items():
+    policy = RetryPolicy(interval=3600)
+
+    assert policy.next_check(None, None, NOW) == NOW
+    assert policy.next_check(make_state(ItemOutcome.ADDED), None, NOW) is None
+    assert policy.next_check(make_state(ItemOutcome.DRY_RUN), None, NOW) == NOW
+    assert (
+        RetryPolicy(dry_run=True).next_check(make_state(ItemOutcome.DRY_RUN), None, NOW)
+        is None
+    )
+
+
+def test_unreleased_items_wait_for_their_release_date():
+    policy = RetryPolicy(interval=3600)
+    state = make_state(ItemOutcome.NOT_RELEASED)
+    release_date = TODAY + timedelta(days=3)
+
+    assert policy.next_check(state, release_date, NOW) == (
+        datetime(2026, 6, 4).timestamp()
+    )
+    assert policy.next_check(state, None, NOW) == NOW + 3600
+
+
+@pytest.mark.parametrize(
+    "attempts, delay", [(1, 3600), (2, 7200), (3, 14400), (10, 86400)]
+)
+def test_items_that_find_nothing_back_off(attempts, delay):
+    policy = RetryPolicy(interval=3600, max_backoff=86400)
+    state = make_state(ItemOutcome.NO_RELEASES, attempts=attempts)
+
+    assert policy.next_check(state, date(2020, 1, 1), NOW) == NOW + delay
+    # Recent releases get new torrents quickly, so they are not backed off
+    assert policy.next_check(state, TODAY - timedelta(days=3), NOW) == NOW + 3600
+
+
+def test_due_items_are_spread_over_the_interval(state_store):
+    clock = Clock()
+    processed = []
+
+    def process(item):
+        processed.append(item)
+        state_store.record_attempt(item, ItemOutcome.NO_RELEASES)
+
+    scheduler = ItemScheduler(
+        scan=lambda: [make_movie(i) for i in range(4)],
+        process=process,
+        state_store=state_store,
+        policy=RetryPolicy(interval=100),
+        clock=clock,
+    )
+    executor = InlineExecutor()
+
+    assert scheduler.tick(executor) == clock.now + 25
+    assert processed == [make_movie(0)]
+    assert sorted(scheduler.pending().values()) == [
+        clock.now + 25,
+        clock.now + 50,
+        clock.now + 75,
+    ]
+
+    clock.now += 50
+    # One worker, so one item per tick
+    scheduler.tick(executor)
+    scheduler.tick(executor)
+    assert processed == [make_movie(i) for i in range(3)]
+
+
+def test_finished_items_are_rescheduled_from_their_outcome(state_store):
+    clock = Clock()
+
+    def process(item):
+        state_store.record_attempt(item, ItemOutcome.NO_RELEASES)
+
+    scheduler = ItemScheduler(
+        scan=lambda: [make_movie(1)],
+        process=process,
+        state_store=state_store,
+        policy=RetryPolicy(interval=100),
+        clock=clock,
+    )
+    executor = InlineExecutor()
+
+    scheduler.tick(executor)
+    scheduler.tick(executor)
+
+    last_attempt = state_store.get("tt0000001").last_attempt
+    assert scheduler.pending() == {"tt0000001": last_attempt + 100}
+    assert executor.submitted == ["tt0000001"]
+
+
+def test_items_in_flight_are_not_started_again(state_store):
+    clock = Clock()
+    scheduler = ItemScheduler(
+        scan=lambda: [make_movie(1)],
+        process=lambda item: None,
+        state_store=state_store,
+        policy=RetryPolicy(interval=100),
+        max_workers=2,
+        clock=clock,
+    )
+    executor = InlineExecutor(finish=False)
+
+    scheduler.tick(executor)
+    clock.now += 100
+    scheduler.tick(executor)
+
+    assert executor.submitted == ["tt0000001"]
+    assert scheduler.pending() == {}
+
+
+def test_items_that_leave_the_watchlists_are_dropped(state_store):
+    clock = Clock()
+    watchlist = [make_movie(1), make_movie(2)]
+    scheduler = ItemScheduler(
+        scan=lambda: list(watchlist),
+        process=lambda item: None,
+        state_store=state_store,
+        policy=RetryPolicy(interval=100),
+        clock=clock,
+    )
+    executor = InlineExecutor()
+
+    scheduler.tick(executor)
+    watchlist.pop()
+    clock.now += 100
+    scheduler.tick(executor)
+
+    assert executor.submitted == ["tt0000001"]
+    assert list(scheduler.pending()) == ["tt0000001"]
+
+
+def test_pushed_items_are_processed_before_the_next_scan(state_store):
+    clock = Clock()
+    scans = []
+    scheduler = ItemScheduler(
+        scan=lambda: scans.append(clock.now) or [],
+        process=lambda item: state_store.record_attempt(item, ItemOutcome.ADDED),
+        state_store=state_store,
+        policy=RetryPolicy(interval=100),
+        clock=clock,
+    )
+    executor = InlineExecutor()
+    scheduler.tick(executor)
+
+    scheduler.push(make_movie(1))
+    clock.now += 1
+    scheduler.tick(executor)
+    # Added items are not processed again when pushed twice
+    scheduler.push(make_movie(1))
+    scheduler.tick(executor)
+    scheduler.tick(executor)
+
+    assert executor.submitted == ["tt0000001"]
+    assert len(scans) == 1
+
+
+def test_requested_scans_keep_a_minimum_gap(state_store):
+    clock = Clock()
+    scans = []
+    scheduler = ItemScheduler(
+        scan=lambda: scans.append(clock.now) or [],
+        process=lambda item: None,
+        state_store=state_store,
+        policy=RetryPolicy(interval=3600),
+        clock=clock,
+    )
+    executor = InlineExecutor()
+    start = clock.now
+    scheduler.tick(executor)
+
+    scheduler.request_scan()
+    assert scheduler.tick(executor) == start + MIN_SCAN_GAP
+    clock.now += MIN_SCAN_GAP
+    scheduler.tick(executor)
+
+    assert scans == [start, start + MIN_SCAN_GAP]
+
+
+def test_scan_requests_reach_schedulers_sharing_the_store(state_store):
+    clock = Clock()
+    scans = {"first": [], "second": []}
+
+    def make_scheduler(name):
+        return ItemScheduler(
+            scan=lambda: scans[name].append(clock.now) or [],
+            process=lambda item: None,
+            state_store=state_store,
+            policy=RetryPolicy(interval=3600),
+            shared_scan_requests=True,
+            clock=clock,
+        )
+
+    first, second = make_scheduler("first"), make_scheduler("second")
+    executor = InlineExecutor()
+    start = clock.now
+    first.tick(executor)
+    # Schedulers sharing requests check for them every few seconds
+    assert second.tick(executor) == start + SCAN_REQUEST_POLL
+
+    first.request_scan()
+    clock.now += MIN_SCAN_GAP
+    second.tick(executor)
+    second.tick(executor)
+    first.tick(executor)
+
+    assert scans["first"] == [start, start + MIN_SCAN_GAP]
+    assert scans["second"] == [start, start + MIN_SCAN_GAP]
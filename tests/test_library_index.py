@@ -0,0 +1,105 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from debrid.library_index import RealDebridLibrary
+from models.movie import MediaType, Movie
+from state.state_store import ItemOutcome
+
+
+@pytest.fixture
+def real_debrid():
+    return MagicMock()
+
+
+def torrent(i):
+    return {"hash": f"HASH{i}", "id": f"id{i}", "status": "downloaded"}
+
+
+def test_first_refresh_is_full_sync(real_debrid, state_store):
+    real_debrid.iter_user_torrents.return_value = iter([torrent(2), torrent(1)])
+    library = RealDebridLibrary(real_debrid, state_store)
+
+    library.refresh()
+
+    assert library.contains("hash1")
+    assert library.contains("HASH2")
+    assert not library.contains("hash3")
+
+
+def test_incremental_refresh_stops_at_first_known(real_debrid, state_store):
+    real_debrid.iter_user_torrents.return_value = iter([torrent(1)])
+    library = RealDebridLibrary(real_debrid, state_store)
+    library.refresh()
+
+    newest_first = [torrent(3), torrent(2), torrent(1), torrent(0)]
+    consumed = []
+
+    def pages(**kwargs):
+        for t in newest_first:
+            consumed.append(t["id"])
+            yield t
+
+    real_debrid.iter_user_torrents.side_effect = pages
+    library.refresh()
+
+    assert consumed == ["id3", "id2", "id1"]
+    assert library.contains("hash3")
+    assert not library.contains("hash0")
+
+
+def test_collection_matches_recorded_hashes(real_debrid, state_store):
+    real_debrid.iter_user_torrents.return_value = iter([torrent(1)])
+    movie = Movie(title="Movie", year="2023", imdb_id="tt1", media_type=MediaType.MOVIE)
+    other = Movie(title="Other", year="2023", imdb_id="tt2", media_type=MediaType.MOVIE)
+    state_store.record_attempt(movie, ItemOutcome.FAILED, info_hash="hash1")
+    state_store.record_attempt(other, ItemOutcome.FAILED, info_hash="hash2")
+
+    collection = RealDebridLibrary(real_debrid, state_store).get_user_collection()
+
+    assert [item["imdb_id"] for item in collection] == ["tt1"]
+
+
+def test_own_adds_do_not_hide_torrents_added_by_hand(real_debrid, state_store):
+    real_debrid.iter_user_torrents.return_value = iter([torrent(1)])
+    library = RealDebridLibrary(real_debrid, state_store)
+    library.refresh()
+    library.add("HASH5", "id5", "queued")
+
+    real_debrid.iter_user_torrents.return_value = iter(
+        [torrent(5), torrent(4), torrent(1), torrent(0)]
+    )
+    library.refresh()
+
+    assert library.contains("hash4")
+    assert not library.contains("hash0")
+
+
+def test_missing_mark_resyncs_whole_account(real_debrid, state_store):
+    real_debrid.iter_user_torrents.return_value = iter([torrent(2), torrent(1)])
+    library = RealDebridLibrary(real_debrid, state_store)
+    library.refresh()
+
+    real_debrid.iter_user_torrents.return_value = iter([torrent(3), torrent(1)])
+    library.refresh()
+
+    assert library.contains("hash3")
+    assert library.contains("hash1")
+    assert not library.contains("hash2")
+
+
+def test_syncs_table_without_mark_is_migrated(real_debrid, state_store):
+    state_store.execute(
+        "CREATE TABLE real_debrid_syncs "
+        "(name TEXT PRIMARY KEY, synced_at REAL NOT NULL) WITHOUT ROWID"
+    )
+    state_store.execute(
+        "INSERT INTO real_debrid_syncs VALUES ('full', ?)", (time.time(),)
+    )
+    real_debrid.iter_user_torrents.return_value = iter([torrent(2), torrent(1)])
+    library = RealDebridLibrary(real_debrid, state_store)
+
+    library.refresh()
+
+    assert library.contains("hash2")
+    assert library.contains("hash1")
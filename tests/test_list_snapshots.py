@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from content.list_snapshots import ListSnapshotStore
+from content.trakt_provider import TraktProvider
+from models.movie import MediaType, Movie
+
+
+@pytest.fixture
+def snapshots(state_store):
+    return ListSnapshotStore(state_store)
+
+
+@pytest.fixture
+def mock_trakt():
+    with patch("content.trakt_provider.trakt.Trakt") as mock:
+        yield mock
+
+
+@pytest.fixture
+def provider(mock_trakt, snapshots):
+    provider = TraktProvider("test_id", "test_secret", list_snapshots=snapshots)
+    provider.authorization = {"access_token": "token"}
+    provider.activities_ttl = 0
+    return provider
+
+
+def make_item(title, imdb_id):
+    item = MagicMock(title=title, year=2023)
+    item.get_key.return_value = imdb_id
+    return item
+
+
+def test_snapshot_roundtrip(snapshots):
+    movies = [
+        Movie(title="Movie", year="2023", imdb_id="tt1", media_type=MediaType.MOVIE)
+    ]
+    snapshots.save("watchlist", "2023-01-01T00:00:00Z", movies)
+
+    assert snapshots.get("watchlist", "2023-01-01T00:00:00Z") == movies
+    assert snapshots.get("watchlist", "2023-02-01T00:00:00Z") is None
+
+
+def test_watchlist_downloaded_only_when_changed(provider, mock_trakt):
+    mock_trakt["sync"].last_activities.return_value = {
+        "watchlist": {"updated_at": "2023-01-01T00:00:00.000Z"}
+    }
+    watchlist_api = mock_trakt["users/me/watchlist"]
+    watchlist_api.get.return_value = [make_item("Movie", "tt1")]
+
+    with patch.object(provider, "_get_media_type", return_value=MediaType.MOVIE):
+        first = provider.get_watchlist()
+        second = provider.get_watchlist()
+
+        mock_trakt["sync"].last_activities.return_value = {
+            "watchlist": {"updated_at": "2023-02-01T00:00:00.000Z"}
+        }
+        watchlist_api.get.return_value = [
+            make_item("Movie", "tt1"),
+            make_item("Other", "tt2"),
+        ]
+        third = provider.get_watchlist()
+
+    assert first == second
+    assert [movie.imdb_id for movie in third] == ["tt1", "tt2"]
+    assert watchlist_api.get.call_count == 2
+
+
+def test_public_list_items_fetched_only_when_changed(provider, mock_trakt):
+    summary = mock_trakt["users/user1/list-id-1"].get.return_value
+    summary.updated_at = "2023-01-01 00:00:00+00:00"
+    summary.items.return_value = [make_item("Movie", "tt1")]
+
+    with patch.object(provider, "_get_media_type", return_value=MediaType.MOVIE):
+        first = provider.get_user_list("user1/list-id-1")
+        second = provider.get_user_list("user1/list-id-1")
+
+    assert first == second
+    assert summary.items.call_count == 1
+
+
+def test_failed_activities_fall_back_to_full_sync(provider, mock_trakt):
+    mock_trakt["sync"].last_activities.side_effect = Exception("API Error")
+    watchlist_api = mock_trakt["users/me/watchlist"]
+    watchlist_api.get.return_value = [make_item("Movie", "tt1")]
+
+    with patch.object(provider, "_get_media_type", return_value=MediaType.MOVIE):
+        provider.get_watchlist()
+        provider.get_watchlist()
+
+    assert watchlist_api.get.call_count == 2
@@ -0,0 +1,276 @@
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import main
+from models.movie import MediaType, Movie
+from models.release import Release
+from monitoring import metrics
+from monitoring.tracing import Tracer
+from ranking.prefilter import ReleasePrefilter
+from RTN import SettingsModel
+from state.state_store import ItemOutcome
+from transport.concurrency import ConcurrencyLimits
+
+
+def make_movie(i):
+    return Movie(
+        title=f"Movie {i}",
+        year="2023",
+        imdb_id=f"tt{i:07d}",
+        media_type=MediaType.MOVIE,
+    )
+
+
+@pytest.fixture
+def pipeline(state_store):
+    content_manager = MagicMock()
+    content_manager.get_all_watchlists.return_value = [make_movie(i) for i in range(20)]
+    collection_manager = MagicMock()
+    collection_manager.get_user_collections.return_value = {
+        "Plex": [{"imdb_id": make_movie(0).imdb_id}]
+    }
+    return {
+        "content_manager": content_manager,
+        "collection_manager": collection_manager,
+        "indexer_manager": MagicMock(),
+        "real_debrid": MagicMock(),
+        "dry_run": True,
+        "trakt": MagicMock(),
+        "ranker": MagicMock(),
+        "state_store": state_store,
+    }
+
+
+def test_process_all_watchlists_runs_items_concurrently(pipeline):
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(4, timeout=5)
+
+    def fake_process(item, *args):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        if item.imdb_id <= make_movie(4).imdb_id:
+            barrier.wait()
+        with lock:
+            in_flight -= 1
+
+    with patch.object(main, "process_watchlist_item", side_effect=fake_process) as p:
+        main.process_all_watchlists(**pipeline, max_workers=4)
+
+    assert p.call_count == 19
+    assert peak == 4
+
+
+def test_process_all_watchlists_survives_item_errors(pipeline):
+    with patch.object(
+        main, "process_watchlist_item", side_effect=Exception("boom")
+    ) as p:
+        main.process_all_watchlists(**pipeline, max_workers=2)
+
+    assert p.call_count == 19
+    assert pipeline["state_store"].get(make_movie(1).imdb_id).outcome == (
+        ItemOutcome.FAILED
+    )
+
+
+def test_process_all_watchlists_skips_owned_and_duplicate_items(pipeline):
+    duplicate = Movie(
+        title="Movie 5 (Director's Cut)",
+        year="2023",
+        imdb_id=make_movie(5).imdb_id,
+        media_type=MediaType.MOVIE,
+    )
+    pipeline["content_manager"].get_all_watchlists.return_value = [
+        make_movie(i) for i in range(6)
+    ] + [duplicate]
+    pipeline["collection_manager"].get_user_collections.return_value = {
+        "Plex": [{"imdb_id": make_movie(0).imdb_id}],
+        "Trakt": [{"imdb_id": make_movie(1).imdb_id}],
+    }
+    pipeline["state_store"].record_attempt(make_movie(2), ItemOutcome.ADDED)
+    pipeline["state_store"].record_attempt(make_movie(3), ItemOutcome.NO_RELEASES)
+
+    with patch.object(main, "process_watchlist_item") as p:
+        main.process_all_watchlists(**pipeline)
+
+    processed = sorted(call.args[0].imdb_id for call in p.call_args_list)
+    assert processed == [make_movie(i).imdb_id for i in (3, 4, 5)]
+
+
+def test_concurrency_limits_cap_service_calls():
+    limits = ConcurrencyLimits({"trakt": 1})
+    with limits.slot("trakt"):
+        assert not limits._semaphores["trakt"].acquire(blocking=False)
+    with limits.slot("real_debrid"):
+        pass
+
+
+def test_process_watchlist_item_records_outcome(pipeline):
+    pipeline["trakt"].check_released.return_value = False
+    item = make_movie(1)
+
+    outcome = main.process_watchlist_item(
+        item,
+        pipeline["indexer_manager"],
+        pipeline["real_debrid"],
+        pipeline["dry_run"],
+        pipeline["trakt"],
+        pipeline["ranker"],
+        pipeline["state_store"],
+    )
+
+    assert outcome == ItemOutcome.NOT_RELEASED
+    assert pipeline["state_store"].get(item.imdb_id).outcome == outcome
+    pipeline["indexer_manager"].find_releases_all.assert_not_called()
+    pipeline["ranker"].flush.assert_called_once()
+
+
+def test_prefilter_rejects_releases_before_parsing(pipeline):
+    pipeline["trakt"].check_released.return_value = True
+    pipeline["indexer_manager"].find_releases_all.return_value = [
+        Release(
+            title="Movie.1.2023.HDCAM.x264", infoHash="a" * 40, size_in_gb=1, peers=1
+        ),
+        Release(
+            title="Movie.1.2023.720p.x264", infoHash="b" * 40, size_in_gb=1, peers=1
+        ),
+    ]
+    pipeline["ranker"].parsed_title.return_value = "Movie 1"
+    pipeline["ranker"].rank.return_value = (False, 0)
+
+    main.process_watchlist_item(
+        make_movie(1),
+        pipeline["indexer_manager"],
+        pipeline["real_debrid"],
+        pipeline["dry_run"],
+        pipeline["trakt"],
+        pipeline["ranker"],
+        pipeline["state_store"],
+        prefilter=ReleasePrefilter.from_settings(SettingsModel(exclude=["720p"])),
+    )
+
+    pipeline["ranker"].parsed_title.assert_not_called()
+
+
+def test_only_releases_that_can_beat_the_best_are_ranked(pipeline):
+    ranks = {"a" * 40: 300, "b" * 40: 150, "c" * 40: 100}
+    pipeline["trakt"].check_released.return_value = True
+    pipeline["indexer_manager"].find_releases_all.return_value = [
+        Release(title=f"Movie.1.2023.{h[0]}", infoHash=h, size_in_gb=1, peers=1)
+        for h in ranks
+    ]
+    ranker = pipeline["ranker"]
+    ranker.parsed_title.return_value = "Movie 1 (2023)"
+    ranker.upper_bound.side_effect = lambda title, info_hash: ranks[info_hash] + 50
+    ranker.rank.side_effect = lambda title, info_hash: (True, ranks[info_hash])
+
+    outcome = main.process_watchlist_item(
+        make_movie(1),
+        pipeline["indexer_manager"],
+        pipeline["real_debrid"],
+        pipeline["dry_run"],
+        pipeline["trakt"],
+        ranker,
+        pipeline["state_store"],
+    )
+
+    assert outcome == ItemOutcome.DRY_RUN
+    assert pipeline["state_store"].get("tt0000001").info_hash == "a" * 40
+    ranker.rank.assert_called_once_with("Movie.1.2023.a", "a" * 40)
+
+
+def test_add_torrent_skips_hashes_already_in_real_debrid():
+    release = MagicMock(infoHash="abcd")
+    real_debrid = MagicMock()
+    debrid_library = MagicMock()
+    debrid_library.contains.return_value = True
+
+    assert main.add_torrent_to_real_debrid(release, real_debrid, False, debrid_library)
+    real_debrid.add_torrent.assert_not_called()
+
+
+def test_add_torrent_records_added_hash():
+    release = MagicMock(infoHash="abcd")
+    real_debrid = MagicMock()
+    real_debrid.add_torrent.return_value = {"id": "id1"}
+    real_debrid.get_torrent_info.return_value = {"status": "queued"}
+    debrid_library = MagicMock()
+    debrid_library.contains.return_value = False
+
+    assert main.add_torrent_to_real_debrid(release, real_debrid, False, debrid_library)
+    debrid_library.add.assert_called_once_with("abcd", "id1", "queued")
+
+
+def test_indexer_pool_covers_concurrent_lookups():
+    config = {
+        "indexers": {"torrentio": {"enabled": True}},
+        "watchlist": {"max_workers": 8, "concurrency": {"indexers": 3}},
+    }
+
+    indexer_manager = main.initialize_indexers(config, http_client=MagicMock())
+
+    assert indexer_manager.max_workers == 3
+
+
+def test_process_watchlist_item_times_stages(pipeline):
+    pipeline["trakt"].check_released.return_value = True
+    pipeline["indexer_manager"].find_releases_all.return_value = []
+    before = metrics.STAGE_SECONDS.count(stage="indexer_search")
+
+    main.process_watchlist_item(
+        make_movie(1),
+        pipeline["indexer_manager"],
+        pipeline["real_debrid"],
+        pipeline["dry_run"],
+        pipeline["trakt"],
+        pipeline["ranker"],
+        pipeline["state_store"],
+    )
+
+    assert metrics.STAGE_SECONDS.count(stage="indexer_search") == before + 1
+
+
+def test_process_watchlist_item_writes_a_trace(pipeline, tmp_path):
+    tracer = Tracer()
+    tracer.configure(path=str(tmp_path / "traces.jsonl"))
+    pipeline["trakt"].check_released.return_value = True
+    pipeline["indexer_manager"].find_releases_all.return_value = []
+
+    with patch("main.tracing.TRACER", tracer):
+        main.process_watchlist_item(
+            make_movie(1),
+            pipeline["indexer_manager"],
+            pipeline["real_debrid"],
+            pipeline["dry_run"],
+            pipeline["trakt"],
+            pipeline["ranker"],
+            pipeline["state_store"],
+        )
+    tracer.close()
+
+    spans = [
+        json.loads(line)
+        for line in (tmp_path / "traces.jsonl").read_text().splitlines()
+    ]
+    assert [(span["name"], span["outcome"]) for span in spans] == [
+        ("item", "no_releases"),
+        ("check_released", "ok"),
+        ("indexer_search", "ok"),
+    ]
+
+
+def test_profile_flag_is_off_by_default():
+    assert main.parse_args([]).profile is False
+    assert main.parse_args(["--profile"]).profile is True
+
+
+def test_workers_flag_selects_the_process_count():
+    assert main.parse_args([]).workers is None
+    assert main.parse_args(["--workers", "4"]).workers == 4
+    assert main.parse_args(["--shard", "1/4"]).shard == (1, 4)
@@ -0,0 +1,110 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from monitoring import metrics
+from monitoring.metrics import MetricsRegistry, MetricsServer
+from requests.adapters import HTTPAdapter
+from transport.rate_limiter import RateLimitedAdapter
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_counter_renders_labels(registry):
+    errors = registry.counter("errors_total", "Errors.", ["service", "status"])
+    errors.inc(service="trakt", status="503")
+    errors.inc(2, service="trakt", status="503")
+
+    assert errors.value(service="trakt", status="503") == 3
+    assert registry.render().splitlines() == [
+        "# HELP errors_total Errors.",
+        "# TYPE errors_total counter",
+        'errors_total{service="trakt",status="503"} 3',
+    ]
+
+
+def test_counter_rejects_wrong_labels(registry):
+    errors = registry.counter("errors_total", "Errors.", ["service"])
+    with pytest.raises(ValueError):
+        errors.inc(host="trakt")
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    stage = registry.histogram("stage_seconds", "Stages.", ["stage"], buckets=(1, 5))
+    stage.observe(0.5, stage="ranking")
+    stage.observe(3, stage="ranking")
+    stage.observe(10, stage="ranking")
+
+    assert registry.render().splitlines()[2:] == [
+        'stage_seconds_bucket{stage="ranking",le="1"} 1',
+        'stage_seconds_bucket{stage="ranking",le="5"} 2',
+        'stage_seconds_bucket{stage="ranking",le="+Inf"} 3',
+        'stage_seconds_sum{stage="ranking"} 13.5',
+        'stage_seconds_count{stage="ranking"} 3',
+    ]
+
+
+def test_histogram_times_failing_blocks(registry):
+    stage = registry.histogram("stage_seconds", "Stages.", ["stage"])
+    with pytest.raises(RuntimeError):
+        with stage.time(stage="indexer_search"):
+            raise RuntimeError("boom")
+
+    assert stage.count(stage="indexer_search") == 1
+
+
+def test_gauge_reads_functions_when_rendered(registry):
+    waiting = registry.gauge("waiting", "Waiting.", ["service"])
+    queue = []
+    waiting.set_function(lambda: len(queue), service="trakt")
+    waiting.set(2, service="torrentio")
+    queue.append(1)
+
+    assert waiting.value(service="trakt") == 1
+    assert registry.render().splitlines()[2:] == [
+        'waiting{service="torrentio"} 2',
+        'waiting{service="trakt"} 1',
+    ]
+
+
+def test_registering_twice_returns_the_same_metric(registry):
+    first = registry.counter("items_total", "Items.")
+    assert registry.counter("items_total", "Items.") is first
+    with pytest.raises(ValueError):
+        registry.histogram("items_total", "Items.")
+
+
+def test_server_exposes_metrics(registry):
+    registry.counter("items_total", "Items.").inc()
+    server = MetricsServer(registry, port=0).start()
+    host, port = server.address
+    try:
+        response = requests.get(f"http://{host}:{port}/metrics", timeout=5)
+        missing = requests.get(f"http://{host}:{port}/other", timeout=5)
+    finally:
+        server.stop()
+
+    assert response.status_code == 200
+    assert "items_total 1" in response.text
+    assert missing.status_code == 404
+
+
+def test_adapter_counts_upstream_errors():
+    request = MagicMock(url="https://api.real-debrid.com/rest/1.0/torrents")
+    before = metrics.UPSTREAM_ERRORS.value(service="real_debrid", status="503")
+
+    with patch.object(HTTPAdapter, "send", return_value=MagicMock(status_code=503)):
+        RateLimitedAdapter().send(request)
+    with patch.object(HTTPAdapter, "send", side_effect=ConnectionError()):
+        with pytest.raises(ConnectionError):
+            RateLimitedAdapter().send(request)
+
+    assert metrics.UPSTREAM_ERRORS.value(service="real_debrid", status="503") == (
+        before + 1
+    )
+    assert metrics.UPSTREAM_ERRORS.value(
+        service="real_debrid", status="connection_error"
+    )
@@ -0,0 +1,30 @@
+from content.owned_index import OwnedItemIndex
+
+
+def test_build_merges_all_collections_and_processed_ids():
+    index = OwnedItemIndex.build(
+        {
+            "Plex": [{"imdb_id": "tt0000001"}, {"imdb_id": ""}],
+            "Trakt": [{"imdb_id": "tt0000002"}],
+        },
+        processed_ids=["tt0000003"],
+    )
+
+    assert "tt0000001" in index
+    assert "tt0000002" in index
+    assert "tt0000003" in index
+    assert "tt0000004" not in index
+    assert "" not in index
+    assert len(index) == 3
+
+
+def test_add_and_footprint():
+    index = OwnedItemIndex.build({})
+    empty_size = index.memory_bytes()
+
+    index.add("tt0000001")
+    index.add("")
+
+    assert len(index) == 1
+    assert index.memory_bytes() > empty_size
+    assert index.build_seconds >= 0
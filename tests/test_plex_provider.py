@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import patch, MagicMock
+from content.plex_library_snapshot import PlexLibrarySnapshot
 from content.plex_provider import PlexProvider
 from models.movie import Movie, MediaType
 
@@ -53,3 +54,110 @@ def test_get_watchlist_empty(mock_plex_account, mock_plex_server):
     result = provider.get_watchlist()
 
     assert result == []
+
+
+def make_library_item(rating_key, title, imdb_id):
+    item = MagicMock()
+    item.ratingKey = rating_key
+    item.title = title
+    item.year = 2023
+    item.guids = [MagicMock(id=f"imdb://{imdb_id}")]
+    item.type = "movie"
+    return item
+
+
+@pytest.fixture
+def library_snapshot(state_store):
+    return PlexLibrarySnapshot(state_store)
+
+
+def test_get_user_collection_scans_all_libraries(mock_plex_account, mock_plex_server):
+    sections = {
+        "Movies": MagicMock(
+            all=MagicMock(return_value=[make_library_item(1, "A", "tt1")])
+        ),
+        "TV Shows": MagicMock(
+            all=MagicMock(return_value=[make_library_item(2, "B", "tt2")])
+        ),
+    }
+    mock_plex_server.return_value.library.section.side_effect = sections.get
+
+    provider = PlexProvider(
+        "test_token", "http://test-server-url:32400", library_names=list(sections)
+    )
+    result = provider.get_user_collection()
+
+    assert [item["imdb_id"] for item in result] == ["tt1", "tt2"]
+
+
+def test_get_user_collection_incremental(
+    mock_plex_account, mock_plex_server, library_snapshot
+):
+    library = MagicMock()
+    library.all.return_value = [
+        make_library_item(1, "A", "tt1"),
+        make_library_item(2, "B", "tt2"),
+    ]
+    library.search.return_value = [make_library_item(3, "C", "tt3")]
+    library.totalViewSize.return_value = 3
+    mock_plex_server.return_value.library.section.return_value = library
+
+    provider = PlexProvider(
+        "test_token",
+        "http://test-server-url:32400",
+        library_names=["Movies"],
+        library_snapshot=library_snapshot,
+    )
+    first = provider.get_user_collection()
+    second = provider.get_user_collection()
+
+    assert sorted(item["imdb_id"] for item in first) == ["tt1", "tt2"]
+    assert sorted(item["imdb_id"] for item in second) == ["tt1", "tt2", "tt3"]
+    assert library.all.call_count == 1
+    library.search.assert_called_once()
+
+
+def test_get_user_collection_rescans_after_deletion(
+    mock_plex_account, mock_plex_server, library_snapshot
+):
+    library = MagicMock()
+    library.all.side_effect = [
+        [make_library_item(1, "A", "tt1"), make_library_item(2, "B", "tt2")],
+        [make_library_item(2, "B", "tt2")],
+    ]
+    library.search.return_value = []
+    library.totalViewSize.return_value = 1
+    mock_plex_server.return_value.library.section.return_value = library
+
+    provider = PlexProvider(
+        "test_token",
+        "http://test-server-url:32400",
+        library_names=["Movies"],
+        library_snapshot=library_snapshot,
+    )
+    provider.get_user_collection()
+    result = provider.get_user_collection()
+
+    assert [item["imdb_id"] for item in result] == ["tt2"]
+    assert library.all.call_count == 2
+
+
+def test_snapshot_replace_is_atomic(library_snapshot):
+    item = {
+        "rating_key": "1",
+        "title": "Movie",
+        "year": "2023",
+        "imdb_id": "tt1",
+        "media_type": "movie",
+    }
+    library_snapshot.replace("Movies", [item], scanned_at=100)
+
+    def failing_scan():
+        yield dict(item, rating_key="2")
+        raise ConnectionError("Plex went away")
+
+    with pytest.raises(ConnectionError):
+        library_snapshot.replace("Movies", failing_scan(), scanned_at=200)
+
+    assert library_snapshot.count("Movies") == 1
+    assert library_snapshot.last_scan("Movies").full_scan_at == 100
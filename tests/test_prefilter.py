@@ -0,0 +1,75 @@
+import pytest
+from monitoring import metrics
+from ranking.prefilter import ReleasePrefilter
+from RTN import RTN, SettingsModel
+from RTN.models import BaseRankingModel
+
+TITLES = [
+    "Movie.Title.2024.1080p.WEB-DL.x264-GRP",
+    "Movie.Title.2024.2160p.BluRay.x265.10bit-GRP",
+    "Movie.Title.2024.720p.HDTV.x264-GRP",
+    "Movie.Title.2024.HDCAM.x264-GRP",
+    "Movie.Title.2024.1080p.TS.x264-GRP",
+    "Movie.Title.2024.2160p.REMUX.HEVC-GRP",
+    "Movie Title 2024 1080p Dual Audio",
+]
+
+
+def prefilter_for(**settings):
+    settings = SettingsModel(**settings)
+    return settings, ReleasePrefilter.from_settings(settings)
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {"exclude": ["CAM", "TS"]},
+        {"require": ["/2160p/"], "exclude": ["/x265/", "hevc", "720p"]},
+        {"require": [r"\b4K|1080p\b"], "exclude": ["x264", r"(a)\1"]},
+    ],
+)
+def test_rejected_titles_are_never_fetched_by_rtn(settings):
+    settings, prefilter = prefilter_for(**settings)
+    rtn = RTN(settings=settings, ranking_model=BaseRankingModel())
+
+    for title in TITLES:
+        if prefilter.check(title):
+            assert not rtn.rank(title, "a" * 40).fetch, title
+
+
+def test_require_overrides_exclude_but_not_trash():
+    _, prefilter = prefilter_for(require=["1080p"], exclude=["x264"])
+
+    assert prefilter.check("Movie.Title.2024.1080p.WEB-DL.x264-GRP") is None
+    assert prefilter.check("Movie.Title.2024.720p.HDTV.x264-GRP") == "x264"
+    assert prefilter.check("Movie.Title.2024.1080p.TS.x264-GRP") == "trash"
+
+
+def test_case_sensitivity_follows_rtn_pattern_syntax():
+    _, prefilter = prefilter_for(exclude=["/REMUX/", "hevc"])
+
+    assert prefilter.check("Movie.Title.2024.2160p.remux-GRP") is None
+    assert prefilter.check("Movie.Title.2024.2160p.REMUX-GRP") == "REMUX"
+    assert prefilter.check("Movie.Title.2024.2160p.HEVC-GRP") == "hevc"
+
+
+def test_counts_rejections_per_rule():
+    _, prefilter = prefilter_for(exclude=["720p", "x265"])
+    before = metrics.RELEASES_FILTERED.value(reason="excluded")
+
+    kept = [title for title in TITLES if prefilter.check(title) is None]
+
+    assert kept == [
+        "Movie.Title.2024.1080p.WEB-DL.x264-GRP",
+        "Movie.Title.2024.2160p.REMUX.HEVC-GRP",
+        "Movie Title 2024 1080p Dual Audio",
+    ]
+    assert prefilter.stats() == {"x265": 1, "720p": 1, "trash": 2}
+    assert metrics.RELEASES_FILTERED.value(reason="excluded") == before + 2
+
+
+def test_backreferences_fall_back_to_separate_patterns():
+    _, prefilter = prefilter_for(exclude=[r"(\d)\1{3}"])
+
+    assert prefilter.check("Movie.Title.1111.1080p") == r"(\d)\1{3}"
+    assert prefilter.check("Movie.Title.2024.1080p") is None
@@ -0,0 +1,68 @@
+import pstats
+import sys
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from monitoring import profiler
+from monitoring.profiler import CycleProfiler
+
+
+def allocate(n):
+    return [str(i) for i in range(n)]
+
+
+def cycle():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        return sum(len(chunk) for chunk in executor.map(allocate, [1000] * 4))
+
+
+def test_run_returns_result_and_writes_files(tmp_path):
+    result = CycleProfiler(output_dir=str(tmp_path), top=5).run(cycle)
+
+    assert result == 4000
+    prefix = str(next(tmp_path.glob("*.prof")))[: -len(".prof")]
+    stats = pstats.Stats(f"{prefix}.prof")
+    tracemalloc.Snapshot.load(f"{prefix}.tracemalloc")
+    summary = open(f"{prefix}.txt").read()
+
+    # Calls made on the worker threads are merged into the profile
+    functions = {name for (_, _, name) in stats.stats}
+    assert "allocate" in functions
+    assert "Top 5 modules by CPU time" in summary
+    assert "test_profiler.py" in summary
+    assert not tracemalloc.is_tracing()
+
+
+def test_run_writes_profile_when_call_raises(tmp_path):
+    def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        CycleProfiler(output_dir=str(tmp_path)).run(failing)
+
+    assert len(list(tmp_path.glob("*.prof"))) == 1
+    assert not tracemalloc.is_tracing()
+
+
+def test_one_profiler_covers_all_threads_from_python_3_12(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PER_THREAD_PROFILES", False)
+    thread_profiles = []
+
+    def cycle():
+        thread = threading.Thread(
+            target=lambda: thread_profiles.append(sys.getprofile())
+        )
+        thread.start()
+        thread.join()
+        return len(thread_profiles)
+
+    # A second cProfile.Profile would fail to enable on 3.12+ and hang the run
+    assert CycleProfiler(output_dir=str(tmp_path)).run(cycle) == 1
+    assert thread_profiles == [None]
+    assert len(list(tmp_path.glob("*.prof"))) == 1
+
+
+def test_per_thread_profiles_match_the_python_version():
+    assert profiler.PER_THREAD_PROFILES == (sys.version_info < (3, 12))
@@ -0,0 +1,115 @@
+import math
+from unittest.mock import MagicMock, patch
+
+import pytest
+from RTN import SettingsModel, parse
+from RTN.models import BaseRankingModel
+from ranking.rank_cache import RankCache, settings_fingerprint
+
+TITLE = "Movie.Title.2023.1080p.WEB-DL.x264"
+HASH = "1234567890abcdef1234567890abcdef12345678"
+
+
+@pytest.fixture
+def rtn():
+    mock = MagicMock()
+    mock.rank.return_value = MagicMock(fetch=True, rank=150)
+    return mock
+
+
+def test_fingerprint_tracks_settings():
+    settings = {"require": ["1080p"], "ranking_model": {"uhd": 200}}
+
+    assert settings_fingerprint(settings) == settings_fingerprint(dict(settings))
+    assert settings_fingerprint(settings) != settings_fingerprint(
+        {"require": ["1080p"], "ranking_model": {"uhd": 100}}
+    )
+
+
+def test_parse_and_rank_are_memoized(rtn):
+    cache = RankCache(rtn, "fp")
+
+    with patch("ranking.rank_cache.parse", wraps=parse) as mock_parse:
+        assert cache.parsed_title(TITLE, HASH) == "Movie Title (2023)"
+        assert cache.parsed_title(TITLE, HASH) == "Movie Title (2023)"
+        assert cache.rank(TITLE, HASH) == (True, 150)
+        assert cache.rank(TITLE, HASH) == (True, 150)
+
+    assert mock_parse.call_count == 1
+    rtn.rank.assert_called_once_with(TITLE, HASH)
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction(rtn):
+    cache = RankCache(rtn, "fp", max_entries=1)
+    cache.rank(TITLE, HASH)
+    cache.rank(TITLE, "other")
+    cache.rank(TITLE, HASH)
+
+    assert rtn.rank.call_count == 3
+    assert cache.stats()["entries"] == 1
+
+
+def test_persisted_ranks_survive_restart(rtn, state_store):
+    cache = RankCache(rtn, "fp", state_store=state_store)
+    cache.rank(TITLE, HASH)
+    cache.flush()
+
+    reloaded = RankCache(rtn, "fp", state_store=state_store)
+    assert reloaded.rank(TITLE, HASH) == (True, 150)
+    rtn.rank.assert_called_once()
+
+
+def test_settings_change_invalidates_persisted_ranks(rtn, state_store):
+    old = RankCache(rtn, "old", state_store=state_store)
+    old.rank(TITLE, HASH)
+    old.flush()
+    rtn.rank.return_value = MagicMock(fetch=False, rank=-1000)
+
+    changed = RankCache(rtn, "new", state_store=state_store)
+    assert changed.rank(TITLE, HASH) == (False, -1000)
+    changed.flush()
+    assert state_store.query("SELECT COUNT(*) FROM rank_cache")[0][0] == 1
+
+
+def test_writes_are_buffered_until_flush(rtn, state_store):
+    cache = RankCache(rtn, "fp", state_store=state_store)
+    cache.parsed_title(TITLE, HASH)
+    cache.rank(TITLE, HASH)
+
+    assert state_store.query("SELECT COUNT(*) FROM rank_cache")[0][0] == 0
+    # Logging stats never writes
+    cache.log_stats()
+    assert state_store.query("SELECT COUNT(*) FROM rank_cache")[0][0] == 0
+    cache.maintain()
+    assert state_store.query("SELECT fetch, rank FROM rank_cache") == [(1, 150)]
+
+
+def test_prune_keeps_most_recently_used(rtn, state_store):
+    cache = RankCache(rtn, "fp", state_store=state_store, max_persisted=2)
+    with patch("ranking.rank_cache.time") as clock:
+        for i, info_hash in enumerate(("a", "b", "c")):
+            clock.time.return_value = 1000.0 + i
+            cache.rank(TITLE, info_hash)
+            cache.flush()
+        clock.time.return_value = 1003.0
+        cache.rank(TITLE, "a")
+        cache.flush()
+
+    assert cache.prune() == 1
+    assert sorted(
+        row[0] for row in state_store.query("SELECT info_hash FROM rank_cache")
+    ) == ["a", "c"]
+
+
+def test_upper_bound_is_exact_once_ranked(rtn):
+    rtn.settings = SettingsModel()
+    rtn.ranking_model = BaseRankingModel(fhd=150)
+    cache = RankCache(rtn, "fp")
+
+    assert cache.upper_bound(TITLE, HASH) >= 150
+    cache.rank(TITLE, HASH)
+    assert cache.upper_bound(TITLE, HASH) == 150
+    rtn.rank.return_value = MagicMock(fetch=False, rank=0)
+    cache.rank(TITLE, "0" * 40)
+    assert cache.upper_bound(TITLE, "0" * 40) == -math.inf
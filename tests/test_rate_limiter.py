@@ -0,0 +1,153 @@
+import threading
+import time
+from email.utils import formatdate
+from unittest.mock import MagicMock, patch
+
+import pytest
+from monitoring import metrics
+from requests.adapters import HTTPAdapter
+from transport.http_client import HttpClient
+from transport.rate_limiter import (
+    RateLimitedAdapter,
+    RateLimiter,
+    TokenBucket,
+    parse_retry_after,
+)
+
+
+@pytest.fixture
+def clock():
+    with patch("transport.rate_limiter.time") as mock_time:
+        mock_time.monotonic.return_value = 1000.0
+        mock_time.time.return_value = 1000.0
+        mock_time.sleep.side_effect = lambda seconds: setattr(
+            mock_time.monotonic,
+            "return_value",
+            mock_time.monotonic.return_value + seconds,
+        )
+        yield mock_time
+
+
+def test_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(4):
+        bucket.acquire()
+
+    assert clock.monotonic.return_value == pytest.approx(1000.5)
+
+
+def test_throttle_halves_rate_and_honors_retry_after(clock):
+    bucket = TokenBucket(rate=4, burst=1, min_rate=1)
+
+    assert bucket.throttle(retry_after=10) == 10
+    bucket.acquire()
+    assert clock.monotonic.return_value == pytest.approx(1010.5)
+    assert bucket.rate == 2
+
+    bucket.throttle()
+    bucket.throttle()
+    assert bucket.rate == 1
+    assert bucket.throttled == 3
+
+
+def test_success_recovers_rate(clock):
+    bucket = TokenBucket(rate=4, recovery=0.25)
+    bucket.throttle()
+    bucket.succeed()
+    assert bucket.rate == 3
+    for _ in range(5):
+        bucket.succeed()
+    assert bucket.rate == 4
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("12") == 12
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert 25 < parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+
+
+def test_adapter_retries_after_429(clock):
+    limiter = RateLimiter({"trakt": {"rate": 10, "burst": 10}}, max_retries=2)
+    adapter = RateLimitedAdapter(limiter)
+    throttled = MagicMock(status_code=429, headers={"Retry-After": "3"})
+    ok = MagicMock(status_code=200)
+    request = MagicMock(url="https://api.trakt.tv/sync/last_activities")
+
+    with patch.object(HTTPAdapter, "send", side_effect=[throttled, ok]) as send:
+        assert adapter.send(request) is ok
+
+    assert send.call_count == 2
+    assert clock.monotonic.return_value >= 1003
+    assert limiter.stats()["trakt"]["throttled"] == 1
+
+
+def test_adapter_gives_up_after_max_retries(clock):
+    limiter = RateLimiter({"trakt": {"rate": 10}}, max_retries=1)
+    throttled = MagicMock(status_code=429, headers={})
+    request = MagicMock(url="https://api.trakt.tv/sync/last_activities")
+
+    with patch.object(HTTPAdapter, "send", return_value=throttled) as send:
+        assert RateLimitedAdapter(limiter).send(request) is throttled
+
+    assert send.call_count == 2
+
+
+def test_adapter_sends_through_the_wrapped_adapter(clock):
+    limiter = RateLimiter({"trakt": {"rate": 10}}, max_retries=1)
+    inner = MagicMock(spec=HTTPAdapter)
+    inner.send.side_effect = [
+        MagicMock(status_code=429, headers={}),
+        MagicMock(status_code=200),
+    ]
+    request = MagicMock(url="https://api.trakt.tv/sync/last_activities")
+    adapter = RateLimitedAdapter(limiter, inner)
+
+    with patch.object(HTTPAdapter, "send") as send:
+        assert adapter.send(request, timeout=5).status_code == 200
+    adapter.close()
+
+    send.assert_not_called()
+    assert inner.send.call_count == 2
+    inner.send.assert_called_with(request, timeout=5)
+    inner.close.assert_called_once()
+
+
+def test_unlimited_hosts_pass_through():
+    limiter = RateLimiter({"trakt": {"rate": 10}})
+    request = MagicMock(url="https://example.com/")
+
+    assert limiter.bucket_for(request.url) is None
+    with patch.object(
+        HTTPAdapter, "send", return_value=MagicMock(status_code=200)
+    ) as send:
+        RateLimitedAdapter(limiter).send(request)
+    send.assert_called_once()
+
+
+def test_stats_report_queue_depth():
+    limiter = RateLimiter({"torrentio": {"rate": 1000, "burst": 1}})
+    bucket = limiter.buckets["torrentio"]
+    bucket.throttle(retry_after=0.2)
+    waiters = [threading.Thread(target=bucket.acquire) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.05)
+
+    assert limiter.stats()["torrentio"]["queue_depth"] == 3
+    assert metrics.RATE_LIMIT_WAITING.value(service="torrentio") == 3
+    assert metrics.RATE_LIMIT_RATE.value(service="torrentio") == 500
+    assert metrics.RATE_LIMIT_BLOCKED_SECONDS.value(service="torrentio") > 0
+    for waiter in waiters:
+        waiter.join()
+    assert limiter.stats()["torrentio"]["queue_depth"] == 0
+
+
+def test_http_client_from_config_shares_limiter():
+    client = HttpClient.from_config(
+        {"rate_limits": {"max_retries": 5, "real_debrid": {"rate": 4, "burst": 10}}}
+    )
+
+    assert client.adapter.rate_limiter is client.rate_limiter
+    assert client.rate_limiter.max_retries == 5
+    assert client.rate_limiter.bucket_for("https://api.real-debrid.com/rest/1.0")
@@ -1,15 +1,17 @@
+import threading
+import time
+
 import pytest
 from unittest.mock import patch, MagicMock
 from src.debrid.real_debrid import RealDebrid
 
 @pytest.fixture
-def real_debrid():
-    return RealDebrid("test_api_token")
+def mock_requests():
+    return MagicMock()
 
 @pytest.fixture
-def mock_requests():
-    with patch('src.debrid.real_debrid.requests') as mock:
-        yield mock
+def real_debrid(mock_requests):
+    return RealDebrid("test_api_token", http_client=mock_requests)
 
 def test_add_torrent(real_debrid, mock_requests):
     mock_response = MagicMock()
@@ -78,3 +80,95 @@ def test_get_user_torrents_multiple_pages(real_debrid, mock_requests):
     assert result[0] == {"id": "torrent1"}
     assert result[-1] == {"id": "torrent150"}
     assert mock_requests.get.call_count == 2
+
+def test_get_instant_availability_batches_and_caches(real_debrid, mock_requests):
+    hashes = [f"{i:040x}" for i in range(60)]
+    first_batch = MagicMock()
+    first_batch.json.return_value = {
+        hashes[0].upper(): {"rd": [{"1": {"filename": "movie.mkv"}}]},
+        hashes[1]: [],
+    }
+    second_batch = MagicMock()
+    second_batch.json.return_value = {hashes[59]: {"rd": []}}
+    mock_requests.get.side_effect = [first_batch, second_batch]
+
+    result = real_debrid.get_instant_availability(hashes)
+    again = real_debrid.get_instant_availability(hashes[:2])
+
+    assert result[hashes[0]] is True
+    assert result[hashes[1]] is False
+    assert result[hashes[59]] is False
+    assert again == {hashes[0]: True, hashes[1]: False}
+    assert mock_requests.get.call_count == 2
+    first_url = mock_requests.get.call_args_list[0].args[0]
+    prefix = "https://api.real-debrid.com/rest/1.0/torrents/instantAvailability/"
+    assert first_url.startswith(prefix)
+    assert first_url[len(prefix) :].split("/") == hashes[:50]
+
+def test_iter_user_torrents_compact(real_debrid, mock_requests):
+    def page(offset):
+        return MagicMock(
+            json=MagicMock(
+                return_value=[
+                    {
+                        "id": f"id{i}",
+                        "hash": f"hash{i}",
+                        "status": "downloaded",
+                        "filename": "x",
+                    }
+                    for i in range(offset, min(offset + 100, 250))
+                ]
+            ),
+            headers={"X-Total-Count": "250"},
+        )
+
+    mock_requests.get.side_effect = lambda url, headers, params: page(params["offset"])
+
+    result = list(real_debrid.iter_user_torrents(compact=True))
+
+    assert len(result) == 250
+    assert result[0] == {"hash": "hash0", "id": "id0", "status": "downloaded"}
+    assert result[-1]["id"] == "id249"
+    assert mock_requests.get.call_count == 3
+
+
+def test_iter_user_torrents_stops_early(real_debrid, mock_requests):
+    requested = []
+    fetching_third_page = threading.Event()
+    release_third_page = threading.Event()
+
+    def page(url, headers, params):
+        offset = params["offset"]
+        requested.append(offset)
+        if offset == 200:
+            fetching_third_page.set()
+            release_third_page.wait(5)
+        return MagicMock(
+            json=MagicMock(
+                return_value=[{"id": f"torrent{i}"} for i in range(offset, offset + 100)]
+            ),
+            headers={"X-Total-Count": "500"},
+        )
+
+    mock_requests.get.side_effect = page
+
+    torrents = real_debrid.iter_user_torrents(max_workers=1)
+    for _ in range(101):
+        torrent = next(torrents)
+    assert torrent == {"id": "torrent100"}
+    assert fetching_third_page.wait(5)
+    torrents.close()
+    release_third_page.set()
+    time.sleep(0.1)
+
+    assert requested == [0, 100, 200]
+
+def test_get_instant_availability_prunes_expired_answers(real_debrid, mock_requests):
+    mock_requests.get.return_value = MagicMock(json=MagicMock(return_value={}))
+    with patch("src.debrid.real_debrid.time") as clock:
+        clock.monotonic.return_value = 1000.0
+        real_debrid.get_instant_availability(["aaaa", "bbbb"])
+        clock.monotonic.return_value = 1000.0 + real_debrid.availability_ttl
+        real_debrid.get_instant_availability(["cccc"])
+
+    assert list(real_debrid._availability) == ["cccc"]
@@ -0,0 +1,131 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from indexer.release_cache import DEFAULT_TTLS, CachedIndexer, CacheSettings
+from models.movie import MediaType
+from models.release import Release
+
+
+@pytest.fixture
+def indexer():
+    mock = MagicMock()
+    mock.find_releases.return_value = [
+        Release(title="Movie.2023.1080p", infoHash="abcd", size_in_gb=2.0, peers=5)
+    ]
+    return mock
+
+
+@pytest.fixture
+def settings():
+    return CacheSettings(
+        ttls={MediaType.MOVIE: 100, MediaType.SHOW: 10},
+        negative_ttl=5,
+        stale_ttl=50,
+        max_entries=2,
+    )
+
+
+@pytest.fixture
+def clock():
+    with patch("indexer.release_cache.time") as mock_time:
+        mock_time.time.return_value = 1000.0
+        yield mock_time
+
+
+def test_fresh_hit_skips_indexer(indexer, settings, clock):
+    cache = CachedIndexer("Test", indexer, settings)
+
+    first = cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+    first[0].rank = 500
+    clock.time.return_value = 1099.0
+    second = cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+
+    assert indexer.find_releases.call_count == 1
+    assert second[0].rank == 0
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_per_media_type(indexer, settings, clock):
+    cache = CachedIndexer("Test", indexer, settings)
+    cache.find_releases("tt1", MediaType.SHOW, "Show")
+
+    clock.time.return_value = 1000.0 + 10 + 50
+    cache.find_releases("tt1", MediaType.SHOW, "Show")
+
+    assert indexer.find_releases.call_count == 2
+
+
+def test_negative_results_use_negative_ttl(indexer, settings, clock):
+    indexer.find_releases.return_value = []
+    cache = CachedIndexer("Test", indexer, settings)
+    cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+
+    clock.time.return_value = 1004.0
+    cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+    assert indexer.find_releases.call_count == 1
+
+    clock.time.return_value = 1000.0 + 5 + 50
+    cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+    assert indexer.find_releases.call_count == 2
+
+
+def test_stale_entry_is_served_and_refreshed(indexer, settings, clock):
+    cache = CachedIndexer("Test", indexer, settings)
+    cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+
+    refreshed = threading.Event()
+    indexer.find_releases.side_effect = lambda *args: refreshed.set() or [
+        Release(title="Movie.2023.2160p", infoHash="ef01", size_in_gb=9.0, peers=1)
+    ]
+    clock.time.return_value = 1120.0
+    stale = cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+
+    assert stale[0].infoHash == "abcd"
+    assert refreshed.wait(5)
+    cache._refresher.shutdown(wait=True)
+    clock.time.return_value = 1121.0
+    fresh = cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+    assert fresh[0].infoHash == "ef01"
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_lru_evicts_to_disk_tier(indexer, settings, clock, state_store):
+    cache = CachedIndexer("Test", indexer, settings, state_store)
+    for imdb_id in ("tt1", "tt2", "tt3"):
+        cache.find_releases(imdb_id, MediaType.MOVIE, "Movie")
+
+    assert cache.stats()["entries"] == 2
+    releases = cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+
+    assert releases[0].infoHash == "abcd"
+    assert indexer.find_releases.call_count == 3
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_settings_from_config():
+    settings = CacheSettings.from_config({"ttl": {"episode": 60}, "negative_ttl": 30})
+
+    assert settings.ttls[MediaType.EPISODE] == 60
+    assert settings.ttls[MediaType.MOVIE] == DEFAULT_TTLS[MediaType.MOVIE]
+    assert settings.negative_ttl == 30
+
+
+def test_purge_expired_deletes_old_disk_entries(indexer, settings, clock, state_store):
+    cache = CachedIndexer("Test", indexer, settings, state_store)
+    cache.find_releases("tt1", MediaType.MOVIE, "Movie")
+    indexer.find_releases.return_value = []
+    cache.find_releases("tt2", MediaType.MOVIE, "Movie")
+    clock.time.return_value = 1000.0 + 60
+    cache.find_releases("tt3", MediaType.MOVIE, "Movie")
+
+    cache.log_stats()
+    assert state_store.query("SELECT COUNT(*) FROM indexer_cache") == [(3,)]
+
+    assert cache.purge_expired() == 1
+    assert cache.stats()["purged"] == 1
+    assert [row[0] for row in state_store.query("SELECT key FROM indexer_cache")] == [
+        "Test:MOVIE:tt1",
+        "Test:MOVIE:tt3",
+    ]
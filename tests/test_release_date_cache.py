@@ -0,0 +1,82 @@
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from content.release_date_cache import ReleaseDateCache, ReleaseDateEntry
+from content.trakt_provider import TraktProvider
+from models.movie import MediaType, Movie
+
+
+@pytest.fixture
+def cache(state_store):
+    return ReleaseDateCache(state_store, refresh_interval=100)
+
+
+@pytest.fixture
+def mock_trakt():
+    with patch("content.trakt_provider.trakt.Trakt") as mock:
+        yield mock
+
+
+def releases_response(*releases):
+    response = MagicMock(ok=True)
+    response.json.return_value = [
+        {"release_type": release_type, "release_date": release_date}
+        for release_type, release_date in releases
+    ]
+    return response
+
+
+MOVIE = Movie(
+    title="Test Movie", year="2023", imdb_id="tt1234567", media_type=MediaType.MOVIE
+)
+
+
+def test_entry_refresh_rules():
+    today = date(2023, 6, 1)
+    released = ReleaseDateEntry("tt1", date(2023, 5, 1), checked_at=0)
+    upcoming = ReleaseDateEntry("tt2", date(2023, 7, 1), checked_at=1000)
+    unknown = ReleaseDateEntry("tt3", None, checked_at=1000)
+
+    assert released.is_released(today)
+    assert not released.needs_refresh(today, now=10**9, refresh_interval=100)
+    assert not upcoming.is_released(today)
+    assert not upcoming.needs_refresh(today, now=1050, refresh_interval=100)
+    assert upcoming.needs_refresh(today, now=1100, refresh_interval=100)
+    assert upcoming.is_released(date(2023, 7, 1))
+    assert unknown.needs_refresh(today, now=1100, refresh_interval=100)
+
+
+def test_set_and_get(cache):
+    cache.set("tt1", date(2023, 7, 1))
+    cache.set("tt2", None)
+
+    assert cache.get("tt1").release_date == date(2023, 7, 1)
+    assert cache.get("tt2").release_date is None
+    assert cache.get("tt3") is None
+
+
+def test_check_released_stores_first_release_date(mock_trakt, cache):
+    mock_trakt.http.get.return_value = releases_response(
+        ("theatrical", "2023-01-01"),
+        ("physical", "2099-03-01"),
+        ("digital", "2099-02-01"),
+    )
+    provider = TraktProvider("test_id", "test_secret", release_dates=cache)
+
+    assert provider.check_released(MOVIE) is False
+    assert provider.check_released(MOVIE) is False
+
+    mock_trakt.http.get.assert_called_once_with("movies/tt1234567/releases/us")
+    assert cache.get(MOVIE.imdb_id).release_date == date(2099, 2, 1)
+
+
+def test_check_released_skips_network_once_released(mock_trakt, cache):
+    cache.set(MOVIE.imdb_id, date(2023, 2, 1))
+    provider = TraktProvider("test_id", "test_secret", release_dates=cache)
+
+    with patch("content.trakt_provider.datetime") as mock_datetime:
+        mock_datetime.now.return_value = datetime(2023, 6, 1)
+        assert provider.check_released(MOVIE) is True
+
+    mock_trakt.http.get.assert_not_called()
@@ -0,0 +1,92 @@
+import json
+import math
+import random
+
+import pytest
+from benchmarks.parse_titles import DEFAULT_CORPUS
+from ranking.selection import RankBound, select_best
+from RTN import RTN, SettingsModel
+from RTN.models import BaseRankingModel
+
+CORPUS = [title.split("\n")[0] for title in json.loads(DEFAULT_CORPUS.read_text())]
+# Every fourth corpus title keeps the test quick; RTN parses are slow
+TITLES = CORPUS[::4] + [
+    "Movie.2020.3840x2160.HDR10+.DTS-X.Atmos-GRP",
+    "Movie 2020 UHD BluRay Dual Audio Multi Subs",
+    "Movie.2020.4K.DoVi.Complete.Collection",
+    "Movie.2020.2560x1440.REPACK.PROPER.REMUX.HE-AAC.v2",
+]
+
+
+@pytest.mark.parametrize(
+    "model, preferred",
+    [
+        ({"uhd": 200, "hdr": 100}, []),
+        (
+            {
+                "uhd": 200,
+                "fhd": 150,
+                "hdr": 100,
+                "dolby_video": 120,
+                "remux": 30,
+                "webdl": 60,
+                "h265": 20,
+                "dts_hd_ma": 25,
+                "dubbed": -50,
+                "subbed": 10,
+            },
+            ["FLUX"],
+        ),
+    ],
+)
+def test_bound_is_never_below_the_rtn_rank(model, preferred):
+    settings = SettingsModel(preferred=preferred)
+    rtn = RTN(settings=settings, ranking_model=BaseRankingModel(**model))
+    bound = RankBound(settings, BaseRankingModel(**model))
+
+    for title in TITLES:
+        assert bound(title) >= rtn.rank(title, "a" * 40).rank, title
+
+
+def test_bound_tracks_raw_title_markers():
+    settings = SettingsModel(preferred=["FLUX"])
+    bound = RankBound(settings, BaseRankingModel(uhd=200, hdr=100))
+
+    assert bound("Movie.2020.2160p.HDR-GRP") == bound("Movie.2020.1080p-GRP") + 300
+    assert bound("Movie.2020.1080p-FLUX") == bound("Movie.2020.1080p-GRP") + 5000
+    assert bound("Show.S01E01.1080p-GRP") == math.inf
+
+
+def test_select_best_matches_a_full_sort():
+    rng = random.Random(0)
+    scores = [rng.choice([None, *range(10)]) for _ in range(200)]
+    # Loose bounds, so the search has to score some candidates to stop
+    bounds = [rng.randint(s, s + 3) if s is not None else 9 for s in scores]
+    expected = sorted(
+        ((s, i) for i, s in enumerate(scores) if s is not None),
+        key=lambda item: -item[0],
+    )
+
+    for k in (1, 3):
+        best = select_best(range(200), bounds.__getitem__, scores.__getitem__, k=k)
+        assert best == expected[:k]
+
+
+def test_select_best_stops_once_nothing_can_beat_the_best():
+    scored = []
+
+    def score(candidate):
+        scored.append(candidate)
+        return candidate
+
+    best = select_best([1, 5, 3, 9, 2], lambda candidate: candidate + 1, score)
+
+    assert best == [(9, 9)]
+    assert scored == [9]
+
+
+def test_select_best_skips_rejected_candidates():
+    best = select_best(["a", "b"], lambda _: 1, {"a": None, "b": 0}.get)
+
+    assert best == [(0, "b")]
+    assert select_best([], lambda _: 1, lambda _: 1) == []
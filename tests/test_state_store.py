@@ -0,0 +1,78 @@
+from models.movie import MediaType, Movie
+from state.state_store import ItemOutcome, StateStore
+
+
+def make_movie(i):
+    return Movie(
+        title=f"Movie {i}",
+        year="2023",
+        imdb_id=f"tt{i:07d}",
+        media_type=MediaType.MOVIE,
+    )
+
+
+def test_uses_wal(state_store):
+    assert state_store.query("PRAGMA journal_mode")[0][0] == "wal"
+
+
+def test_record_attempt_keeps_history(state_store):
+    movie = make_movie(1)
+    state_store.record_attempt(movie, ItemOutcome.NO_RELEASES)
+    state_store.record_attempt(movie, ItemOutcome.ADDED, info_hash="abcd")
+    state_store.record_attempt(movie, ItemOutcome.FAILED)
+
+    state = state_store.get(movie.imdb_id)
+    assert state.outcome == ItemOutcome.FAILED
+    assert state.info_hash == "abcd"
+    assert state.attempts == 3
+    assert state.added_at is not None
+    assert state.first_seen <= state.last_attempt
+
+
+def test_get_unknown_item(state_store):
+    assert state_store.get("tt9999999") is None
+
+
+def test_processed_ids(state_store):
+    for i in range(1200):
+        state_store.record_attempt(
+            make_movie(i),
+            ItemOutcome.ADDED if i % 2 else ItemOutcome.NO_RELEASES,
+        )
+    state_store.record_attempt(make_movie(5000), ItemOutcome.DRY_RUN)
+
+    wanted = [make_movie(i).imdb_id for i in range(1100, 1300)] + ["tt0005000"]
+    assert state_store.processed_ids(wanted) == {
+        make_movie(i).imdb_id for i in range(1101, 1200, 2)
+    }
+    assert "tt0005000" in state_store.processed_ids(
+        wanted, [ItemOutcome.ADDED, ItemOutcome.DRY_RUN]
+    )
+    assert state_store.count() == 1201
+
+
+def test_survives_reopen(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path)
+    store.record_attempt(make_movie(1), ItemOutcome.ADDED, info_hash="abcd")
+    store.close()
+
+    reopened = StateStore(path)
+    assert reopened.processed_ids([make_movie(1).imdb_id]) == {"tt0000001"}
+    reopened.close()
+
+
+def test_transaction_rolls_back_on_error(state_store):
+    state_store.record_attempt(make_movie(1), ItemOutcome.ADDED)
+
+    try:
+        with state_store.transaction():
+            state_store.execute("DELETE FROM items")
+            with state_store.transaction():
+                state_store.record_attempt(make_movie(2), ItemOutcome.ADDED)
+            raise RuntimeError("crash")
+    except RuntimeError:
+        pass
+
+    assert state_store.count() == 1
+    assert state_store.get(make_movie(1).imdb_id) is not None
@@ -1,3 +1,4 @@
+import json
 import unittest
 from unittest.mock import patch, Mock
 from models.movie import MediaType
@@ -5,28 +6,40 @@ from src.indexer.torrentio import Torrentio
 from src.models.release import Release
 
 
+def streamed_response(payload, chunk_size=7):
+    # Small chunks split objects and multi-byte characters across reads
+    body = json.dumps(payload, ensure_ascii=False).encode()
+    response = Mock()
+    response.iter_content.return_value = [
+        body[i : i + chunk_size] for i in range(0, len(body), chunk_size)
+    ]
+    return response
+
+
 class TestTorrentio(unittest.TestCase):
     def setUp(self):
-        self.torrentio = Torrentio()
+        self.http = Mock()
+        self.torrentio = Torrentio(http_client=self.http)
 
-    @patch("src.indexer.torrentio.requests.get")
-    def test_find_releases_movie(self, mock_get):
+    def test_find_releases_movie(self):
+        mock_get = self.http.get
         # Mock the API response
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "streams": [
-                {
-                    "name": "Torrentio\n4k DV | HDR10+",
-                    "title": "Movie.Title.2024.2160p.DV.HDR10Plus.HEVC.DDP5.1.Atmos\n👤 74 💾 30.4 GB ⚙️ TorrentGalaxy",
-                    "infoHash": "1234567890abcdef1234567890abcdef12345678",
-                },
-                {
-                    "name": "Torrentio\n1080p",
-                    "title": "Movie.Title.2024.1080p.WEB-DL.x264\n👤 50 💾 2.5 GB ⚙️ RARBG",
-                    "infoHash": "abcdef1234567890abcdef1234567890abcdef12",
-                },
-            ]
-        }
+        mock_response = streamed_response(
+            {
+                "streams": [
+                    {
+                        "name": "Torrentio\n4k DV | HDR10+",
+                        "title": "Movie.Title.2024.2160p.DV.HDR10Plus.HEVC.DDP5.1.Atmos\n👤 74 💾 30.4 GB ⚙️ TorrentGalaxy",
+                        "infoHash": "1234567890abcdef1234567890abcdef12345678",
+                    },
+                    {
+                        "name": "Torrentio\n1080p",
+                        "title": "Movie.Title.2024.1080p.WEB-DL.x264\n👤 50 💾 2.5 GB ⚙️ RARBG",
+                        "infoHash": "abcdef1234567890abcdef1234567890abcdef12",
+                    },
+                ]
+            }
+        )
         mock_get.return_value = mock_response
 
         # Test the find_releases method
@@ -53,22 +66,24 @@ class TestTorrentio(unittest.TestCase):
 
         # Assert that the correct URL was called
         mock_get.assert_called_once_with(
-            "https://torrentio.strem.fun/sort=qualitysize&qualityfilter=480p,scr,cam/stream/movie/tt1234567.json"
+            "https://torrentio.strem.fun/sort=qualitysize&qualityfilter=480p,scr,cam/stream/movie/tt1234567.json",
+            stream=True,
         )
 
-    @patch("src.indexer.torrentio.requests.get")
-    def test_find_releases_show(self, mock_get):
+    def test_find_releases_show(self):
+        mock_get = self.http.get
         # Mock the API response
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "streams": [
-                {
-                    "name": "Torrentio\n1080p",
-                    "title": "TV.Show.S01E01.1080p.WEB-DL.x264\n👤 30 💾 800 MB ⚙️ EZTV",
-                    "infoHash": "0123456789abcdef0123456789abcdef01234567",
-                }
-            ]
-        }
+        mock_response = streamed_response(
+            {
+                "streams": [
+                    {
+                        "name": "Torrentio\n1080p",
+                        "title": "TV.Show.S01E01.1080p.WEB-DL.x264\n👤 30 💾 800 MB ⚙️ EZTV",
+                        "infoHash": "0123456789abcdef0123456789abcdef01234567",
+                    }
+                ]
+            }
+        )
         mock_get.return_value = mock_response
 
         # Test the find_releases method
@@ -87,22 +102,24 @@ class TestTorrentio(unittest.TestCase):
 
         # Assert that the correct URL was called
         mock_get.assert_called_once_with(
-            "https://torrentio.strem.fun/sort=qualitysize&qualityfilter=480p,scr,cam/stream/series/tt9876543:1:1.json"
+            "https://torrentio.strem.fun/sort=qualitysize&qualityfilter=480p,scr,cam/stream/series/tt9876543:1:1.json",
+            stream=True,
         )
 
-    @patch("src.indexer.torrentio.requests.get")
-    def test_find_releases_episode(self, mock_get):
+    def test_find_releases_episode(self):
+        mock_get = self.http.get
         # Mock the API response
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "streams": [
-                {
-                    "name": "Torrentio\n1080p",
-                    "title": "TV.Show.S01E02.1080p.WEB-DL.x264\n👤 25 💾 750 MB ⚙️ EZTV",
-                    "infoHash": "fedcba9876543210fedcba9876543210fedcba98",
-                }
-            ]
-        }
+        mock_response = streamed_response(
+            {
+                "streams": [
+                    {
+                        "name": "Torrentio\n1080p",
+                        "title": "TV.Show.S01E02.1080p.WEB-DL.x264\n👤 25 💾 750 MB ⚙️ EZTV",
+                        "infoHash": "fedcba9876543210fedcba9876543210fedcba98",
+                    }
+                ]
+            }
+        )
         mock_get.return_value = mock_response
 
         # Test the find_releases method
@@ -123,14 +140,14 @@ class TestTorrentio(unittest.TestCase):
 
         # Assert that the correct URL was called
         mock_get.assert_called_once_with(
-            "https://torrentio.strem.fun/sort=qualitysize&qualityfilter=480p,scr,cam/stream/series/tt9876543.json"
+            "https://torrentio.strem.fun/sort=qualitysize&qualityfilter=480p,scr,cam/stream/series/tt9876543.json",
+            stream=True,
         )
 
-    @patch("src.indexer.torrentio.requests.get")
-    def test_find_releases_no_results(self, mock_get):
+    def test_find_releases_no_results(self):
+        mock_get = self.http.get
         # Mock an empty API response
-        mock_response = Mock()
-        mock_response.json.return_value = {"streams": []}
+        mock_response = streamed_response({"streams": []})
         mock_get.return_value = mock_response
 
         # Test the find_releases method
@@ -141,34 +158,110 @@ class TestTorrentio(unittest.TestCase):
         # Assert that an empty list is returned
         self.assertEqual(releases, [])
 
-    def test_parse_title(self):
-        # Test the _parse_title method
-        torrentio = Torrentio()
+    def test_find_releases_stops_after_max_candidates(self):
+        streams = [
+            {
+                "title": f"Movie.Title.2024.{'CAM' if i % 2 else '1080p'}.x264\n👤 {i} 💾 1 GB",
+                "infoHash": f"{i:040x}",
+            }
+            for i in range(500)
+        ]
+        body = json.dumps({"streams": streams}).encode()
+        chunks = [body[i : i + 1024] for i in range(0, len(body), 1024)]
+        read = []
+
+        def iter_content(chunk_size):
+            for chunk in chunks:
+                read.append(chunk)
+                yield chunk
+
+        mock_response = Mock()
+        mock_response.iter_content.side_effect = iter_content
+        self.http.get.return_value = mock_response
+        torrentio = Torrentio(
+            http_client=self.http,
+            max_candidates=3,
+            release_filter=lambda release: "CAM" not in release.title,
+        )
+
+        releases = torrentio.find_releases("tt1234567", MediaType.MOVIE, "Movie Title")
+
+        self.assertEqual([release.peers for release in releases], [0, 2, 4])
+        self.assertLess(len(read), 2)
+        mock_response.close.assert_called_once()
+
+    def test_find_releases_skips_other_keys(self):
+        self.http.get.return_value = streamed_response(
+            {
+                "cacheMaxAge": 3600,
+                "streams": [{"title": "Movie.Title.2024.1080p", "infoHash": "a" * 40}],
+                "staleError": 0,
+            }
+        )
+
+        releases = self.torrentio.find_releases(
+            "tt1234567", MediaType.MOVIE, "Movie Title"
+        )
+
+        self.assertEqual(
+            [release.title for release in releases], ["Movie.Title.2024.1080p"]
+        )
+
+    def test_find_releases_rejects_invalid_bodies(self):
+        for body in [b"<html>Bad Gateway</html>", b'{"streams": [{"title": "A", "inf']:
+            mock_response = Mock()
+            mock_response.iter_content.return_value = [body]
+            self.http.get.return_value = mock_response
+            with self.assertRaises(ValueError):
+                self.torrentio.find_releases("tt1234567", MediaType.MOVIE, "Movie")
+            mock_response.close.assert_called_once()
+
+    def test_parse_stream(self):
+        # Test the _parse_stream method
+        torrentio = Torrentio(http_client=Mock())
+        info_hash = "1234567890abcdef1234567890abcdef12345678"
 
         # Test with GB
-        result = torrentio._parse_title(
-            "Movie.Title.2024.2160p.DV.HDR10Plus.HEVC\n👤 74 💾 30.4 GB ⚙️ TorrentGalaxy"
+        result = torrentio._parse_stream(
+            {
+                "title": "Movie.Title.2024.2160p.DV.HDR10Plus.HEVC\n👤 74 💾 30.4 GB ⚙️ TorrentGalaxy",
+                "infoHash": info_hash,
+            }
         )
-        self.assertEqual(result["title"], "Movie.Title.2024.2160p.DV.HDR10Plus.HEVC")
-        self.assertEqual(result["size_in_gb"], 30.4)
-        self.assertEqual(result["peers"], 74)
-        self.assertEqual(result["quality"], "2160p")
+        self.assertEqual(result.title, "Movie.Title.2024.2160p.DV.HDR10Plus.HEVC")
+        self.assertEqual(result.infoHash, info_hash)
+        self.assertEqual(result.size_in_gb, 30.4)
+        self.assertEqual(result.peers, 74)
 
         # Test with MB
-        result = torrentio._parse_title(
-            "TV.Show.S01E01.1080p.WEB-DL\n👤 30 💾 800 MB ⚙️ EZTV"
+        result = torrentio._parse_stream(
+            {
+                "title": "TV.Show.S01E01.1080p.WEB-DL\n👤 30 💾 800 MB ⚙️ EZTV",
+                "infoHash": info_hash,
+            }
         )
-        self.assertEqual(result["title"], "TV.Show.S01E01.1080p.WEB-DL")
-        self.assertEqual(result["size_in_gb"], 0.78)
-        self.assertEqual(result["peers"], 30)
-        self.assertEqual(result["quality"], "1080p")
+        self.assertEqual(result.title, "TV.Show.S01E01.1080p.WEB-DL")
+        self.assertEqual(result.size_in_gb, 0.78)
+        self.assertEqual(result.peers, 30)
+
+        # Test with a file name line and a language line
+        result = torrentio._parse_stream(
+            {
+                "title": "Show Season 1 Complete\nShow.S01E02.mkv\n👤 8 💾 1.5 GB ⚙️ 1337x\n🇬🇧",
+                "infoHash": info_hash,
+            }
+        )
+        self.assertEqual(result.title, "Show Season 1 Complete")
+        self.assertEqual(result.size_in_gb, 1.5)
+        self.assertEqual(result.peers, 8)
 
         # Test with no additional info
-        result = torrentio._parse_title("Movie.Title.2024.1080p.WEB-DL.x264")
-        self.assertEqual(result["title"], "Movie.Title.2024.1080p.WEB-DL.x264")
-        self.assertEqual(result["size_in_gb"], 0)
-        self.assertEqual(result["peers"], 0)
-        self.assertEqual(result["quality"], "1080p")
+        result = torrentio._parse_stream(
+            {"title": "Movie.Title.2024.1080p.WEB-DL.x264", "infoHash": info_hash}
+        )
+        self.assertEqual(result.title, "Movie.Title.2024.1080p.WEB-DL.x264")
+        self.assertEqual(result.size_in_gb, 0)
+        self.assertEqual(result.peers, 0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+import contextvars
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from monitoring.tracing import NULL_SPAN, Tracer
+from requests.adapters import HTTPAdapter
+from transport.rate_limiter import RateLimitedAdapter
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = Tracer()
+    tracer.configure(path=str(tmp_path / "traces.jsonl"), sample_rate=1.0)
+    yield tracer
+    tracer.close()
+
+
+def read_spans(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_spans_nest_under_the_item_trace(tracer, tmp_path):
+    with tracer.trace("item", imdb_id="tt1") as root:
+        with tracer.span("indexer_search"):
+            with tracer.span("http", service="torrentio") as http:
+                http.outcome = 200
+        root.outcome = "added"
+
+    item, stage, http = read_spans(tmp_path)
+    assert item["name"] == "item"
+    assert item["outcome"] == "added"
+    assert item["attributes"] == {"imdb_id": "tt1"}
+    assert stage["parent_id"] == item["span_id"]
+    assert http["parent_id"] == stage["span_id"]
+    assert http["outcome"] == "200"
+    assert {item["trace_id"], stage["trace_id"], http["trace_id"]} == {item["trace_id"]}
+    assert item["duration_ms"] >= http["duration_ms"]
+
+
+def test_spans_outside_a_trace_are_not_recorded(tracer, tmp_path):
+    with tracer.span("http") as span:
+        span.outcome = 200
+
+    assert span is NULL_SPAN
+    assert read_spans(tmp_path) == []
+
+
+def test_failed_spans_record_the_error(tracer, tmp_path):
+    with pytest.raises(ValueError):
+        with tracer.trace("item"):
+            with tracer.span("ranking"):
+                raise ValueError("bad title")
+
+    item, ranking = read_spans(tmp_path)
+    assert ranking["outcome"] == "error"
+    assert ranking["attributes"] == {"error": "ValueError"}
+    assert item["outcome"] == "error"
+
+
+def test_copied_context_carries_the_trace_to_other_threads(tracer, tmp_path):
+    def lookup():
+        with tracer.span("indexer"):
+            pass
+
+    with tracer.trace("item"):
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(lookup,))
+        thread.start()
+        thread.join()
+
+    item, indexer = read_spans(tmp_path)
+    assert indexer["parent_id"] == item["span_id"]
+
+
+def test_unsampled_traces_are_skipped(tracer, tmp_path):
+    tracer.sample_rate = 0
+    with tracer.trace("item") as root:
+        with tracer.span("ranking") as span:
+            pass
+
+    assert root is NULL_SPAN
+    assert span is NULL_SPAN
+    assert read_spans(tmp_path) == []
+
+
+def test_slow_threshold_keeps_slow_and_failed_unsampled_traces(tracer, tmp_path):
+    tracer.sample_rate = 0
+    tracer.slow_threshold = 60
+    with tracer.trace("fast"):
+        pass
+    with pytest.raises(RuntimeError):
+        with tracer.trace("failed"):
+            raise RuntimeError
+    tracer.slow_threshold = 0
+    with tracer.trace("slow"):
+        pass
+
+    assert [span["name"] for span in read_spans(tmp_path)] == ["failed", "slow"]
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.trace("item") as root:
+        with tracer.span("http") as span:
+            pass
+
+    assert root is NULL_SPAN
+    assert span is NULL_SPAN
+
+
+def test_adapter_records_http_spans(tracer, tmp_path):
+    request = MagicMock(url="https://api.trakt.tv/movies/tt1?extended=full")
+    request.method = "GET"
+    response = MagicMock(status_code=404)
+    with patch("transport.rate_limiter.TRACER", tracer):
+        with patch.object(HTTPAdapter, "send", return_value=response):
+            with tracer.trace("item"):
+                RateLimitedAdapter().send(request)
+
+    _, http = read_spans(tmp_path)
+    assert http["name"] == "http"
+    assert http["outcome"] == "404"
+    assert http["attributes"] == {
+        "service": "trakt",
+        "method": "GET",
+        "path": "/movies/tt1",
+    }
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+import requests
+from models.movie import MediaType, Movie
+from scheduling.webhooks import WebhookServer
+
+
+def plex_body(event):
+    payload = json.dumps({"event": event, "Metadata": {"title": "Movie"}})
+    body = (
+        "--BOUNDARY\r\n"
+        'Content-Disposition: form-data; name="payload"\r\n'
+        "Content-Type: application/json\r\n\r\n"
+        f"{payload}\r\n"
+        "--BOUNDARY--\r\n"
+    )
+    return {"Content-Type": "multipart/form-data; boundary=BOUNDARY"}, body.encode()
+
+
+@pytest.fixture
+def received():
+    return {"items": [], "scans": 0}
+
+
+@pytest.fixture
+def server(received):
+    def on_plex():
+        received["scans"] += 1
+
+    return WebhookServer(
+        on_item=received["items"].append,
+        on_plex=on_plex,
+        port=0,
+        token="secret",
+        plex_events=["library.new"],
+    )
+
+
+def test_item_webhook_pushes_the_item(server, received):
+    body = json.dumps({"imdb_id": "tt0111161", "title": "Movie", "year": 1994})
+
+    status, _ = server.handle("/webhook/item?token=secret", {}, body.encode())
+
+    assert status == 202
+    assert received["items"] == [
+        Movie(
+            title="Movie", year="1994", imdb_id="tt0111161", media_type=MediaType.MOVIE
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"not json", b"[]", b'{"title": "Movie"}', b'{"imdb_id": "tt1", "type": "x"}'],
+)
+def test_invalid_items_are_rejected(server, received, body):
+    status, _ = server.handle("/webhook/item?token=secret", {}, body)
+
+    assert status == 400
+    assert received["items"] == []
+
+
+def test_requests_need_the_token(server, received):
+    body = json.dumps({"imdb_id": "tt0111161"}).encode()
+
+    assert server.handle("/webhook/item", {}, body)[0] == 401
+    assert server.handle("/webhook/item?token=wrong", {}, body)[0] == 401
+    assert server.handle("/webhook/item", {"X-Webhook-Token": "secret"}, body)[0] == 202
+    assert server.handle("/other?token=secret", {}, body)[0] == 404
+
+
+def test_configured_plex_events_request_a_scan(server, received):
+    assert server.handle("/webhook/plex?token=secret", *plex_body("library.new")) == (
+        202,
+        "Scan requested",
+    )
+    assert server.handle("/webhook/plex?token=secret", *plex_body("media.play")) == (
+        200,
+        "Ignored",
+    )
+    assert server.handle("/webhook/plex?token=secret", {}, b"{}")[0] == 400
+    assert received["scans"] == 1
+
+
+def test_server_answers_over_http(server, received):
+    server.start()
+    host, port = server.address
+    try:
+        response = requests.post(
+            f"http://{host}:{port}/webhook/item",
+            json={"imdb_id": "tt0111161", "type": "show"},
+            headers={"x-webhook-token": "secret"},
+            timeout=5,
+        )
+    finally:
+        server.stop()
+
+    assert response.status_code == 202
+    assert received["items"][0].media_type == MediaType.SHOW
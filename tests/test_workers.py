@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+from models.movie import MediaType, Movie
+from scheduling.item_scheduler import RetryPolicy
+from scheduling.workers import claimed, parse_shard, shard_of, split_rate_limits
+from state.state_store import ItemOutcome, ProcessLock, StateStore
+
+
+def make_movie(i):
+    return Movie(
+        title=f"Movie {i}",
+        year="2023",
+        imdb_id=f"tt{i:07d}",
+        media_type=MediaType.MOVIE,
+    )
+
+
+def test_shards_are_stable_and_even():
+    shards = Counter(shard_of(f"tt{i:07d}", 4) for i in range(4000))
+
+    assert shard_of("tt0111161", 4) == shard_of("tt0111161", 4)
+    assert sorted(shards) == [0, 1, 2, 3]
+    assert min(shards.values()) > 800
+
+
+def test_parse_shard():
+    assert parse_shard("1/4") == (1, 4)
+    with pytest.raises(ValueError):
+        parse_shard("4/4")
+
+
+def test_rate_limits_are_split_between_processes():
+    config = {"timeout": 30, "rate_limits": {"max_retries": 3, "trakt": {"rate": 3}}}
+
+    split = split_rate_limits(config, 4)
+
+    assert split["rate_limits"] == {
+        "max_retries": 3,
+        "trakt": {"rate": 0.75, "burst": 1},
+    }
+    assert config["rate_limits"]["trakt"] == {"rate": 3}
+
+
+def test_claimed_items_are_skipped_by_other_processes(tmp_path):
+    path = str(tmp_path / "state.db")
+    first = StateStore(path, shared=True)
+    second = StateStore(path, shared=True)
+    calls = []
+
+    def process_second(item):
+        calls.append(("second", item.imdb_id))
+
+    process_in_second = claimed(process_second, second, "second", RetryPolicy())
+
+    def process_first(item):
+        calls.append(("first", item.imdb_id))
+        # The other process picks up the same item meanwhile
+        process_in_second(item)
+
+    try:
+        claimed(process_first, first, "first", RetryPolicy())(make_movie(1))
+        process_in_second(make_movie(1))
+    finally:
+        first.close()
+        second.close()
+
+    assert calls == [("first", "tt0000001"), ("second", "tt0000001")]
+
+
+@pytest.mark.parametrize("outcome", [ItemOutcome.ADDED, ItemOutcome.NO_RELEASES])
+def test_items_finished_by_another_process_are_not_processed_again(tmp_path, outcome):
+    path = str(tmp_path / "state.db")
+    first = StateStore(path, shared=True)
+    second = StateStore(path, shared=True)
+    policy = RetryPolicy(interval=3600)
+    calls = []
+
+    def process(state_store):
+        def process_item(item):
+            calls.append(item.imdb_id)
+            state_store.record_attempt(item, outcome)
+
+        return process_item
+
+    try:
+        # Worker 0 handles a pushed item the owning shard has queued as well
+        claimed(process(first), first, "first", policy)(make_movie(1))
+        claimed(process(second), second, "second", policy)(make_movie(1))
+        # Claims are released either way
+        assert second.claim("tt0000001", "third")
+    finally:
+        first.close()
+        second.close()
+
+    # Added items are never due again, the others not before the interval
+    assert calls == ["tt0000001"]
+
+
+def test_expired_claims_can_be_taken_over(state_store):
+    assert state_store.claim("tt0000001", "first", ttl=-1)
+    assert state_store.claim("tt0000001", "second")
+    assert not state_store.claim("tt0000001", "first")
+    state_store.release("tt0000001", "second")
+    assert state_store.claim("tt0000001", "first")
+
+
+def test_process_lock_is_exclusive(tmp_path):
+    first = ProcessLock(str(tmp_path / "state.db.lock"))
+    second = ProcessLock(str(tmp_path / "state.db.lock"))
+    events = []
+
+    def take_second():
+        with second:
+            events.append("second")
+
+    with first:
+        thread = threading.Thread(target=take_second)
+        thread.start()
+        time.sleep(0.1)
+        events.append("first")
+    thread.join()
+    first.close()
+    second.close()
+
+    assert events == ["first", "second"]